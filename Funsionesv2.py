@@ -1,7 +1,8 @@
 import pandas as pd
 import matplotlib.pyplot as plt
 import numpy as np
-import skfuzzy as fuzz
+import fuzzy
+from datasets.service import load_estadisticas, zone
 
 # ========================
 # FUNCIONES DE APOYO
@@ -33,7 +34,7 @@ def clasificar_nivel_peligro(promedio):
 # ========================
 
 def contar_delitos_por_tipo(df, provincia, canton):
-    df_filtrado = df[(df['Provincia'] == provincia) & (df['Canton'] == canton)]
+    df_filtrado = zone(df, provincia, canton)
     conteo = df_filtrado['Tipo'].value_counts()
     print(f"\n--- CASO 1: Conteo de delitos en {provincia}, {canton} ---\n")
     print(conteo)
@@ -42,69 +43,97 @@ def contar_delitos_por_tipo(df, provincia, canton):
 # CASO 2 – Nivel de peligro usando lógica difusa
 # ========================
 
-def calcular_nivel_peligro(df, provincia, canton):
-    df_filtrado = df[(df['Provincia'] == provincia) & (df['Canton'] == canton)]
+# Sistema difuso del nivel de peligro (delitos y gravedad promedio → peligro entre 0 y 1)
+delitos = fuzzy.VariableDifusa('delitos', 0, 100, {
+    'bajo': fuzzy.triangulo(0, 0, 30),
+    'medio': fuzzy.triangulo(20, 50, 80),
+    'alto': fuzzy.triangulo(60, 100, 100),
+})
+gravedad = fuzzy.VariableDifusa('gravedad', 0, 10, {
+    'leve': fuzzy.triangulo(0, 0, 3),
+    'moderada': fuzzy.triangulo(2, 5, 8),
+    'grave': fuzzy.triangulo(6, 10, 10),
+})
+peligro = fuzzy.VariableDifusa('peligro', 0, 1, {
+    'bajo': fuzzy.triangulo(0, 0, 0.5),
+    'medio': fuzzy.triangulo(0.3, 0.5, 0.7),
+    'alto': fuzzy.triangulo(0.5, 1, 1),
+})
+motor_peligro = fuzzy.MotorMamdani([delitos, gravedad], [peligro], [
+    (('y', ('delitos', 'alto'), ('gravedad', 'grave')), [('peligro', 'alto')]),         # Alto y Grave → Peligro Alto
+    (('y', ('delitos', 'medio'), ('gravedad', 'moderada')), [('peligro', 'medio')]),    # Medio y Moderada → Medio
+    (('y', ('delitos', 'bajo'), ('gravedad', 'leve')), [('peligro', 'bajo')]),          # Bajo y Leve → Bajo
+], 'nivel_peligro')
+
+# Gravedad que se asume cuando no hay datos de gravedad
+GRAVEDAD_POR_DEFECTO = 5
+
+# Gravedad de cada registro: según el tipo de delito si se da un mapeo {Delito: gravedad}
+# (los tipos que no están en el mapeo se ignoran), si no la columna 'Gravedad'.
+# Retorna None si no hay forma de calcularla
+def gravedad_por_registro(df, gravedad_por_delito=None):
+    if gravedad_por_delito is not None:
+        return df['Delito'].map(gravedad_por_delito).astype(float)
+    if 'Gravedad' in df:
+        return df['Gravedad']
+    return None
+
+@fuzzy.perfilado('nivel_peligro')
+def calcular_nivel_peligro(df, provincia, canton, gravedad_por_delito=None):
+    df_filtrado = zone(df, provincia, canton)
 
     if df_filtrado.empty:
         print("No hay datos para esta zona.")
         return
 
-    # Variables difusas de entrada
-    delitos = np.arange(0, 101, 1)
-    gravedad = np.arange(0, 11, 1)
-
-    # Variables difusas de salida
-    peligro = np.arange(0, 1.1, 0.1)
-
-    # Funciones de membresía
-    delito_bajo = fuzz.trimf(delitos, [0, 0, 30])
-    delito_medio = fuzz.trimf(delitos, [20, 50, 80])
-    delito_alto = fuzz.trimf(delitos, [60, 100, 100])
-
-    gravedad_leve = fuzz.trimf(gravedad, [0, 0, 3])
-    gravedad_moderada = fuzz.trimf(gravedad, [2, 5, 8])
-    gravedad_grave = fuzz.trimf(gravedad, [6, 10, 10])
-
-    peligro_bajo = fuzz.trimf(peligro, [0, 0, 0.5])
-    peligro_medio = fuzz.trimf(peligro, [0.3, 0.5, 0.7])
-    peligro_alto = fuzz.trimf(peligro, [0.5, 1, 1])
-
     # Evaluar datos
     total_delitos = len(df_filtrado)
-    gravedad_prom = df_filtrado['Gravedad'].mean() if 'Gravedad' in df_filtrado else 5  # Asume 5 si no hay columna
-
-    delitos_level = fuzz.interp_membership(delitos, delito_bajo, total_delitos), \
-                    fuzz.interp_membership(delitos, delito_medio, total_delitos), \
-                    fuzz.interp_membership(delitos, delito_alto, total_delitos)
-
-    gravedad_level = fuzz.interp_membership(gravedad, gravedad_leve, gravedad_prom), \
-                     fuzz.interp_membership(gravedad, gravedad_moderada, gravedad_prom), \
-                     fuzz.interp_membership(gravedad, gravedad_grave, gravedad_prom)
-
-    # Inferencia difusa
-    regla1 = np.fmin(delitos_level[2], gravedad_level[2])  # Alto y Grave → Peligro Alto
-    regla2 = np.fmin(delitos_level[1], gravedad_level[1])  # Medio y Moderada → Medio
-    regla3 = np.fmin(delitos_level[0], gravedad_level[0])  # Bajo y Leve → Bajo
+    gravedad_registros = gravedad_por_registro(df_filtrado, gravedad_por_delito)
+    gravedad_prom = gravedad_registros.mean() if gravedad_registros is not None else GRAVEDAD_POR_DEFECTO  # Asume 5 si no hay columna
+    if gravedad_por_delito is not None and np.isnan(gravedad_prom):
+        gravedad_prom = GRAVEDAD_POR_DEFECTO
 
-    peligro0 = np.fmin(regla1, peligro_alto)
-    peligro1 = np.fmin(regla2, peligro_medio)
-    peligro2 = np.fmin(regla3, peligro_bajo)
-
-    # Combinar y defuzzificar
-    agregado = np.fmax(peligro0, np.fmax(peligro1, peligro2))
-    resultado = fuzz.defuzz(peligro, agregado, 'centroid')
+    # Inferencia difusa y defuzzificación (centroide)
+    resultado = float(motor_peligro.evaluar(delitos=total_delitos, gravedad=gravedad_prom))
 
     print(f"\n--- CASO 2: Nivel de peligro en {provincia}, {canton} ---")
     print(f"Número de delitos: {total_delitos}")
     print(f"Gravedad promedio: {gravedad_prom:.2f}")
+    if np.isnan(resultado):
+        print("Nivel de peligro (difuso): ninguna regla se activa para estos valores")
+        return
     print(f"Nivel de peligro (difuso): {resultado:.2f} → {clasificar_nivel_peligro(resultado)}")
 
+# Nivel de peligro de todos los cantones en una sola evaluación del sistema difuso.
+# Retorna un DataFrame ordenado de mayor a menor peligro con las columnas Provincia, Canton,
+# Delitos, Gravedad, Peligro y Nivel (Peligro es NaN si ninguna regla se activa)
+@fuzzy.perfilado('nivel_peligro_por_canton')
+def calcular_nivel_peligro_por_canton(df, gravedad_por_delito=None):
+    claves = [df['Provincia'], df['Canton']]
+    totales = df.groupby(claves).size()
+
+    gravedad_registros = gravedad_por_registro(df, gravedad_por_delito)
+    if gravedad_registros is None:
+        gravedad_prom = pd.Series(float(GRAVEDAD_POR_DEFECTO), index=totales.index)
+    else:
+        gravedad_prom = gravedad_registros.groupby(claves).mean().reindex(totales.index)
+    if gravedad_por_delito is not None:
+        gravedad_prom = gravedad_prom.fillna(GRAVEDAD_POR_DEFECTO)
+
+    peligro = motor_peligro.evaluar(delitos=totales.to_numpy(), gravedad=gravedad_prom.to_numpy())
+
+    ranking = pd.DataFrame({'Delitos': totales, 'Gravedad': gravedad_prom, 'Peligro': peligro})
+    ranking = ranking.rename_axis(['Provincia', 'Canton']).reset_index()
+    # Mismos cortes que clasificar_nivel_peligro
+    ranking['Nivel'] = pd.cut(ranking['Peligro'], [-np.inf, 0.4, 0.7, np.inf], right=False, labels=["Bajo", "Medio", "Alto"])
+    return ranking.sort_values('Peligro', ascending=False, na_position='last', kind='stable').reset_index(drop=True)
+
 # ========================
 # CASO 3 – Visualización de delitos por hora
 # ========================
 
 def graficar_delitos_por_hora(df, provincia, canton):
-    df_filtrado = df[(df['Provincia'] == provincia) & (df['Canton'] == canton)].copy()
+    df_filtrado = zone(df, provincia, canton).copy()
 
     if df_filtrado.empty:
         print("No hay datos para la zona seleccionada.")
@@ -129,7 +158,7 @@ def graficar_delitos_por_hora(df, provincia, canton):
 # ========================
 
 def visualizar_delitos_por_franja(df, provincia, canton):
-    df_zona = df[(df['Provincia'] == provincia) & (df['Canton'] == canton)].copy()
+    df_zona = zone(df, provincia, canton).copy()
 
     if df_zona.empty:
         print("No hay datos para la zona seleccionada.")
@@ -156,7 +185,7 @@ def visualizar_delitos_por_franja(df, provincia, canton):
 if __name__ == "__main__":
     # Cargar tus datos
     try:
-        df = pd.read_csv('Estadisticas.csv')  # Reemplaza con la ruta correcta
+        df = load_estadisticas('Estadisticas.csv')  # Reemplaza con la ruta correcta
     except Exception as e:
         print(f"Error al cargar datos: {e}")
         df = None
@@ -173,6 +202,9 @@ if __name__ == "__main__":
         print("\n=== CASO 2 ===")
         calcular_nivel_peligro(df, provincia_input, canton_input)
 
+        print("\n=== CASO 2 (todos los cantones) ===")
+        print(calcular_nivel_peligro_por_canton(df).head(10).to_string(index=False))
+
         print("\n=== CASO 3 ===")
         graficar_delitos_por_hora(df, provincia_input, canton_input)
 
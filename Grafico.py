@@ -8,9 +8,10 @@ import pandas as pd
 import os
 import numpy as np
 from datetime import time
-import skfuzzy as fuzz
-from skfuzzy import control as ctrl
 import matplotlib.pyplot as plt
+from datasets.time_bands import hour_in_range, start_band, band_of
+from datasets.service import load_estadisticas, zone, range_size, monthly_series
+import fuzzy
 
 # Ruta del archivo
 current_dir = os.getcwd()
@@ -20,7 +21,8 @@ dataset_path = os.path.join(current_dir, "datasets", filename)
 # Cargar CSV y extraer provincias y cantones únicos
 def cargar_datos(ruta_csv):
     try:
-        df = pd.read_csv(ruta_csv, on_bad_lines='skip', encoding='utf-8')
+        # El servicio compartido lee el archivo una sola vez por proceso
+        df = load_estadisticas(ruta_csv)
         
         # Extraer provincias y cantones únicos (ajustar nombres de columnas si es necesario)
         provincias = set(df['Provincia'].str.upper().dropna().unique())
@@ -36,17 +38,15 @@ def cargar_datos(ruta_csv):
 # ===========================
 # Función vectorizada para verificar si la hora está dentro del rango
 def hora_en_rango_vectorizada(df, hora_input):
-    rango_horas = df['Hora'].str.split(' - ', expand=True)
-    rango_horas = rango_horas.apply(lambda x: pd.to_datetime(x, format='%H:%M:%S').dt.time)
-    return (rango_horas[0] <= hora_input) & (rango_horas[1] >= hora_input)
+    return hour_in_range(df, hora_input)
 
-def responder_probabilidad_delito_violento(df, provincia, canton, hora_input):
+@fuzzy.perfilado('caso_1')
+def responder_probabilidad_delito_violento(df, provincia, canton, hora_input, fecha_inicio=None, fecha_fin=None):
     # Paso 1: Filtrar delitos violentos
-    df_filtrado = df[
-        (df['Provincia'] == provincia) &
-        (df['Canton'] == canton) &
-        (df['Delito'].str.contains("VIOLENCIA|LESIONES|HOMICIDIO", case=False, na=False)) &
-        hora_en_rango_vectorizada(df, hora_input)
+    df_zona = zone(df, provincia, canton, fecha_inicio, fecha_fin)
+    df_filtrado = df_zona[
+        (df_zona['Delito'].str.contains("VIOLENCIA|LESIONES|HOMICIDIO", case=False, na=False)) &
+        hora_en_rango_vectorizada(df_zona, hora_input)
     ]
 
     if df_filtrado.empty:
@@ -55,54 +55,12 @@ def responder_probabilidad_delito_violento(df, provincia, canton, hora_input):
         return pMensaje
 
     # Paso 2: Calcular frecuencia relativa
-    total_delitos_canton = df[
-        (df['Provincia'] == provincia) &
-        (df['Canton'] == canton)
-    ]
-    frecuencia = len(df_filtrado) / len(total_delitos_canton) if len(total_delitos_canton) > 0 else 0
-
-    # Paso 3: Variables difusas
-    hora = ctrl.Antecedent(np.arange(0, 24, 1), 'hora')
-    zona_riesgo = ctrl.Antecedent(np.arange(0, 1.01, 0.01), 'zona_riesgo')
-    nivel_alerta = ctrl.Consequent(np.arange(0, 101, 1), 'nivel_alerta')
-
-    # Hora difusa
-    hora['madrugada'] = fuzz.trapmf(hora.universe, [0, 0, 4, 6])
-    hora['mañana'] = fuzz.trapmf(hora.universe, [5, 7, 10, 12])
-    hora['tarde'] = fuzz.trapmf(hora.universe, [12, 14, 17, 18])
-    hora['noche'] = fuzz.trapmf(hora.universe, [18, 20, 23, 23])
-
-    # Zona de riesgo
-    zona_riesgo['baja'] = fuzz.trimf(zona_riesgo.universe, [0, 0, 0.3])
-    zona_riesgo['media'] = fuzz.trimf(zona_riesgo.universe, [0.2, 0.5, 0.7])
-    zona_riesgo['alta'] = fuzz.trimf(zona_riesgo.universe, [0.6, 1, 1])
-
-    # Nivel de alerta
-    nivel_alerta['bajo'] = fuzz.trimf(nivel_alerta.universe, [0, 0, 40])
-    nivel_alerta['medio'] = fuzz.trimf(nivel_alerta.universe, [30, 50, 70])
-    nivel_alerta['alto'] = fuzz.trimf(nivel_alerta.universe, [60, 100, 100])
-
-    # Reglas
-    reglas = [
-        ctrl.Rule(hora['noche'] & zona_riesgo['alta'], nivel_alerta['alto']),
-        ctrl.Rule(hora['madrugada'] & zona_riesgo['media'], nivel_alerta['medio']),
-        ctrl.Rule(hora['mañana'] & zona_riesgo['baja'], nivel_alerta['bajo']),
-        ctrl.Rule(hora['tarde'] & zona_riesgo['media'], nivel_alerta['medio']),
-        ctrl.Rule(zona_riesgo['alta'], nivel_alerta['alto']),
-        ctrl.Rule(zona_riesgo['media'], nivel_alerta['medio']),
-        ctrl.Rule(zona_riesgo['baja'], nivel_alerta['bajo']),
-    ]
-
-    sistema_ctrl = ctrl.ControlSystem(reglas)
-    sistema_sim = ctrl.ControlSystemSimulation(sistema_ctrl)
-
-    # Entradas
-    sistema_sim.input['hora'] = hora_input.hour
-    sistema_sim.input['zona_riesgo'] = frecuencia
+    total_delitos_canton = len(df_zona)
+    frecuencia = len(df_filtrado) / total_delitos_canton if total_delitos_canton > 0 else 0
 
+    # Paso 3: Superficie de control precalculada del sistema difuso (ver fuzzy/superficies.py)
     try:
-        sistema_sim.compute()
-        resultado = sistema_sim.output['nivel_alerta']
+        resultado = fuzzy.evaluar_rapido(fuzzy.ALERTA_VIOLENCIA, hora=hora_input.hour, zona_riesgo=frecuencia)
         pMensaje = f"\n🛑 Nivel de alerta por delito violento en {provincia}, {canton} a las {hora_input} es : {resultado:.2f}%"
         # print(f"\n🛑 Nivel de alerta por delito violento en {provincia}, {canton} a las {hora_input}: {resultado:.2f}%")
         return pMensaje
@@ -115,76 +73,40 @@ def responder_probabilidad_delito_violento(df, provincia, canton, hora_input):
 # ===========================
 # Función principal del caso 2
 # ===========================
-def evaluar_vulnerabilidad(df, edad_input, sexo_input, provincia, canton):
-    df_zona = df[(df['Provincia'] == provincia) & (df['Canton'] == canton)]
+@fuzzy.perfilado('caso_2')
+def evaluar_vulnerabilidad(df, edad_input, sexo_input, provincia, canton, fecha_inicio=None, fecha_fin=None):
+    # Sin rango de fechas se usa la tabla del dataset (se calcula en la primera consulta, ver fuzzy/tablas.py)
+    tabla = fuzzy.tabla_vulnerabilidad(df, fuzzy.VULNERABILIDAD_RESPALDO) if fecha_inicio is None and fecha_fin is None else None
+    if tabla is not None and tabla.cubre(edad_input):
+        resultado = tabla.nivel(provincia, canton, edad_input, sexo_input)
+        if resultado is None:
+            print("No hay datos para la zona.")
+            return None
+        sexo_str = 'HOMBRE' if sexo_input == 0 else 'MUJER'
+        if np.isnan(resultado):
+            print("❌ No se pudo determinar el nivel de vulnerabilidad.")
+            pMensaje ="❌ No se pudo determinar el nivel de vulnerabilidad."
+            return pMensaje
+        pMensaje = f"📌 Nivel de vulnerabilidad para {sexo_str}, {edad_input} años en {provincia}, {canton}: {resultado:.2f}%"
+        return pMensaje
+
+    df_zona = zone(df, provincia, canton, fecha_inicio, fecha_fin)
     if df_zona.empty:
         print("No hay datos para la zona.")
         return None
 
     sexo_str = 'HOMBRE' if sexo_input == 0 else 'MUJER'
-    delitos_totales = len(df)
+    delitos_totales = range_size(df, fecha_inicio, fecha_fin)
     total_zona = len(df_zona)
     proporcion_zona = total_zona / delitos_totales if delitos_totales > 0 else 0
     proporcion_sexo = df_zona['Sexo'].value_counts(normalize=True).get(sexo_str, 0)
 
-    # Variables difusas
-    edad = ctrl.Antecedent(np.arange(0, 101, 1), 'edad')
-    riesgo_sexo = ctrl.Antecedent(np.arange(0, 1.01, 0.01), 'riesgo_sexo')
-    zona_riesgo = ctrl.Antecedent(np.arange(0, 1.01, 0.01), 'zona_riesgo')
-    nivel = ctrl.Consequent(np.arange(0, 101, 1), 'nivel')
-
-    # Edad
-    edad['joven'] = fuzz.trimf(edad.universe, [0, 15, 30])
-    edad['adulto'] = fuzz.trimf(edad.universe, [25, 40, 60])
-    edad['adulto_mayor'] = fuzz.trimf(edad.universe, [55, 75, 100])
-
-    # Riesgo sexo
-    riesgo_sexo['bajo'] = fuzz.trimf(riesgo_sexo.universe, [0, 0, 0.3])
-    riesgo_sexo['medio'] = fuzz.trimf(riesgo_sexo.universe, [0.2, 0.5, 0.7])
-    riesgo_sexo['alto'] = fuzz.trimf(riesgo_sexo.universe, [0.6, 1, 1])
-
-    # Zona
-    zona_riesgo['baja'] = fuzz.trimf(zona_riesgo.universe, [0, 0, 0.3])
-    zona_riesgo['media'] = fuzz.trimf(zona_riesgo.universe, [0.2, 0.5, 0.7])
-    zona_riesgo['alta'] = fuzz.trimf(zona_riesgo.universe, [0.6, 1, 1])
-
-    # Vulnerabilidad (salida)
-    nivel['muy_baja'] = fuzz.trimf(nivel.universe, [0, 0, 20])
-    nivel['baja'] = fuzz.trimf(nivel.universe, [10, 25, 40])
-    nivel['media'] = fuzz.trimf(nivel.universe, [30, 50, 70])
-    nivel['alta'] = fuzz.trimf(nivel.universe, [60, 75, 90])
-    nivel['muy_alta'] = fuzz.trimf(nivel.universe, [80, 100, 100])
-
-    # Reglas
-    reglas = [
-        ctrl.Rule(edad['joven'] & riesgo_sexo['alto'] & zona_riesgo['alta'], nivel['muy_alta']),
-        ctrl.Rule(edad['joven'] & riesgo_sexo['medio'] & zona_riesgo['alta'], nivel['alta']),
-        ctrl.Rule(edad['adulto'] & riesgo_sexo['medio'] & zona_riesgo['media'], nivel['media']),
-        ctrl.Rule(edad['adulto_mayor'] & riesgo_sexo['alto'] & zona_riesgo['media'], nivel['alta']),
-        ctrl.Rule(edad['adulto_mayor'] & riesgo_sexo['alto'] & zona_riesgo['alta'], nivel['muy_alta']),
-        ctrl.Rule(edad['joven'] | edad['adulto'] | edad['adulto_mayor'], nivel['media']),
-        ctrl.Rule(edad['adulto_mayor'] & riesgo_sexo['medio'] & zona_riesgo['baja'], nivel['baja']),
-        ctrl.Rule(edad['adulto_mayor'] & riesgo_sexo['bajo'] & zona_riesgo['baja'], nivel['muy_baja']),
-        ctrl.Rule(riesgo_sexo['bajo'] & zona_riesgo['baja'], nivel['muy_baja']),
-        ctrl.Rule(riesgo_sexo['medio'] & zona_riesgo['media'], nivel['media']),
-        ctrl.Rule(riesgo_sexo['alto'] & zona_riesgo['alta'], nivel['muy_alta'])
-
-        # ctrl.Rule(True, nivel['media'])  # 🛟 Regla de respaldo
-    ]
-
-    sistema_ctrl = ctrl.ControlSystem(reglas)
-    sim = ctrl.ControlSystemSimulation(sistema_ctrl)
-
-    # Entradas
-    sim.input['edad'] = edad_input
-    sim.input['riesgo_sexo'] = proporcion_sexo
-    sim.input['zona_riesgo'] = proporcion_zona
-
+    # Sistema difuso (se compila una sola vez, ver fuzzy/sistemas.py)
     try:
-        sim.compute()
+        salidas = fuzzy.obtener_controlador(fuzzy.VULNERABILIDAD_RESPALDO).evaluar_salidas(edad=edad_input, riesgo_sexo=proporcion_sexo, zona_riesgo=proporcion_zona)
 
-        if 'nivel' in sim.output:
-            resultado = sim.output['nivel']
+        if 'nivel' in salidas:
+            resultado = salidas['nivel']
             pMensaje = f"📌 Nivel de vulnerabilidad para {sexo_str}, {edad_input} años en {provincia}, {canton}: {resultado:.2f}%"
             # print(f"📌 Nivel de vulnerabilidad para {sexo_str}, {edad_input} años en {provincia}, {canton}: {resultado:.2f}%")
             return pMensaje
@@ -216,83 +138,59 @@ def obtener_franja_horaria(hora_obj):
     else:
         return 'noche'
 
-def categorizar_hora(hora_str, ref_hora):
-    try:
-        h_inicio, h_fin = hora_str.split(" - ")
-        h_inicio = pd.to_datetime(h_inicio).hour
-        h_fin = pd.to_datetime(h_fin).hour
-        h = ref_hora.hour
-        if h_inicio <= h <= h_fin:
-            return obtener_franja_horaria(ref_hora)
-    except:
-        return None
+# Retorna la franja de la hora de referencia para las filas cuyo rango la contiene
+def categorizar_hora(df, ref_hora):
+    franja = obtener_franja_horaria(ref_hora)
+    return hour_in_range(df, ref_hora, by_hour=True).map({True: franja, False: None})
         
 # Función para detectar tendencia
-def tendencia_delictiva(df, provincia, canton, hora_input):
+@fuzzy.perfilado('caso_4')
+def tendencia_delictiva(df, provincia, canton, hora_input, fecha_inicio=None, fecha_fin=None, graficar=True):
     franja = obtener_franja_horaria(hora_input)
 
-    df_zona = df[(df['Provincia'] == provincia) & (df['Canton'] == canton)].copy()
+    df_zona = zone(df, provincia, canton, fecha_inicio, fecha_fin)
     if df_zona.empty:
         return "No hay datos en esa zona."
 
-    df_zona['Franja'] = df_zona['Hora'].apply(lambda h: categorizar_hora(h, hora_input))
-    df_franja = df_zona[df_zona['Franja'] == franja]
-    if df_franja.empty:
-        return "No hay registros para esa franja horaria."
-
-    # 🔧 Convertir Fecha a datetime
-    df_franja['Fecha'] = pd.to_datetime(df_franja['Fecha'], errors='coerce')
+    if fecha_inicio is None and fecha_fin is None:
+        # Serie mensual y pendiente precalculadas para todo el dataset (ver datasets/series.py)
+        series = monthly_series(df)
+        conteos_mensuales = series.series(provincia, canton, hora_input.hour)
+        pendiente = series.slope(provincia, canton, hora_input.hour)
+    else:
+        # Agrupar por mes los registros de la franja
+        df_franja = df_zona[categorizar_hora(df_zona, hora_input) == franja]
+        conteos_mensuales = df_franja.groupby(df_franja['Fecha'].dt.to_period('M')).size().sort_index()
+        pendiente = None
 
-    # Agrupar por mes
-    df_franja['Mes'] = df_franja['Fecha'].dt.to_period('M')
-    conteos_mensuales = df_franja.groupby('Mes').size().sort_index()
+    if conteos_mensuales.empty:
+        return "No hay registros para esa franja horaria."
 
     if len(conteos_mensuales) < 3:
         return "No hay suficientes datos mensuales para analizar tendencia."
 
     # Calcular la pendiente (crecimiento)
-    x = np.arange(len(conteos_mensuales))
-    y = conteos_mensuales.values
-    pendiente, _ = np.polyfit(x, y, 1)
-
-    # Crear sistema difuso
-    pendiente_input = ctrl.Antecedent(np.arange(-10, 11, 1), 'pendiente')
-    alerta = ctrl.Consequent(np.arange(0, 101, 1), 'alerta')
-
-    pendiente_input['estable'] = fuzz.trimf(pendiente_input.universe, [-1, 0, 1])
-    pendiente_input['creciente'] = fuzz.trimf(pendiente_input.universe, [0, 3, 6])
-    pendiente_input['acelerado'] = fuzz.trimf(pendiente_input.universe, [5, 10, 10])
-
-    alerta['baja'] = fuzz.trimf(alerta.universe, [0, 0, 40])
-    alerta['media'] = fuzz.trimf(alerta.universe, [30, 50, 70])
-    alerta['alta'] = fuzz.trimf(alerta.universe, [60, 100, 100])
-
-    reglas = [
-        ctrl.Rule(pendiente_input['estable'], alerta['baja']),
-        ctrl.Rule(pendiente_input['creciente'], alerta['media']),
-        ctrl.Rule(pendiente_input['acelerado'], alerta['alta'])
-    ]
-
-    sistema = ctrl.ControlSystem(reglas)
-    sim = ctrl.ControlSystemSimulation(sistema)
-
-    sim.input['pendiente'] = pendiente
-    sim.compute()
+    if pendiente is None:
+        x = np.arange(len(conteos_mensuales))
+        y = conteos_mensuales.values
+        pendiente, _ = np.polyfit(x, y, 1)
 
-    resultado = sim.output['alerta']
+    # Superficie de control precalculada del sistema difuso (ver fuzzy/superficies.py)
+    resultado = fuzzy.evaluar_rapido(fuzzy.TENDENCIA, pendiente=pendiente)
 
     pMensaje = f"  \n📍 Zona: {provincia}, {canton}  \n🕓 Franja horaria: {franja} (hora: {hora_input})  \n📈 Pendiente mensual de delitos: {pendiente:.2f}  \n ⚠️ Nivel de alerta por tendencia creciente: {resultado:.2f}%"
 
     # Graficar tendencia
-    conteos_mensuales.plot(title="Tendencia mensual de delitos en franja horaria")
-    plt.ylabel("Número de delitos")
-    plt.xlabel("Mes")
-    plt.grid(True)
-    plt.tight_layout()
-       # Mostrar en Streamlit
-    st.pyplot(plt.gcf())  # gcf = get current figure
+    if graficar:
+        conteos_mensuales.plot(title="Tendencia mensual de delitos en franja horaria")
+        plt.ylabel("Número de delitos")
+        plt.xlabel("Mes")
+        plt.grid(True)
+        plt.tight_layout()
+        # Mostrar en Streamlit
+        st.pyplot(plt.gcf())  # gcf = get current figure
 
-    plt.clf()  # Limpia la figura actual para evitar que se acumulen si se vuelve a llamar la función
+        plt.clf()  # Limpia la figura actual para evitar que se acumulen si se vuelve a llamar la función
 
 
     return pMensaje
@@ -302,9 +200,10 @@ def tendencia_delictiva(df, provincia, canton, hora_input):
 # ===========================
 
 # Función para extraer delitos probables según hora y zona
-def delito_probable_por_hora_y_zona(df, provincia, canton, hora_input):
+@fuzzy.perfilado('caso_3')
+def delito_probable_por_hora_y_zona(df, provincia, canton, hora_input, fecha_inicio=None, fecha_fin=None):
     # Paso 1: Filtrar por zona
-    df_zona = df[(df['Provincia'] == provincia) & (df['Canton'] == canton)]
+    df_zona = zone(df, provincia, canton, fecha_inicio, fecha_fin)
     if df_zona.empty:
         # print("No hay datos para esa zona.")
         pMensaje = "No hay datos para esa zona."
@@ -321,25 +220,8 @@ def delito_probable_por_hora_y_zona(df, provincia, canton, hora_input):
     else:
         franja = 'noche'
 
-    # Paso 3: Crear columna auxiliar para franja horaria
-    def categorizar_hora(hora_str):
-        try:
-            h_inicio, h_fin = hora_str.split(" - ")
-            h_inicio = pd.to_datetime(h_inicio).hour
-            h_fin = pd.to_datetime(h_fin).hour
-            if 0 <= hora_num < 6 and h_inicio < 6:
-                return 'madrugada'
-            elif 6 <= hora_num < 12 and 6 <= h_inicio < 12:
-                return 'mañana'
-            elif 12 <= hora_num < 18 and 12 <= h_inicio < 18:
-                return 'tarde'
-            elif 18 <= hora_num < 24 and 18 <= h_inicio <= 23:
-                return 'noche'
-        except:
-            return 'otro'
-
-    df_zona['Franja'] = df_zona['Hora'].apply(categorizar_hora)
-    df_franja = df_zona[df_zona['Franja'] == franja]
+    # Paso 3: Filtrar por franja horaria (según la hora de inicio del rango)
+    df_franja = df_zona[start_band(df_zona) == band_of(hora_input)]
 
     if df_franja.empty:
         pMensaje = f"No hay registros para {franja} en {provincia}, {canton}."
@@ -1,10 +1,11 @@
 import pandas as pd
-import skfuzzy as fuzz
 import numpy as np
 import os
-from skfuzzy import control as ctrl
 from datetime import time
 import matplotlib.pyplot as plt
+from datasets.time_bands import hour_in_range
+from datasets.service import load_estadisticas, zone
+import fuzzy
 
 # Obtener la ruta del archivo CSV
 current_dir = os.getcwd()
@@ -14,7 +15,8 @@ dataset_path = os.path.join(current_dir, "datasets", filename)
 # Cargar datos del CSV con manejo de errores
 def cargar_datos(ruta_csv):
     try:
-        df = pd.read_csv(ruta_csv, on_bad_lines='skip', encoding='utf-8')
+        # El servicio compartido lee el archivo una sola vez por proceso
+        df = load_estadisticas(ruta_csv)
         return df
     except Exception as e:
         print(f"Error al cargar el archivo CSV: {e}")
@@ -48,16 +50,13 @@ if sexo_input not in [0, 1]:
 
 # Función vectorizada para verificar si la hora está dentro de un rango
 def hora_en_rango_vectorizada(df, hora_input):
-    rango_horas = df['Hora'].str.split(' - ', expand=True)
-    rango_horas = rango_horas.apply(lambda x: pd.to_datetime(x, format='%H:%M:%S').dt.time)
-    return (rango_horas[0] <= hora_input) & (rango_horas[1] >= hora_input)
+    return hour_in_range(df, hora_input)
 
 # Filtrar datos por criterios
-df_filtrado = df[
-    (df['Provincia'] == provincia_input) &
-    (df['Canton'] == canton_input) &
-    (df['Sexo'] == ('HOMBRE' if sexo_input == 0 else 'MUJER')) &
-    hora_en_rango_vectorizada(df, hora_input)
+df_zona = zone(df, provincia_input, canton_input)
+df_filtrado = df_zona[
+    (df_zona['Sexo'] == ('HOMBRE' if sexo_input == 0 else 'MUJER')) &
+    hora_en_rango_vectorizada(df_zona, hora_input)
 ]
 
 # Verificar si el DataFrame filtrado está vacío
@@ -73,62 +72,39 @@ if len(delitos_unicos) == 0:
     print("No hay delitos registrados para los parámetros de entrada.")
     exit()
 
-# Crear variables difusas
-hora = ctrl.Antecedent(np.arange(0, 24, 1), 'hora')
-sexo = ctrl.Antecedent([0, 1], 'sexo')
-delito_prob = ctrl.Consequent(np.arange(0, 101, 1), 'delito_prob')
-
-# Definir funciones de membresía para hora
-hora['dia'] = fuzz.trapmf(hora.universe, [6, 9, 18, 21])
-hora['noche'] = np.fmax(fuzz.trapmf(hora.universe, [0, 0, 6, 9]), fuzz.trapmf(hora.universe, [18, 21, 23, 23]))
-
-# Definir funciones de membresía para sexo
-sexo['hombre'] = fuzz.trimf(sexo.universe, [0, 0, 1])
-sexo['mujer'] = fuzz.trimf(sexo.universe, [0, 1, 1])
-
-# Función para asignar probabilidades de delito
-delito_prob['baja'] = fuzz.trimf(delito_prob.universe, [0, 0, 40])  # Ajustado
-delito_prob['media'] = fuzz.trimf(delito_prob.universe, [30, 50, 70])  # Ajustado
-delito_prob['alta'] = fuzz.trimf(delito_prob.universe, [60, 100, 100])  # Ajustado
-
 # Calcular frecuencia relativa de delitos
 frecuencia_delitos = df_filtrado['Delito'].value_counts(normalize=True)
 
 def determinar_probabilidad(delito_condicion):
     if delito_condicion in frecuencia_delitos:
         if frecuencia_delitos[delito_condicion] > 0.5:
-            return delito_prob['alta']
+            return 'alta'
         elif frecuencia_delitos[delito_condicion] > 0.2:
-            return delito_prob['media']
-    return delito_prob['baja']
-
-# Crear reglas difusas dinámicamente
-todas_las_reglas = []
-for d in delitos_unicos:
-    probabilidad = determinar_probabilidad(d)
-    regla = ctrl.Rule(
-        hora['noche'] & sexo['hombre' if sexo_input == 0 else 'mujer'], probabilidad
-    )
-    todas_las_reglas.append(regla)
+            return 'media'
+    return 'baja'
+
+# Probabilidad (baja, media o alta) de cada delito
+probabilidades = [determinar_probabilidad(d) for d in delitos_unicos]
 
 # Verificar si se crearon reglas difusas
-if len(todas_las_reglas) == 0:
+if len(probabilidades) == 0:
     print("No se pudieron crear reglas difusas. Verifica los datos de entrada.")
     exit()
 
-# Crear sistema difuso
-delito_ctrl = ctrl.ControlSystem(todas_las_reglas)
-delito_sim = ctrl.ControlSystemSimulation(delito_ctrl)
+# Sistema difuso: se compila una sola vez por sexo y combinación de probabilidades (ver fuzzy/sistemas.py)
+delito_ctrl = fuzzy.controlador_delito_prob(sexo_input, probabilidades)
 
-# Asignar valores y computar resultado
-delito_sim.input['hora'] = hora_input.hour
-delito_sim.input['sexo'] = sexo_input
+# Regla del sistema que corresponde a cada delito
+reglas_por_probabilidad = {regla.consequent[0].term.label: regla for regla in delito_ctrl.reglas}
+todas_las_reglas = [reglas_por_probabilidad[p] for p in probabilidades]
 
+# Asignar valores y computar resultado
 try:
-    delito_sim.compute()
-    probabilidad_predicha = delito_sim.output['delito_prob']
+    salidas = delito_ctrl.evaluar_salidas(hora=hora_input.hour, sexo=sexo_input)
+    probabilidad_predicha = salidas['delito_prob']
     print(f"Probabilidad de ser víctima de un delito en {provincia_input}, {canton_input} a las {hora_input}: {probabilidad_predicha:.2f}%")
 except KeyError:
+    salidas = {}
     print("No se pudo calcular la probabilidad. Verifica los datos de entrada y las reglas difusas.")
 
 # Verificaciones adicionales
@@ -156,19 +132,19 @@ print(f"\nHora de entrada: {hora_input.hour}")
 print(f"Sexo de entrada: {'Hombre' if sexo_input == 0 else 'Mujer'}")
 
 print("\nValores de salida del sistema difuso:")
-for key, value in delito_sim.output.items():
+for key, value in salidas.items():
     print(f"{key}: {value}")
 
 # Graficar funciones de membresía
 print("\nGraficando funciones de membresía...")
-hora.view()
+delito_ctrl.variables['hora'].view()
 plt.title("Función de membresía para 'hora'")
 plt.show()
 
-sexo.view()
+delito_ctrl.variables['sexo'].view()
 plt.title("Función de membresía para 'sexo'")
 plt.show()
 
-delito_prob.view()
+delito_ctrl.variables['delito_prob'].view()
 plt.title("Función de membresía para 'delito_prob'")
 plt.show()
\ No newline at end of file
@@ -1,4 +1,10 @@
+from .statistics import DATASET_FILES, DatasetMapping, get_dataset, load_csv
 
-from .statistics import incidence, crime_type_by_victim_gender, crime_types_by_zone, estadisticas
+# Los datasets (incidence, estadisticas, crime_types_by_zone, crime_type_by_victim_gender)
+# se cargan en el primer acceso, p.ej. datasets.incidence
+def __getattr__(name):
+    if name in DATASET_FILES:
+        return get_dataset(name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
-__all__ = [incidence, crime_type_by_victim_gender, crime_types_by_zone, estadisticas]
\ No newline at end of file
+__all__ = ["incidence", "crime_type_by_victim_gender", "crime_types_by_zone", "estadisticas"]
\ No newline at end of file
@@ -0,0 +1,166 @@
+import os
+import io
+import re
+import json
+import shutil
+import hashlib
+import numpy as np
+import pandas as pd
+
+# Cache columnar en disco para los .csv del OIJ.
+# Cada archivo se convierte una sola vez a arreglos de NumPy (.npy) en una carpeta
+# identificada por el hash del contenido; en las cargas posteriores las columnas numéricas
+# quedan respaldadas por un memory-map (copy-on-write) de esos arreglos y las categóricas se
+# arman con sus códigos, en lugar de volver a parsear el texto.
+# Se conservan las MAX_ENTRIES cargas más recientes de cada nombre (por fecha de
+# modificación, que se actualiza al cargar) y se borran las de otras versiones del formato.
+
+BASE_DIR = os.path.dirname(__file__)
+CACHE_DIR = os.path.join(BASE_DIR, ".cache")
+
+# Se incrementa cuando cambia el formato de los archivos guardados
+CACHE_VERSION = 2
+
+META_FILE = "meta.json"
+MAX_ENTRIES = 8
+HASH_CHUNK_SIZE = 1 << 20
+
+
+# Calcula el hash del contenido de un archivo (ruta) o de un archivo subido (bytes)
+def content_hash(data) -> str:
+    h = hashlib.blake2b(digest_size=16)
+    if isinstance(data, (bytes, bytearray)):
+        h.update(data)
+    else:
+        with open(data, "rb") as f:
+            for chunk in iter(lambda: f.read(HASH_CHUNK_SIZE), b""):
+                h.update(chunk)
+    return h.hexdigest()
+
+
+# Hash del contenido de un dataframe (nombres de columnas, índice y valores)
+def frame_hash(df: pd.DataFrame) -> str:
+    h = hashlib.blake2b(digest_size=16)
+    h.update(json.dumps([str(col) for col in df.columns]).encode("utf-8"))
+    h.update(pd.util.hash_pandas_object(df, index=True).to_numpy().tobytes())
+    return h.hexdigest()
+
+
+def cache_path(name: str, digest: str) -> str:
+    return os.path.join(CACHE_DIR, f"{name}-v{CACHE_VERSION}-{digest}")
+
+
+__entry_pattern__ = re.compile(r"^(?P<name>.+)-v(?P<version>\d+)-[0-9a-f]{32}$")
+
+
+# Borra las entradas de otras versiones del formato y deja solo las `max_entries`
+# usadas más recientemente de `name`
+def prune_cache(name: str, max_entries: int = MAX_ENTRIES):
+    try:
+        entries = os.listdir(CACHE_DIR)
+    except OSError:
+        return
+    current = []
+    for entry in entries:
+        match = __entry_pattern__.match(entry)
+        if match is None:
+            continue
+        path = os.path.join(CACHE_DIR, entry)
+        if int(match["version"]) != CACHE_VERSION:
+            shutil.rmtree(path, ignore_errors=True)
+        elif match["name"] == name:
+            try:
+                current.append((os.path.getmtime(path), path))
+            except OSError:
+                pass
+    current.sort(reverse=True)
+    for _, path in current[max_entries:]:
+        shutil.rmtree(path, ignore_errors=True)
+
+
+# Guarda el dataframe como una carpeta de arreglos .npy
+# Las columnas categóricas se guardan como códigos + categorías, las numéricas tal cual
+def save_frame(df: pd.DataFrame, path: str):
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    tmp_path = f"{path}.tmp-{os.getpid()}"
+    os.makedirs(tmp_path, exist_ok=True)
+
+    columns = []
+    for i, col in enumerate(df.columns):
+        series = df[col]
+        if isinstance(series.dtype, pd.CategoricalDtype):
+            categories = np.asarray(series.cat.categories.astype(str), dtype=str)
+            np.save(os.path.join(tmp_path, f"{i}.codes.npy"), series.cat.codes.to_numpy(dtype=np.int32))
+            np.save(os.path.join(tmp_path, f"{i}.categories.npy"), categories)
+            columns.append({"name": col, "kind": "category"})
+        elif pd.api.types.is_numeric_dtype(series.dtype) or pd.api.types.is_bool_dtype(series.dtype):
+            np.save(os.path.join(tmp_path, f"{i}.npy"), series.to_numpy())
+            columns.append({"name": col, "kind": "array"})
+        else:
+            # Cualquier otra columna (texto mixto) se guarda como categórica de strings
+            codes, uniques = pd.factorize(series)
+            np.save(os.path.join(tmp_path, f"{i}.codes.npy"), codes.astype(np.int32))
+            np.save(os.path.join(tmp_path, f"{i}.categories.npy"), np.asarray([str(u) for u in uniques], dtype=str))
+            columns.append({"name": col, "kind": "category"})
+
+    with open(os.path.join(tmp_path, META_FILE), "w", encoding="utf-8") as f:
+        json.dump({"version": CACHE_VERSION, "rows": len(df), "columns": columns}, f, ensure_ascii=False)
+
+    # Renombrar al final para que una escritura interrumpida nunca quede como cache válido
+    try:
+        os.replace(tmp_path, path)
+    except OSError:
+        shutil.rmtree(tmp_path, ignore_errors=True)
+
+
+# Carga el dataframe guardado. Las columnas numéricas son memory-maps copy-on-write (se
+# pueden modificar sin tocar el cache) y el DataFrame no las copia; los códigos de las
+# categóricas se leen completos porque Categorical los convierte a su propio tipo
+def load_frame(path: str) -> pd.DataFrame:
+    with open(os.path.join(path, META_FILE), "r", encoding="utf-8") as f:
+        meta = json.load(f)
+
+    data = {}
+    for i, column in enumerate(meta["columns"]):
+        if column["kind"] == "category":
+            codes = np.load(os.path.join(path, f"{i}.codes.npy"))
+            categories = np.load(os.path.join(path, f"{i}.categories.npy"))
+            data[column["name"]] = pd.Categorical.from_codes(codes, categories=categories.tolist())
+        else:
+            data[column["name"]] = np.load(os.path.join(path, f"{i}.npy"), mmap_mode="c").view(np.ndarray)
+
+    return pd.DataFrame(data, copy=False)
+
+
+# Retorna el dataframe del cache si existe para el contenido dado,
+# de lo contrario lo construye con `build` y lo guarda para la próxima carga.
+# `source` puede ser una ruta o un archivo subido (objeto con read)
+def load_cached_dataframe(source, build, name: str = "frame") -> pd.DataFrame:
+    if hasattr(source, "read"):
+        data = source.read()
+        digest = content_hash(data)
+        source = io.BytesIO(data)
+    else:
+        digest = content_hash(source)
+
+    path = cache_path(name, digest)
+    if os.path.exists(os.path.join(path, META_FILE)):
+        try:
+            df = load_frame(path)
+            os.utime(path)
+            return df
+        except (OSError, ValueError, KeyError):
+            shutil.rmtree(path, ignore_errors=True)
+
+    df = build(source)
+    if df is not None:
+        try:
+            save_frame(df, path)
+        except OSError as e:
+            print(f"⚠️ Advertencia: No se pudo guardar el cache '{path}': {e}")
+        prune_cache(name)
+    return df
+
+
+def clear_cache():
+    shutil.rmtree(CACHE_DIR, ignore_errors=True)
@@ -0,0 +1,55 @@
+import numpy as np
+import pandas as pd
+
+# Particiones mensuales de los registros según la columna Fecha.
+# Las filas se agrupan por mes una sola vez (orden estable); una consulta por rango de
+# fechas busca los meses con searchsorted y solo revisa las filas de esos meses.
+
+
+def to_day(value):
+    return pd.Timestamp(value).to_datetime64().astype('datetime64[D]')
+
+
+class MonthPartitions:
+    def __init__(self, fechas: pd.Series):
+        dates = pd.to_datetime(pd.Series(fechas), errors='coerce').to_numpy()
+        self.days = dates.astype('datetime64[D]')
+        months = dates.astype('datetime64[M]')
+
+        valid = ~np.isnat(months)
+        # Las filas sin fecha válida (NaT) quedan fuera de todas las particiones
+        self.order = np.flatnonzero(valid)[np.argsort(months[valid], kind='stable')]
+        self.months, self.offsets = np.unique(months[self.order], return_index=True)
+        self.offsets = np.append(self.offsets, len(self.order))
+
+    def __len__(self):
+        return len(self.months)
+
+    # Cantidad de filas por mes (arreglo alineado con self.months)
+    def sizes(self):
+        return np.diff(self.offsets)
+
+    # Posiciones (iloc) de las filas con fecha entre start y end (ambos inclusive)
+    def positions(self, start=None, end=None) -> np.ndarray:
+        first, last = 0, len(self.months)
+        if start is not None:
+            start = to_day(start)
+            first = np.searchsorted(self.months, start.astype('datetime64[M]'), side='left')
+        if end is not None:
+            end = to_day(end)
+            last = np.searchsorted(self.months, end.astype('datetime64[M]'), side='right')
+        if first >= last:
+            return np.array([], dtype=np.int64)
+
+        rows = self.order[self.offsets[first]:self.offsets[last]]
+
+        # Solo los meses de los extremos pueden tener días fuera del rango
+        if start is not None or end is not None:
+            days = self.days[rows]
+            mask = np.ones(len(rows), dtype=bool)
+            if start is not None:
+                mask &= days >= start
+            if end is not None:
+                mask &= days <= end
+            rows = rows[mask]
+        return np.sort(rows)
@@ -0,0 +1,88 @@
+import numpy as np
+import pandas as pd
+from .time_bands import hour_columns, HOUR_START_COL, HOUR_END_COL
+
+# Series mensuales de delitos por zona (Provincia, Canton) y hora del día.
+# Se construyen en una sola pasada: counts[zona, hora, mes] es la cantidad de registros de la
+# zona en ese mes cuyo rango de hora contiene la hora (comparando solo la hora, como
+# hour_in_range(..., by_hour=True)). Las pendientes de tendencia de todas las series se
+# calculan juntas por mínimos cuadrados y se guardan por ventana.
+
+HOURS = 24
+
+# Cantidad mínima de meses con registros para calcular una pendiente
+MIN_MONTHS = 3
+
+
+# Pendiente de mínimos cuadrados de cada serie (último eje) usando solo los meses con
+# registros, numerados 0, 1, 2, ... en orden (igual que np.polyfit sobre groupby('Mes').size())
+def trend_slopes(counts: np.ndarray, min_months: int = MIN_MONTHS) -> np.ndarray:
+    y = counts.astype(float)
+    mask = counts > 0
+    x = np.cumsum(mask, axis=-1) - 1.
+    n = mask.sum(axis=-1)
+    sx = np.where(mask, x, 0).sum(axis=-1)
+    sy = y.sum(axis=-1)
+    sxx = np.where(mask, x * x, 0).sum(axis=-1)
+    sxy = np.where(mask, x * y, 0).sum(axis=-1)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        slopes = (n * sxy - sx * sy) / (n * sxx - sx * sx)
+    return np.where(n >= min_months, slopes, np.nan)
+
+
+class MonthlySeries:
+    def __init__(self, df: pd.DataFrame):
+        fechas = pd.to_datetime(df['Fecha'], errors='coerce')
+        cols = hour_columns(df)
+        start = cols[HOUR_START_COL].to_numpy() // 3600
+        end = cols[HOUR_END_COL].to_numpy() // 3600
+        valid = (fechas.notna() & df['Provincia'].notna() & df['Canton'].notna()).to_numpy() & (start >= 0)
+
+        zone_codes, zones = pd.MultiIndex.from_arrays([df['Provincia'][valid], df['Canton'][valid]]).factorize()
+        months = (fechas.dt.year * 12 + fechas.dt.month - 1)[valid].to_numpy(dtype=np.int64)
+        first = int(months.min()) if len(months) else 0
+        n_months = int(months.max()) - first + 1 if len(months) else 0
+        self.months = pd.period_range(pd.Period(year=first // 12, month=first % 12 + 1, freq='M'), periods=n_months, freq='M')
+        self.zones = list(zones)
+        self.zone_index = {zone: i for i, zone in enumerate(self.zones)}
+
+        # Una cuenta por hora: cada registro suma en todas las horas de su rango
+        cells = zone_codes * n_months + (months - first)
+        start, end = start[valid], end[valid]
+        self.counts = np.zeros((len(self.zones), HOURS, n_months), dtype=np.int32)
+        for hour in range(HOURS):
+            in_range = (start <= hour) & (end >= hour)
+            self.counts[:, hour, :] = np.bincount(cells[in_range], minlength=len(self.zones) * n_months).reshape(len(self.zones), n_months)
+        self.__slopes = {}
+
+    # Conteos mensuales de la zona a la hora dada, solo los meses con registros
+    def series(self, provincia, canton, hour: int) -> pd.Series:
+        i = self.zone_index.get((provincia, canton))
+        if i is None:
+            return pd.Series(dtype=np.int64, index=pd.PeriodIndex([], freq='M'), name='Mes')
+        counts = self.counts[i, hour]
+        return pd.Series(counts[counts > 0].astype(np.int64), index=self.months[counts > 0].rename('Mes'))
+
+    # Pendientes (zonas x horas) sobre los últimos `window` meses (todos si es None); NaN si la
+    # serie tiene menos de MIN_MONTHS meses con registros
+    def slopes(self, window: int = None) -> np.ndarray:
+        slopes = self.__slopes.get(window)
+        if slopes is None:
+            counts = self.counts if window is None else self.counts[:, :, -window:]
+            slopes = self.__slopes[window] = trend_slopes(counts)
+        return slopes
+
+    def slope(self, provincia, canton, hour: int, window: int = None) -> float:
+        i = self.zone_index.get((provincia, canton))
+        return np.nan if i is None else float(self.slopes(window)[i, hour])
+
+    # Zonas con mayor crecimiento a la hora dada (Provincia, Canton, Pendiente)
+    def fastest_growing(self, hour: int, n: int = 10, window: int = None) -> pd.DataFrame:
+        slopes = self.slopes(window)[:, hour]
+        order = np.argsort(-np.nan_to_num(slopes, nan=-np.inf), kind='stable')[:n]
+        order = order[~np.isnan(slopes[order])]
+        return pd.DataFrame({
+            'Provincia': [self.zones[i][0] for i in order],
+            'Canton': [self.zones[i][1] for i in order],
+            'Pendiente': slopes[order],
+        })
@@ -0,0 +1,177 @@
+import os
+import threading
+from collections import OrderedDict
+import pandas as pd
+from .time_bands import add_hour_columns
+from .partitions import MonthPartitions
+from .series import MonthlySeries
+
+# Servicio compartido (en el mismo proceso) para el export del OIJ que usan los scripts
+# de los casos difusos. El .csv se lee una sola vez y se indexa por (Provincia, Canton),
+# de modo que obtener los registros de una zona es una búsqueda en un diccionario.
+# Las consultas con rango de fechas usan particiones por mes (ver partitions.py) y las
+# tendencias usan las series mensuales por zona y hora (ver series.py).
+
+ZONE_KEYS = ['Provincia', 'Canton']
+
+# Cantidad máxima de dataframes "externos" con índice por zona que se mantienen en memoria
+MAX_INDEXED_FRAMES = 4
+
+
+class CrimeDataService:
+    def __init__(self, df: pd.DataFrame, path=None):
+        self.df = df
+        self.path = path
+        self.__lock = threading.Lock()
+        self.__groups = None
+        self.__partitions = None
+        self.__monthly_series = None
+        self.__zones = {}
+        self.__zone_partitions = {}
+
+    @property
+    def total(self) -> int:
+        return len(self.df)
+
+    # Posiciones de las filas de cada zona, calculadas en una sola pasada (en el primer uso)
+    @property
+    def groups(self) -> dict:
+        if self.__groups is None:
+            groups = self.df.groupby(ZONE_KEYS, sort=False).indices if len(self.df) > 0 else {}
+            with self.__lock:
+                self.__groups = groups
+        return self.__groups
+
+    # Particiones por mes de todo el dataframe (en el primer uso)
+    @property
+    def partitions(self) -> MonthPartitions:
+        if self.__partitions is None:
+            partitions = MonthPartitions(self.df['Fecha'])
+            with self.__lock:
+                self.__partitions = partitions
+        return self.__partitions
+
+    # Series mensuales por zona y hora de todo el dataframe (en el primer uso)
+    @property
+    def monthly_series(self) -> MonthlySeries:
+        if self.__monthly_series is None:
+            series = MonthlySeries(self.df)
+            with self.__lock:
+                self.__monthly_series = series
+        return self.__monthly_series
+
+    def zone_keys(self):
+        return list(self.groups.keys())
+
+    # Retorna las filas de la zona dada (dataframe vacío si no existe),
+    # opcionalmente solo las que tienen Fecha entre start y end (inclusive).
+    # El slice se materializa en el primer acceso y se reutiliza; no se debe modificar
+    def zone(self, provincia, canton, start=None, end=None) -> pd.DataFrame:
+        key = (provincia, canton)
+        df_zona = self.__zones.get(key)
+        if df_zona is None:
+            positions = self.groups.get(key)
+            df_zona = self.df.iloc[positions] if positions is not None else self.df.iloc[0:0]
+            with self.__lock:
+                self.__zones[key] = df_zona
+        if start is None and end is None:
+            return df_zona
+        return df_zona.iloc[self.__zone_partitions_for(key, df_zona).positions(start, end)]
+
+    def zone_size(self, provincia, canton, start=None, end=None) -> int:
+        if start is not None or end is not None:
+            return len(self.zone(provincia, canton, start, end))
+        positions = self.groups.get((provincia, canton))
+        return 0 if positions is None else len(positions)
+
+    # Filas con Fecha entre start y end (inclusive); solo se revisan los meses del rango
+    def date_range(self, start=None, end=None) -> pd.DataFrame:
+        if start is None and end is None:
+            return self.df
+        return self.df.iloc[self.partitions.positions(start, end)]
+
+    def range_size(self, start=None, end=None) -> int:
+        if start is None and end is None:
+            return self.total
+        return len(self.partitions.positions(start, end))
+
+    def __zone_partitions_for(self, key, df_zona) -> MonthPartitions:
+        partitions = self.__zone_partitions.get(key)
+        if partitions is None:
+            partitions = MonthPartitions(df_zona['Fecha'])
+            with self.__lock:
+                self.__zone_partitions[key] = partitions
+        return partitions
+
+
+# Lectura del .csv tal como lo hacían los scripts (cargar_datos)
+def read_estadisticas(path) -> pd.DataFrame:
+    df = pd.read_csv(path, on_bad_lines='skip', encoding='utf-8')
+    # Fecha se convierte una sola vez (antes cada caso la convertía en cada llamada)
+    df['Fecha'] = pd.to_datetime(df['Fecha'], errors='coerce')
+    # Parsear los rangos de hora una sola vez para todas las consultas
+    return add_hour_columns(df)
+
+
+__lock__ = threading.Lock()
+__services_by_path__ = {}
+__services_by_frame__ = OrderedDict()
+
+
+def __register__(service: CrimeDataService):
+    __services_by_frame__[id(service.df)] = service
+    __services_by_frame__.move_to_end(id(service.df))
+    while len(__services_by_frame__) > MAX_INDEXED_FRAMES + len(__services_by_path__):
+        __services_by_frame__.popitem(last=False)
+
+
+# Retorna el servicio del archivo dado; se lee una sola vez por proceso
+# y solo se vuelve a leer si el archivo cambia
+def get_service(path) -> CrimeDataService:
+    path = os.path.abspath(path)
+    st = os.stat(path)
+    stat = (st.st_mtime_ns, st.st_size)
+    with __lock__:
+        cached = __services_by_path__.get(path)
+        if cached is not None and cached[0] == stat:
+            return cached[1]
+
+        service = CrimeDataService(read_estadisticas(path), path)
+        if cached is not None:
+            __services_by_frame__.pop(id(cached[1].df), None)
+        __services_by_path__[path] = (stat, service)
+        __register__(service)
+        return service
+
+
+def load_estadisticas(path) -> pd.DataFrame:
+    return get_service(path).df
+
+
+# Retorna el servicio (índice por zona) para un dataframe ya cargado
+def service_for(df: pd.DataFrame) -> CrimeDataService:
+    with __lock__:
+        service = __services_by_frame__.get(id(df))
+        # Se verifica la identidad por si el id fue reutilizado por otro objeto
+        if service is None or service.df is not df:
+            service = CrimeDataService(df)
+        __register__(service)
+        return service
+
+
+# Filas de la zona (Provincia, Canton) del dataframe dado, opcionalmente en un rango de fechas
+def zone(df: pd.DataFrame, provincia, canton, start=None, end=None) -> pd.DataFrame:
+    return service_for(df).zone(provincia, canton, start, end)
+
+
+# Filas del dataframe dado con Fecha entre start y end (inclusive)
+def date_range(df: pd.DataFrame, start=None, end=None) -> pd.DataFrame:
+    return service_for(df).date_range(start, end)
+
+
+def range_size(df: pd.DataFrame, start=None, end=None) -> int:
+    return service_for(df).range_size(start, end)
+
+
+def monthly_series(df: pd.DataFrame) -> MonthlySeries:
+    return service_for(df).monthly_series
@@ -0,0 +1,89 @@
+import numpy as np
+import pandas as pd
+from datetime import time
+
+# Representación numérica de la columna 'Hora' ("HH:MM:SS - HH:MM:SS") del OIJ.
+# Se calcula una sola vez por dataset: segundos de inicio y fin del rango y el código
+# de franja (0 = madrugada, 1 = mañana, 2 = tarde, 3 = noche) según la hora final del rango.
+# Así un filtro por hora o franja es una comparación de NumPy y no un parseo por fila.
+
+FRANJAS = ("madrugada", "mañana", "tarde", "noche")
+SECONDS_PER_BAND = 6 * 3600
+INVALID = -1
+
+HOUR_START_COL = "Hora Inicio"
+HOUR_END_COL = "Hora Fin"
+BAND_COL = "Franja Hora"
+HOUR_COLS = [HOUR_START_COL, HOUR_END_COL, BAND_COL]
+
+
+def time_to_seconds(t: time) -> int:
+    return t.hour * 3600 + t.minute * 60 + t.second
+
+# Código de franja para una hora dada
+def band_of(t: time) -> int:
+    return time_to_seconds(t) // SECONDS_PER_BAND
+
+def __parse_time__(text: str) -> int:
+    h, m, s = (int(p) for p in text.strip().split(":"))
+    if not (0 <= h < 24 and 0 <= m < 60 and 0 <= s < 60):
+        raise ValueError(f"Hora inválida: {text}")
+    return h * 3600 + m * 60 + s
+
+def __parse_range__(value):
+    try:
+        start, end = str(value).split("-")
+        return __parse_time__(start), __parse_time__(end)
+    except ValueError:
+        return INVALID, INVALID
+
+# Parsea la columna de rangos de hora. Solo se parsean los valores únicos
+# (el export del OIJ tiene 8 rangos distintos) y el resultado se expande con NumPy
+def parse_hour_ranges(hora: pd.Series) -> pd.DataFrame:
+    codes, uniques = pd.factorize(hora)
+    # La última fila corresponde al código -1 de factorize (valores nulos)
+    parsed = np.array([__parse_range__(u) for u in uniques] + [(INVALID, INVALID)], dtype=np.int32)
+    start = parsed[codes, 0]
+    end = parsed[codes, 1]
+    band = np.where(end >= 0, end // SECONDS_PER_BAND, INVALID).astype(np.int8)
+    return pd.DataFrame({HOUR_START_COL: start, HOUR_END_COL: end, BAND_COL: band}, index=hora.index)
+
+# Agrega las columnas numéricas de hora al dataframe (una sola vez por dataset)
+def add_hour_columns(df: pd.DataFrame) -> pd.DataFrame:
+    if 'Hora' in df.columns and not all(col in df.columns for col in HOUR_COLS):
+        parsed = parse_hour_ranges(df['Hora'])
+        for col in HOUR_COLS:
+            df[col] = parsed[col]
+    return df
+
+# Retorna las columnas numéricas de hora, parseándolas solo si el dataframe no las tiene
+def hour_columns(df: pd.DataFrame) -> pd.DataFrame:
+    if all(col in df.columns for col in HOUR_COLS):
+        return df[HOUR_COLS]
+    return parse_hour_ranges(df['Hora'])
+
+# Verifica si la hora dada está dentro del rango de cada fila.
+# Con by_hour=True se compara solo la hora (sin minutos ni segundos)
+def hour_in_range(df: pd.DataFrame, hora_input: time, by_hour: bool = False) -> pd.Series:
+    cols = hour_columns(df)
+    start = cols[HOUR_START_COL].to_numpy()
+    end = cols[HOUR_END_COL].to_numpy()
+    if by_hour:
+        value = hora_input.hour
+        start, end = start // 3600, end // 3600
+    else:
+        value = time_to_seconds(hora_input)
+    return pd.Series((start >= 0) & (start <= value) & (end >= value), index=df.index)
+
+# Igual que hour_in_range pero para varias horas a la vez: matriz (filas x horas) de booleanos
+def hours_in_range(df: pd.DataFrame, horas) -> np.ndarray:
+    cols = hour_columns(df)
+    start = cols[HOUR_START_COL].to_numpy()[:, None]
+    end = cols[HOUR_END_COL].to_numpy()[:, None]
+    values = np.array([time_to_seconds(h) for h in horas])[None, :]
+    return (start >= 0) & (start <= values) & (end >= values)
+
+# Código de franja según la hora de inicio del rango de cada fila
+def start_band(df: pd.DataFrame) -> pd.Series:
+    start = hour_columns(df)[HOUR_START_COL].to_numpy()
+    return pd.Series(np.where(start >= 0, start // SECONDS_PER_BAND, INVALID), index=df.index)
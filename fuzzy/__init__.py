@@ -0,0 +1,65 @@
+from .controladores import (
+    ControladorDifuso,
+    registrar,
+    desregistrar,
+    registrado,
+    obtener_controlador,
+    resumen_tiempos,
+    revisar_archivos,
+)
+from .sistemas import (
+    ALERTA_VIOLENCIA,
+    VULNERABILIDAD,
+    VULNERABILIDAD_RESPALDO,
+    TENDENCIA,
+    controlador_delito_prob,
+)
+from .superficies import SuperficieControl, definir_superficie, superficie, evaluar_rapido
+from .mamdani import VariableDifusa, MotorMamdani, triangulo, trapecio
+from .archivos import SistemaArchivo, ErrorArchivo, cargar_archivo, cargar_directorio
+from .lote import evaluador_lote, evaluar_arreglos
+from .perfil import Perfil, perfilar, etapa, perfilado
+from .tablas import TablaVulnerabilidad, entradas_vulnerabilidad, tabla_vulnerabilidad
+# fuzzy.evaluar respeta la precisión definida para cada sistema (ver precision.py)
+from .precision import PRECISIONES, definir_precision, precision, evaluar, comparar_precisiones
+
+__all__ = [
+    "ControladorDifuso",
+    "registrar",
+    "desregistrar",
+    "registrado",
+    "obtener_controlador",
+    "evaluar",
+    "resumen_tiempos",
+    "revisar_archivos",
+    "ALERTA_VIOLENCIA",
+    "VULNERABILIDAD",
+    "VULNERABILIDAD_RESPALDO",
+    "TENDENCIA",
+    "controlador_delito_prob",
+    "SuperficieControl",
+    "definir_superficie",
+    "superficie",
+    "evaluar_rapido",
+    "VariableDifusa",
+    "MotorMamdani",
+    "triangulo",
+    "trapecio",
+    "SistemaArchivo",
+    "ErrorArchivo",
+    "cargar_archivo",
+    "cargar_directorio",
+    "evaluador_lote",
+    "evaluar_arreglos",
+    "Perfil",
+    "perfilar",
+    "etapa",
+    "perfilado",
+    "TablaVulnerabilidad",
+    "entradas_vulnerabilidad",
+    "tabla_vulnerabilidad",
+    "PRECISIONES",
+    "definir_precision",
+    "precision",
+    "comparar_precisiones",
+]
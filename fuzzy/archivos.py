@@ -0,0 +1,195 @@
+import os
+import re
+import numpy as np
+import skfuzzy as fuzz
+from skfuzzy import control as ctrl
+from .controladores import registrar, desregistrar, vigilar
+
+# Sistemas difusos definidos en archivos de texto (src/inference/fuzzy_files).
+# Cada archivo declara variables, conjuntos y uno o más bloques de reglas; cada bloque de
+# reglas se registra como un controlador con su nombre. Los archivos se leen al importar el
+# paquete y se vuelven a leer cuando cambian (ver controladores.revisar_archivos).
+#
+#   entrada hora 0 23 1                       # nombre, inicio, fin y paso del universo
+#       noche = trapecio 18 20 23 23          # formas: triangulo a b c | trapecio a b c d
+#       dia = trapecio 0 0 6 9 | trapecio 18 21 23 23   # unión de conjuntos
+#   salida nivel 0 100 1
+#       alto = triangulo 60 100 100
+#   reglas nombre [extiende otro]             # hereda las reglas de otro bloque del archivo
+#       hora.noche y no zona.baja -> nivel.alto, otra.media
+#
+# En las reglas se puede usar y, o, no y paréntesis (no > y > o).
+# Al recargar un archivo se quitan los bloques que ya no tiene (borrados o renombrados).
+
+DIRECTORIO = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'src', 'inference', 'fuzzy_files')
+
+FORMAS = {'triangulo': (fuzz.trimf, 3), 'trapecio': (fuzz.trapmf, 4)}
+
+__token__ = re.compile(r'\(|\)|[^\s()]+')
+__origenes__ = {}       # nombre del bloque: archivo que lo registró
+
+
+class ErrorArchivo(ValueError):
+    def __init__(self, ruta: str, linea: int, mensaje: str):
+        super().__init__(f"{os.path.basename(ruta)}:{linea}: {mensaje}")
+
+
+class SistemaArchivo:
+    def __init__(self, ruta: str):
+        self.ruta = ruta
+        self.variables = {}     # nombre: (tipo, universo, {etiqueta: [(forma, parámetros)]})
+        self.reglas = {}        # nombre: [(antecedente, [(salida, termino)])]
+        with open(ruta, encoding='utf-8') as archivo:
+            self.__leer(archivo)
+
+    def __leer(self, archivo):
+        actual = None
+        for numero, linea in enumerate(archivo, 1):
+            linea = linea.split('#', 1)[0].strip()
+            if not linea:
+                continue
+            partes = linea.split()
+            try:
+                if partes[0] in ('entrada', 'salida'):
+                    actual = self.__variable(partes)
+                elif partes[0] == 'reglas':
+                    actual = self.__bloque(partes)
+                elif actual is None:
+                    raise ValueError("se esperaba 'entrada', 'salida' o 'reglas'")
+                elif actual in self.variables:
+                    self.__termino(actual, linea)
+                else:
+                    self.reglas[actual].append(self.__regla(linea))
+            except ValueError as e:
+                raise ErrorArchivo(self.ruta, numero, str(e)) from None
+
+    def __variable(self, partes: list) -> str:
+        if len(partes) != 5:
+            raise ValueError(f"se esperaba '{partes[0]} nombre inicio fin paso'")
+        tipo, nombre = partes[:2]
+        inicio, fin, paso = map(float, partes[2:])
+        if paso <= 0 or fin <= inicio:
+            raise ValueError(f"universo inválido para '{nombre}'")
+        self.__nuevo_nombre(nombre)
+        self.variables[nombre] = (tipo, np.arange(inicio, fin + paso / 2, paso), {})
+        return nombre
+
+    def __bloque(self, partes: list) -> str:
+        if len(partes) not in (2, 4) or (len(partes) == 4 and partes[2] != 'extiende'):
+            raise ValueError("se esperaba 'reglas nombre [extiende otro]'")
+        nombre = partes[1]
+        self.__nuevo_nombre(nombre)
+        if len(partes) == 4 and partes[3] not in self.reglas:
+            raise ValueError(f"no existe el bloque de reglas '{partes[3]}'")
+        self.reglas[nombre] = list(self.reglas[partes[3]]) if len(partes) == 4 else []
+        return nombre
+
+    def __nuevo_nombre(self, nombre: str):
+        if nombre in self.variables or nombre in self.reglas:
+            raise ValueError(f"'{nombre}' ya está definido")
+
+    def __termino(self, variable: str, linea: str):
+        etiqueta, _, definicion = linea.partition('=')
+        etiqueta = etiqueta.strip()
+        if not etiqueta or not definicion.strip():
+            raise ValueError("se esperaba 'etiqueta = forma parámetros'")
+        conjuntos = []
+        for conjunto in definicion.split('|'):
+            forma, *parametros = conjunto.split()
+            if forma not in FORMAS or len(parametros) != FORMAS[forma][1]:
+                raise ValueError(f"conjunto inválido '{conjunto.strip()}'")
+            parametros = [float(p) for p in parametros]
+            if parametros != sorted(parametros):
+                raise ValueError(f"los parámetros de '{etiqueta}' deben ser crecientes")
+            conjuntos.append((forma, parametros))
+        self.variables[variable][2][etiqueta] = conjuntos
+
+    def __regla(self, linea: str) -> tuple:
+        antecedente, flecha, consecuentes = linea.partition('->')
+        if not flecha:
+            raise ValueError("se esperaba 'antecedente -> salida.termino'")
+        tokens = __token__.findall(antecedente)
+        arbol, posicion = self.__o(tokens, 0)
+        if posicion != len(tokens):
+            raise ValueError(f"regla inválida '{antecedente.strip()}'")
+        return arbol, [self.__referencia(c.strip(), 'salida') for c in consecuentes.split(',')]
+
+    # Gramática: o := y ('o' y)* ; y := no ('y' no)* ; no := 'no' no | '(' o ')' | variable.termino
+    def __o(self, tokens: list, i: int) -> tuple:
+        arbol, i = self.__y(tokens, i)
+        while i < len(tokens) and tokens[i] == 'o':
+            derecha, i = self.__y(tokens, i + 1)
+            arbol = ('o', arbol, derecha)
+        return arbol, i
+
+    def __y(self, tokens: list, i: int) -> tuple:
+        arbol, i = self.__no(tokens, i)
+        while i < len(tokens) and tokens[i] == 'y':
+            derecha, i = self.__no(tokens, i + 1)
+            arbol = ('y', arbol, derecha)
+        return arbol, i
+
+    def __no(self, tokens: list, i: int) -> tuple:
+        if i >= len(tokens):
+            raise ValueError("regla incompleta")
+        if tokens[i] == 'no':
+            arbol, i = self.__no(tokens, i + 1)
+            return ('no', arbol), i
+        if tokens[i] == '(':
+            arbol, i = self.__o(tokens, i + 1)
+            if i >= len(tokens) or tokens[i] != ')':
+                raise ValueError("falta ')'")
+            return arbol, i + 1
+        return self.__referencia(tokens[i], 'entrada'), i + 1
+
+    def __referencia(self, texto: str, tipo: str) -> tuple:
+        variable, punto, etiqueta = texto.partition('.')
+        if not punto or variable not in self.variables or self.variables[variable][0] != tipo:
+            raise ValueError(f"'{texto}' no es un término de una {tipo}")
+        if etiqueta not in self.variables[variable][2]:
+            raise ValueError(f"'{variable}' no tiene el término '{etiqueta}'")
+        return variable, etiqueta
+
+    # Construye las reglas de skfuzzy de un bloque (con variables nuevas en cada llamada)
+    def construir(self, nombre: str) -> list:
+        variables = {}
+        for etiqueta, (tipo, universo, terminos) in self.variables.items():
+            variable = (ctrl.Antecedent if tipo == 'entrada' else ctrl.Consequent)(universo, etiqueta)
+            for termino, conjuntos in terminos.items():
+                variable[termino] = np.fmax.reduce([FORMAS[forma][0](universo, p) for forma, p in conjuntos])
+            variables[etiqueta] = variable
+
+        def antecedente(arbol):
+            if arbol[0] == 'no':
+                return ~antecedente(arbol[1])
+            if arbol[0] in ('y', 'o') and len(arbol) == 3:
+                a, b = antecedente(arbol[1]), antecedente(arbol[2])
+                return a & b if arbol[0] == 'y' else a | b
+            return variables[arbol[0]][arbol[1]]
+
+        return [
+            ctrl.Rule(antecedente(arbol), [variables[v][t] for v, t in consecuentes])
+            for arbol, consecuentes in self.reglas[nombre]
+        ]
+
+
+# Lee el archivo y registra cada bloque de reglas; si el archivo tiene errores no registra nada.
+# Los bloques que el archivo registró antes y ya no tiene se quitan del registro
+def cargar_archivo(ruta: str) -> list:
+    sistema = SistemaArchivo(ruta)
+    for nombre in [n for n, origen in __origenes__.items() if origen == ruta and n not in sistema.reglas]:
+        desregistrar(nombre)
+        del __origenes__[nombre]
+    for nombre in sistema.reglas:
+        registrar(nombre, lambda nombre=nombre: sistema.construir(nombre))
+        __origenes__[nombre] = ruta
+    vigilar(ruta, cargar_archivo)
+    return list(sistema.reglas)
+
+
+def cargar_directorio(directorio: str = DIRECTORIO) -> list:
+    nombres = []
+    for archivo in sorted(os.listdir(directorio)):
+        if archivo.endswith('.txt'):
+            nombres += cargar_archivo(os.path.join(directorio, archivo))
+    return nombres
@@ -0,0 +1,292 @@
+import os
+import threading
+import time
+from collections import OrderedDict
+import numpy as np
+import pandas as pd
+from skfuzzy import control as ctrl
+from skfuzzy.control.controlsystem import CrispValueCalculator
+from skfuzzy.control.exceptions import EmptyMembershipError, NoTermMembershipsError
+from skfuzzy.defuzzify import defuzz
+from skfuzzy.defuzzify.exceptions import EmptyMembershipError as DefuzzEmptyMembershipError
+from .perfil import etapa
+
+# Registro de controladores difusos con nombre.
+# Cada ControlSystem se construye una sola vez (en el primer uso) y se evalúa muchas veces.
+# skfuzzy guarda el estado de las simulaciones en las variables del ControlSystem (por id del
+# sistema y valores de entrada), así que dos simulaciones del mismo sistema no son
+# independientes: cada hilo compila su propia copia la primera vez que evalúa.
+
+
+class ControladorDifuso:
+    def __init__(self, nombre: str, constructor):
+        self.nombre = nombre
+        self.constructor = constructor
+        self.__lock = threading.Lock()
+        self.__local = threading.local()
+
+        self.construcciones = 0
+        self.tiempo_construccion = 0.0
+        self.evaluaciones = 0
+        self.tiempo_evaluacion = 0.0
+
+        self.reglas, self.sistema = self.__compilar()
+        self.variables = {v.label: v for v in [*self.sistema.antecedents, *self.sistema.consequents]}
+        self.salidas = [c.label for c in self.sistema.consequents]
+        # Puntos del universo de la salida principal (los que recorre la defuzzificación de skfuzzy)
+        self.universo = len(self.variables[self.salidas[0]].universe) if self.salidas else 0
+
+    def __compilar(self):
+        inicio = time.perf_counter()
+        with etapa('construccion', self.nombre):
+            reglas = self.constructor()
+            sistema = ctrl.ControlSystem(reglas)
+            self.__local.sim = ctrl.ControlSystemSimulation(sistema)
+        duracion = time.perf_counter() - inicio
+        with self.__lock:
+            self.construcciones += 1
+            self.tiempo_construccion += duracion
+        return reglas, sistema
+
+    # Simulación del hilo actual (se compila una por hilo y se reutiliza)
+    def simulacion(self) -> ctrl.ControlSystemSimulation:
+        if getattr(self.__local, 'sim', None) is None:
+            self.__compilar()
+        return self.__local.sim
+
+    # Evalúa el sistema y retorna todas las salidas calculadas ({nombre: valor})
+    def evaluar_salidas(self, **entradas) -> dict:
+        inicio = time.perf_counter()
+        sim = self.simulacion()
+        try:
+            for nombre, valor in entradas.items():
+                sim.input[nombre] = valor
+            # Evita que queden salidas de la evaluación anterior
+            sim.output = OrderedDict()
+            return computar_por_etapas(sim, self.nombre, self.universo)
+        finally:
+            duracion = time.perf_counter() - inicio
+            with self.__lock:
+                self.evaluaciones += 1
+                self.tiempo_evaluacion += duracion
+
+    # Evalúa el sistema y retorna una salida (la primera si no se indica)
+    def evaluar(self, salida: str = None, **entradas) -> float:
+        return self.evaluar_salidas(**entradas)[salida or self.salidas[0]]
+
+    # ControlSystem de las simulaciones vectorizadas del hilo actual. Es aparte del de
+    # simulacion() para no tocar su estado, pero igual se compila una vez por hilo
+    def __sistema_lote(self) -> ctrl.ControlSystem:
+        if getattr(self.__local, 'sistema_lote', None) is None:
+            inicio = time.perf_counter()
+            with etapa('construccion_lote', self.nombre):
+                self.__local.sistema_lote = ctrl.ControlSystem(self.constructor())
+            duracion = time.perf_counter() - inicio
+            with self.__lock:
+                self.construcciones += 1
+                self.tiempo_construccion += duracion
+        return self.__local.sistema_lote
+
+    # Evalúa arreglos de entradas con una simulación vectorizada de skfuzzy.
+    # Retorna NaN donde ninguna regla se activa (skfuzzy lanza ValueError, KeyError o un
+    # DefuzzifyError, que hereda de AssertionError): si un bloque falla se divide a la mitad
+    def evaluar_lote(self, salida: str = None, **entradas) -> np.ndarray:
+        inicio = time.perf_counter()
+        salida = salida or self.salidas[0]
+        arreglos = np.broadcast_arrays(*[np.asarray(v, dtype=float) for v in entradas.values()])
+        columnas = {nombre: arreglo.ravel() for nombre, arreglo in zip(entradas, arreglos)}
+        try:
+            sistema = self.__sistema_lote()
+            with etapa('inferencia_lote', self.nombre, self.universo, arreglos[0].size):
+                return self.__evaluar_bloque(sistema, salida, columnas).reshape(arreglos[0].shape)
+        finally:
+            duracion = time.perf_counter() - inicio
+            with self.__lock:
+                self.evaluaciones += 1
+                self.tiempo_evaluacion += duracion
+
+    def __evaluar_bloque(self, sistema, salida: str, columnas: dict) -> np.ndarray:
+        n = len(next(iter(columnas.values())))
+        if n == 0:
+            return np.array([], dtype=float)
+        sim = ctrl.ControlSystemSimulation(sistema)
+        try:
+            for nombre, valores in columnas.items():
+                sim.input[nombre] = valores
+            sim.compute()
+            return np.asarray(sim.output[salida], dtype=float).reshape(n)
+        except TypeError:
+            # skfuzzy no acepta arreglos si algún término de salida no aparece en las reglas
+            return np.array([self.__evaluar_punto(sistema, salida, {k: v[i] for k, v in columnas.items()}) for i in range(n)])
+        except (ValueError, KeyError, AssertionError):
+            if n == 1:
+                return np.array([np.nan])
+            mitad = n // 2
+            return np.concatenate([
+                self.__evaluar_bloque(sistema, salida, {k: v[:mitad] for k, v in columnas.items()}),
+                self.__evaluar_bloque(sistema, salida, {k: v[mitad:] for k, v in columnas.items()}),
+            ])
+
+    def __evaluar_punto(self, sistema, salida: str, entradas: dict) -> float:
+        sim = ctrl.ControlSystemSimulation(sistema, cache=False)
+        try:
+            for nombre, valor in entradas.items():
+                sim.input[nombre] = valor
+            sim.compute()
+            return float(sim.output[salida])
+        except (ValueError, KeyError, AssertionError):
+            return np.nan
+
+    def tiempos(self) -> dict:
+        with self.__lock:
+            evaluaciones, total = self.evaluaciones, self.tiempo_evaluacion
+            construcciones, construccion = self.construcciones, self.tiempo_construccion
+        return {
+            'construcciones': construcciones,
+            'construccion_ms': construccion * 1000,
+            'evaluaciones': evaluaciones,
+            'evaluacion_total_ms': total * 1000,
+            'evaluacion_promedio_ms': (total / evaluaciones * 1000) if evaluaciones else 0.0,
+        }
+
+
+# Equivale a sim.compute() de skfuzzy (escalar) pero midiendo cada etapa por separado:
+# fuzzificación de las entradas, activación de las reglas (con su acumulación en los términos
+# de salida), agregación de los términos cortados y defuzzificación de cada salida
+def computar_por_etapas(sim: ctrl.ControlSystemSimulation, nombre: str = None, universo: int = None) -> dict:
+    sim.input._update_to_current()
+    if sim.cache is not False and sim.unique_id in sim._calculated:
+        with etapa('inferencia_cache', nombre, universo, 1):
+            for consecuente in sim.ctrl.consequents:
+                if consecuente.output[sim] is not None:
+                    sim.output[consecuente.label] = consecuente.output[sim]
+        return dict(sim.output)
+
+    with etapa('fuzzificacion', nombre, None, 1):
+        for antecedente in sim.ctrl.antecedents:
+            if antecedente.input[sim] is None:
+                raise ValueError("All antecedents must have input values!")
+            CrispValueCalculator(antecedente, sim).fuzz(antecedente.input[sim])
+
+    with etapa('reglas', nombre, None, 1):
+        for i, regla in enumerate(sim.ctrl.rules):
+            if i == 0:
+                for c in regla.consequent:
+                    c.term.membership_value[sim] = None
+                    c.activation[sim] = None
+            sim.compute_rule(regla)
+
+    salidas = {}
+    for consecuente in sim.ctrl.consequents:
+        try:
+            with etapa('agregacion', nombre, len(consecuente.terms), 1):
+                x, mf, cortes = CrispValueCalculator(consecuente, sim).find_memberships()
+            if len(cortes) == 0:
+                raise NoTermMembershipsError(consecuente)
+            with etapa('defuzzificacion', nombre, len(x), 1):
+                try:
+                    consecuente.output[sim] = defuzz(x, mf, consecuente.defuzzify_method)
+                except DefuzzEmptyMembershipError:
+                    raise EmptyMembershipError(consecuente)
+        except (NoTermMembershipsError, EmptyMembershipError):
+            if sim.lenient:
+                continue
+            raise
+        salidas[consecuente.label] = consecuente.output[sim]
+    sim.output = salidas
+
+    # Misma contabilidad que sim.compute() (cache de entradas ya vistas y vaciado periódico)
+    if sim.cache is not False:
+        sim._calculated.append(sim.unique_id)
+    else:
+        sim._reset_simulation()
+    sim._run += 1
+    if sim._run % sim._flush_after_run == 0:
+        sim._reset_simulation()
+    return dict(salidas)
+
+
+__lock__ = threading.Lock()
+__constructores__ = {}
+__controladores__ = {}
+
+# Archivos de los que salen las definiciones ({ruta: (fecha de modificación, recargar)}).
+# Se revisan al obtener un controlador, como mucho una vez por intervalo (en segundos)
+INTERVALO_REVISION = 1.0
+__archivos__ = {}
+__ultima_revision__ = 0.0
+
+
+# Registra el constructor de un controlador; `constructor()` retorna la lista de ctrl.Rule.
+# Si el nombre ya existía, el controlador se vuelve a construir en el siguiente uso
+def registrar(nombre: str, constructor):
+    with __lock__:
+        __constructores__[nombre] = constructor
+        __controladores__.pop(nombre, None)
+
+
+# Quita el controlador y sus variantes de precisión ("nombre@puntos", ver precision.py);
+# obtener_controlador deja de encontrarlo
+def desregistrar(nombre: str):
+    with __lock__:
+        for clave in [c for c in __constructores__ if c == nombre or c.startswith(f"{nombre}@")]:
+            del __constructores__[clave]
+            __controladores__.pop(clave, None)
+
+
+def registrado(nombre: str) -> bool:
+    return nombre in __constructores__
+
+
+# `recargar(ruta)` se llama cuando el archivo cambia (debe volver a registrar sus controladores)
+def vigilar(ruta: str, recargar):
+    with __lock__:
+        __archivos__[ruta] = (os.path.getmtime(ruta), recargar)
+
+
+# Recarga los archivos que cambiaron; si la recarga falla se mantiene la definición anterior
+def revisar_archivos(forzar: bool = False):
+    global __ultima_revision__
+    ahora = time.monotonic()
+    if not forzar and ahora - __ultima_revision__ < INTERVALO_REVISION:
+        return
+    cambios = []
+    with __lock__:
+        __ultima_revision__ = ahora
+        for ruta, (fecha, recargar) in __archivos__.items():
+            try:
+                actual = os.path.getmtime(ruta)
+            except OSError:
+                continue
+            if actual != fecha:
+                __archivos__[ruta] = (actual, recargar)
+                cambios.append((ruta, recargar))
+    for ruta, recargar in cambios:
+        try:
+            recargar(ruta)
+        except (ValueError, OSError) as e:
+            print(f"Error! recargar {ruta}: {e}")
+
+
+# Retorna el controlador compilado; se construye solo la primera vez
+def obtener_controlador(nombre: str) -> ControladorDifuso:
+    revisar_archivos()
+    controlador = __controladores__.get(nombre)
+    if controlador is None:
+        with __lock__:
+            controlador = __controladores__.get(nombre)
+            if controlador is None:
+                controlador = ControladorDifuso(nombre, __constructores__[nombre])
+                __controladores__[nombre] = controlador
+    return controlador
+
+
+def evaluar(nombre: str, salida: str = None, **entradas) -> float:
+    return obtener_controlador(nombre).evaluar(salida, **entradas)
+
+
+# Tiempo de construcción vs. evaluación de cada controlador ya construido
+def resumen_tiempos() -> pd.DataFrame:
+    with __lock__:
+        controladores = list(__controladores__.values())
+    return pd.DataFrame({c.nombre: c.tiempos() for c in controladores}).T
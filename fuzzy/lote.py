@@ -0,0 +1,27 @@
+import threading
+import numpy as np
+from .controladores import obtener_controlador
+from .mamdani import MotorMamdani
+
+# Evaluación por lotes de los controladores registrados con el motor Mamdani nativo.
+# El motor se arma con la misma definición (variables, términos y reglas) del ControlSystem
+# de skfuzzy y evalúa todos los puntos a la vez en lugar de una simulación por punto.
+
+__lock__ = threading.Lock()
+__motores__ = {}
+
+
+# Retorna el motor del controlador; se reconstruye si el controlador cambió.
+# Con discreto=True el motor integra sobre el universo de las salidas (da lo mismo que skfuzzy)
+def evaluador_lote(nombre: str, discreto: bool = False) -> MotorMamdani:
+    controlador = obtener_controlador(nombre)
+    with __lock__:
+        origen, motor = __motores__.get((nombre, discreto), (None, None))
+        if origen is not controlador:
+            motor = MotorMamdani.desde_sistema(controlador.sistema, nombre, discreto)
+            __motores__[(nombre, discreto)] = (controlador, motor)
+    return motor
+
+
+def evaluar_arreglos(nombre: str, salida: str = None, **entradas) -> np.ndarray:
+    return evaluador_lote(nombre).evaluar(salida, **entradas)
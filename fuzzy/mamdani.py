@@ -0,0 +1,225 @@
+import numpy as np
+from skfuzzy.control.term import TermAggregate
+from .perfil import etapa
+
+# Motor de inferencia Mamdani (reglas min/max y defuzzificación por centroide) para
+# conjuntos lineales por tramos: trimf, trapmf y uniones de ellos, que son todos los
+# conjuntos del proyecto. Cada término se guarda como sus puntos de quiebre (xp, fp) y el
+# centroide del conjunto agregado se calcula en forma cerrada: entre dos quiebres el
+# agregado es una recta, así que basta evaluarlo en los quiebres de los términos, en los
+# cortes de cada tramo con los niveles de activación y en los cruces entre tramos.
+#
+# Las reglas son (antecedente, consecuentes):
+#   antecedente: ('variable', 'termino') | ('y', a, b) | ('o', a, b) | ('no', a)
+#   consecuentes: lista de ('salida', 'termino') o ('salida', 'termino', peso)
+#
+# Con `universos` ({salida: puntos}) el agregado se evalúa como en skfuzzy: en los puntos del
+# universo discreto más los cortes con los niveles de activación, sin los cruces entre
+# términos, así que el resultado coincide con la simulación de skfuzzy sobre ese universo.
+
+# Cantidad de puntos que se evalúan juntos (limita la memoria de la agregación)
+TAMANO_BLOQUE = 4096
+
+
+# Puntos de quiebre de un trapecio (a, b, c, d); si a == b o c == d el lado es vertical
+def trapecio(a: float, b: float, c: float, d: float) -> tuple:
+    xp, fp = [b, c], [1., 1.]
+    if a < b:
+        xp, fp = [a] + xp, [0.] + fp
+    if c < d:
+        xp, fp = xp + [d], fp + [0.]
+    return np.unique(xp), np.interp(np.unique(xp), xp, fp)
+
+
+def triangulo(a: float, b: float, c: float) -> tuple:
+    return trapecio(a, b, b, c)
+
+
+# Puntos de quiebre de una membresía muestreada sobre un universo (p.ej. un término de skfuzzy).
+# Es exacta si los quiebres del conjunto caen en puntos del universo
+def desde_muestras(universo, mf) -> tuple:
+    xp, fp = np.asarray(universo, dtype=float), np.asarray(mf, dtype=float)
+    if len(xp) < 3:
+        return xp, fp
+    pendientes = np.diff(fp) / np.diff(xp)
+    quiebres = np.flatnonzero(~np.isclose(pendientes[1:], pendientes[:-1], rtol=1e-9, atol=1e-9)) + 1
+    indices = np.concatenate([[0], quiebres, [len(xp) - 1]])
+    return xp[indices], fp[indices]
+
+
+class VariableDifusa:
+    def __init__(self, nombre: str, inicio: float, fin: float, terminos: dict):
+        self.nombre = nombre
+        self.inicio = float(inicio)
+        self.fin = float(fin)
+        self.terminos = {etiqueta: self.__ajustar(etiqueta, *puntos) for etiqueta, puntos in terminos.items()}
+
+    # Restringe el conjunto al universo [inicio, fin]; fuera de sus quiebres vale como en sus extremos
+    def __ajustar(self, etiqueta: str, xp, fp) -> tuple:
+        xp, fp = np.asarray(xp, dtype=float), np.asarray(fp, dtype=float)
+        if (fp[0] > 0 and xp[0] > self.inicio) or (fp[-1] > 0 and xp[-1] < self.fin):
+            raise ValueError(f"El término '{etiqueta}' de '{self.nombre}' tiene un salto dentro del universo")
+        puntos = np.unique(np.concatenate([[self.inicio, self.fin], np.clip(xp, self.inicio, self.fin)]))
+        return puntos, np.interp(puntos, xp, fp)
+
+    def membresia(self, etiqueta: str, valores: np.ndarray) -> np.ndarray:
+        xp, fp = self.terminos[etiqueta]
+        return np.interp(np.clip(valores, self.inicio, self.fin), xp, fp)
+
+
+class MotorMamdani:
+    def __init__(self, entradas: list, salidas: list, reglas: list, nombre: str = None, universos: dict = None):
+        self.nombre = nombre
+        self.entradas = {v.nombre: v for v in entradas}
+        self.salidas = {v.nombre: v for v in salidas}
+        self.reglas = [(antecedente, [(c[0], c[1], c[2] if len(c) > 2 else 1.) for c in consecuentes])
+                       for antecedente, consecuentes in reglas]
+        self.universos = universos or {}
+        self.__tramos = {nombre: self.__preparar(variable, self.universos.get(nombre))
+                         for nombre, variable in self.salidas.items()}
+        self.__terminos = sorted({hoja for antecedente, _ in self.reglas for hoja in self.__hojas(antecedente)})
+        # Quiebres de los términos de entrada que se interpolan al fuzzificar
+        self.__quiebres = sum(len(self.entradas[nombre].terminos[etiqueta][0]) for nombre, etiqueta in self.__terminos)
+
+    # Motor equivalente a un ControlSystem de skfuzzy (con and/or por defecto: fmin/fmax).
+    # Con discreto=True integra sobre el universo de cada salida, igual que skfuzzy
+    @classmethod
+    def desde_sistema(cls, sistema, nombre: str = None, discreto: bool = False) -> 'MotorMamdani':
+        def variable(v):
+            universo = np.asarray(v.universe, dtype=float)
+            terminos = {t.label: desde_muestras(universo, t.mf) for t in v.terms.values()}
+            return VariableDifusa(v.label, universo[0], universo[-1], terminos)
+
+        def antecedente(termino):
+            if isinstance(termino, TermAggregate):
+                if termino.kind == 'not':
+                    return ('no', antecedente(termino.term1))
+                return ('y' if termino.kind == 'and' else 'o', antecedente(termino.term1), antecedente(termino.term2))
+            return (termino.parent.label, termino.label)
+
+        reglas = []
+        for regla in sistema.rules:
+            if regla.and_func is not np.fmin or regla.or_func is not np.fmax:
+                raise ValueError(f"La regla '{regla.label}' no usa min/max")
+            consecuentes = [(c.term.parent.label, c.term.label, c.weight) for c in regla.consequent]
+            reglas.append((antecedente(regla.antecedent), consecuentes))
+        universos = {c.label: np.asarray(c.universe, dtype=float) for c in sistema.consequents} if discreto else None
+        return cls([variable(a) for a in sistema.antecedents], [variable(c) for c in sistema.consequents], reglas,
+                   nombre, universos)
+
+    # Tramos inclinados de los términos de la salida y quiebres que no dependen de la activación
+    # (los puntos del universo discreto, si se indica)
+    def __preparar(self, variable: VariableDifusa, universo=None) -> tuple:
+        etiquetas = list(variable.terminos)
+        tramos = []
+        for k, etiqueta in enumerate(etiquetas):
+            xp, fp = variable.terminos[etiqueta]
+            for i in range(len(xp) - 1):
+                if fp[i] != fp[i + 1]:
+                    tramos.append((k, xp[i], fp[i], xp[i + 1], fp[i + 1]))
+        tramos = np.array(tramos, dtype=float).reshape(-1, 5)
+        if universo is not None:
+            return etiquetas, tramos, np.unique(universo)
+
+        fijos = [xp for xp, _ in variable.terminos.values()]
+        # Cruces entre tramos de términos distintos
+        for i in range(len(tramos)):
+            for j in range(i + 1, len(tramos)):
+                k1, x0, y0, x1, y1 = tramos[i]
+                k2, u0, v0, u1, v1 = tramos[j]
+                m1, m2 = (y1 - y0) / (x1 - x0), (v1 - v0) / (u1 - u0)
+                if k1 == k2 or m1 == m2:
+                    continue
+                x = (v0 - m2 * u0 - y0 + m1 * x0) / (m1 - m2)
+                if max(x0, u0) <= x <= min(x1, u1):
+                    fijos.append([x])
+        return etiquetas, tramos, np.unique(np.concatenate(fijos))
+
+    def __hojas(self, antecedente) -> list:
+        if antecedente[0] == 'no':
+            return self.__hojas(antecedente[1])
+        if antecedente[0] in ('y', 'o') and len(antecedente) == 3:
+            return self.__hojas(antecedente[1]) + self.__hojas(antecedente[2])
+        return [antecedente]
+
+    # Fuzzificación: grado de cada término de entrada que usan las reglas
+    def __fuzzificar(self, columnas: dict) -> dict:
+        return {(nombre, etiqueta): self.entradas[nombre].membresia(etiqueta, columnas[nombre])
+                for nombre, etiqueta in self.__terminos}
+
+    def __grado(self, antecedente, grados: dict) -> np.ndarray:
+        operador = antecedente[0]
+        if operador == 'no':
+            return 1. - self.__grado(antecedente[1], grados)
+        if operador in ('y', 'o') and len(antecedente) == 3:
+            a = self.__grado(antecedente[1], grados)
+            b = self.__grado(antecedente[2], grados)
+            return np.fmin(a, b) if operador == 'y' else np.fmax(a, b)
+        return grados[antecedente]
+
+    # Activación (n, términos) de cada término de cada salida: máximo de las reglas que lo concluyen
+    def __activaciones(self, grados: dict, n: int) -> dict:
+        activacion = {nombre: np.zeros((n, len(v.terminos))) for nombre, v in self.salidas.items()}
+        for antecedente, consecuentes in self.reglas:
+            disparo = self.__grado(antecedente, grados)
+            for salida, etiqueta, peso in consecuentes:
+                k = self.__tramos[salida][0].index(etiqueta)
+                np.fmax(activacion[salida][:, k], disparo * peso, out=activacion[salida][:, k])
+        return activacion
+
+    # Agregado max_k min(activación_k, término_k) evaluado en todos sus quiebres (x, y)
+    def __agregar(self, salida: str, activacion: np.ndarray) -> tuple:
+        variable = self.salidas[salida]
+        etiquetas, tramos, fijos = self.__tramos[salida]
+        n = len(activacion)
+
+        # Cortes de cada tramo con el nivel de activación de cada término (en el universo
+        # discreto skfuzzy solo agrega los cortes de cada término con su propia activación)
+        k, x0, y0, x1, y1 = (tramos[:, i, None] for i in range(5))
+        niveles = activacion[:, k.astype(int)] if salida in self.universos else activacion[:, None, :]
+        t = (niveles - y0) / (y1 - y0)
+        cortes = np.where((t >= 0) & (t <= 1), x0 + t * (x1 - x0), variable.inicio).reshape(n, -1)
+        x = np.sort(np.concatenate([np.broadcast_to(fijos, (n, len(fijos))), cortes], axis=1), axis=1)
+
+        y = np.zeros_like(x)
+        for j, etiqueta in enumerate(etiquetas):
+            xp, fp = variable.terminos[etiqueta]
+            np.maximum(y, np.minimum(activacion[:, j, None], np.interp(x, xp, fp)), out=y)
+        return x, y
+
+    # Centroide del agregado (lineal entre quiebres); NaN si el área es 0
+    def __defuzzificar(self, x: np.ndarray, y: np.ndarray) -> np.ndarray:
+        dx = np.diff(x, axis=1)
+        xa, xb, ya, yb = x[:, :-1], x[:, 1:], y[:, :-1], y[:, 1:]
+        area = (dx * (ya + yb) / 2).sum(axis=1)
+        momento = (dx / 6 * (xa * (2 * ya + yb) + xb * (ya + 2 * yb))).sum(axis=1)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            return np.where(area > 0, momento / area, np.nan)
+
+    # Evalúa arreglos de entradas (se combinan con broadcasting de NumPy) y retorna todas las salidas.
+    # Retorna NaN donde ninguna regla se activa
+    def evaluar_salidas(self, **entradas) -> dict:
+        arreglos = np.broadcast_arrays(*[np.asarray(entradas[nombre], dtype=float) for nombre in self.entradas])
+        columnas = {nombre: arreglo.ravel() for nombre, arreglo in zip(self.entradas, arreglos)}
+        total = len(next(iter(columnas.values())))
+
+        resultados = {salida: np.empty(total) for salida in self.salidas}
+        for inicio in range(0, total, TAMANO_BLOQUE):
+            bloque = {nombre: valores[inicio:inicio + TAMANO_BLOQUE] for nombre, valores in columnas.items()}
+            n = len(next(iter(bloque.values())))
+            with etapa('fuzzificacion', self.nombre, self.__quiebres, n):
+                grados = self.__fuzzificar(bloque)
+            with etapa('reglas', self.nombre, None, n):
+                activacion = self.__activaciones(grados, n)
+            for salida in self.salidas:
+                etiquetas, tramos, fijos = self.__tramos[salida]
+                with etapa('agregacion', self.nombre, len(fijos) + len(tramos) * len(etiquetas), n):
+                    x, y = self.__agregar(salida, activacion[salida])
+                with etapa('defuzzificacion', self.nombre, x.shape[1], n):
+                    resultados[salida][inicio:inicio + TAMANO_BLOQUE] = self.__defuzzificar(x, y)
+        return {salida: valores.reshape(arreglos[0].shape) for salida, valores in resultados.items()}
+
+    # Evalúa una salida (la primera si no se indica)
+    def evaluar(self, salida: str = None, **entradas) -> np.ndarray:
+        salida = salida or next(iter(self.salidas))
+        return self.evaluar_salidas(**entradas)[salida]
@@ -0,0 +1,87 @@
+import contextvars
+import functools
+import logging
+import threading
+import time
+from contextlib import contextmanager
+import pandas as pd
+
+# Perfilado por etapas de la inferencia difusa (construcción del sistema, fuzzificación,
+# reglas, agregación, defuzzificación, casos completos, ...).
+# Las etapas se miden solo si hay un perfil activo (with perfilar() as perfil: ...) o si el
+# logger 'fuzzy.perfil' acepta DEBUG; en ese caso cada etapa se registra como una línea
+# clave=valor, p.ej.:
+#   etapa=defuzzificacion nombre=alerta_violencia ms=0.412 universo=57 puntos=5184
+
+log = logging.getLogger('fuzzy.perfil')
+
+__perfiles__ = contextvars.ContextVar('perfiles', default=())
+
+
+class Perfil:
+    def __init__(self):
+        self.__lock = threading.Lock()
+        self.etapas = {}    # (etapa, nombre): [llamadas, segundos, universo máximo, puntos]
+
+    def registrar(self, nombre_etapa: str, nombre, segundos: float, universo=None, puntos=None):
+        with self.__lock:
+            datos = self.etapas.setdefault((nombre_etapa, nombre), [0, 0.0, None, 0])
+            datos[0] += 1
+            datos[1] += segundos
+            if universo is not None:
+                datos[2] = universo if datos[2] is None else max(datos[2], universo)
+            if puntos is not None:
+                datos[3] += puntos
+
+    # Tiempo por etapa: llamadas, total y promedio (ms), universo más grande y puntos evaluados
+    def resumen(self) -> pd.DataFrame:
+        with self.__lock:
+            filas = [
+                {'etapa': nombre_etapa, 'nombre': nombre, 'llamadas': llamadas, 'total_ms': segundos * 1000,
+                 'promedio_ms': segundos / llamadas * 1000, 'universo': universo, 'puntos': puntos}
+                for (nombre_etapa, nombre), (llamadas, segundos, universo, puntos) in self.etapas.items()
+            ]
+        columnas = ['etapa', 'nombre', 'llamadas', 'total_ms', 'promedio_ms', 'universo', 'puntos']
+        return pd.DataFrame(filas, columns=columnas).sort_values('total_ms', ascending=False, ignore_index=True)
+
+
+# Activa un perfil para el bloque (se pueden anidar; cada etapa se registra en todos los activos)
+@contextmanager
+def perfilar():
+    perfil = Perfil()
+    token = __perfiles__.set(__perfiles__.get() + (perfil,))
+    try:
+        yield perfil
+    finally:
+        __perfiles__.reset(token)
+
+
+# Mide el bloque como una etapa. `universo` es la cantidad de puntos del universo (o de quiebres)
+# que se recorren y `puntos` la cantidad de entradas evaluadas
+@contextmanager
+def etapa(nombre_etapa: str, nombre=None, universo=None, puntos=None):
+    perfiles = __perfiles__.get()
+    registrar_log = log.isEnabledFor(logging.DEBUG)
+    if not perfiles and not registrar_log:
+        yield
+        return
+    inicio = time.perf_counter()
+    try:
+        yield
+    finally:
+        duracion = time.perf_counter() - inicio
+        for perfil in perfiles:
+            perfil.registrar(nombre_etapa, nombre, duracion, universo, puntos)
+        if registrar_log:
+            log.debug("etapa=%s nombre=%s ms=%.3f universo=%s puntos=%s", nombre_etapa, nombre, duracion * 1000, universo, puntos)
+
+
+# Decorador para medir una función completa (p.ej. un caso) como la etapa 'caso'
+def perfilado(nombre: str):
+    def decorador(funcion):
+        @functools.wraps(funcion)
+        def envoltura(*args, **kwargs):
+            with etapa('caso', nombre):
+                return funcion(*args, **kwargs)
+        return envoltura
+    return decorador
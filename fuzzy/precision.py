@@ -0,0 +1,192 @@
+import threading
+import time
+import numpy as np
+import pandas as pd
+from skfuzzy import control as ctrl
+from .controladores import obtener_controlador, registrar
+from .lote import evaluador_lote
+from .mamdani import MotorMamdani
+from .sistemas import ALERTA_VIOLENCIA, VULNERABILIDAD, VULNERABILIDAD_RESPALDO, TENDENCIA, controlador_delito_prob
+
+# Precisión de la defuzzificación por sistema difuso.
+# Por defecto cada sistema se evalúa con skfuzzy sobre el universo con el que fue definido
+# (p.ej. np.arange(0, 101, 1)). Se puede cambiar por sistema:
+#   - una cantidad de puntos para el universo de las salidas (entre inicio y fin, más los
+#     quiebres de los términos); los universos de las entradas quedan solo con sus quiebres
+#   - 'analitica': centroide exacto de los tramos lineales con el motor Mamdani (mamdani.py)
+#
+#   definir_precision(ALERTA_VIOLENCIA, 'gruesa')       # tableros
+#   definir_precision(VULNERABILIDAD, 'analitica')      # reportes
+#
+# `python -m fuzzy.precision` compara la latencia y el error de cada precisión contra la
+# salida actual (la definida) en los sistemas de los casos.
+
+ANALITICA = 'analitica'
+DEFINIDA = 'definida'
+PRECISIONES = {'gruesa': 11, 'media': 51, 'fina': 1001, ANALITICA: ANALITICA, DEFINIDA: None}
+
+# Sistemas que usan las funciones de los casos
+CASOS = {
+    'caso_1': ALERTA_VIOLENCIA,
+    'caso_2': VULNERABILIDAD,
+    'caso_2_respaldo': VULNERABILIDAD_RESPALDO,
+    'caso_3': lambda: controlador_delito_prob(1, ['baja', 'media', 'alta']).nombre,
+    'caso_4': TENDENCIA,
+}
+
+__lock__ = threading.Lock()
+__precisiones__ = {}
+__variantes__ = {}      # nombre de la variante: motor del que se construyó
+
+
+def __resolver(precision):
+    if isinstance(precision, str):
+        if precision not in PRECISIONES:
+            raise ValueError(f"Precisión desconocida '{precision}' (opciones: {', '.join(PRECISIONES)})")
+        return PRECISIONES[precision]
+    if precision is None:
+        return None
+    if int(precision) < 2:
+        raise ValueError("El universo de salida necesita al menos 2 puntos")
+    return int(precision)
+
+
+# `precision` es un nombre de PRECISIONES o una cantidad de puntos del universo de salida
+def definir_precision(nombre: str, precision):
+    resuelta = __resolver(precision)
+    with __lock__:
+        __precisiones__[nombre] = resuelta
+
+
+# None (universo definido), 'analitica' o la cantidad de puntos del universo de salida
+def precision(nombre: str):
+    return __precisiones__.get(nombre)
+
+
+# Reglas de skfuzzy equivalentes al motor con `puntos` puntos en el universo de cada salida
+def reglas_resolucion(motor: MotorMamdani, puntos: int) -> list:
+    variables = {}
+    for tipo, grupo in ((ctrl.Antecedent, motor.entradas), (ctrl.Consequent, motor.salidas)):
+        for variable in grupo.values():
+            quiebres = [xp for xp, _ in variable.terminos.values()]
+            if tipo is ctrl.Consequent:
+                quiebres.append(np.linspace(variable.inicio, variable.fin, puntos))
+            universo = np.unique(np.concatenate(quiebres))
+            nueva = tipo(universo, variable.nombre)
+            for etiqueta, (xp, fp) in variable.terminos.items():
+                nueva[etiqueta] = np.interp(universo, xp, fp)
+            variables[variable.nombre] = nueva
+
+    def antecedente(arbol):
+        if arbol[0] == 'no':
+            return ~antecedente(arbol[1])
+        if arbol[0] in ('y', 'o') and len(arbol) == 3:
+            a, b = antecedente(arbol[1]), antecedente(arbol[2])
+            return a & b if arbol[0] == 'y' else a | b
+        return variables[arbol[0]][arbol[1]]
+
+    return [
+        ctrl.Rule(antecedente(arbol), [variables[s][t] if peso == 1 else variables[s][t] % peso for s, t, peso in consecuentes])
+        for arbol, consecuentes in motor.reglas
+    ]
+
+
+# Registra (o actualiza, si el sistema se recargó) el controlador con la resolución dada
+def variante(nombre: str, puntos: int) -> str:
+    motor = evaluador_lote(nombre)
+    clave = f"{nombre}@{puntos}"
+    with __lock__:
+        if __variantes__.get(clave) is not motor:
+            registrar(clave, lambda: reglas_resolucion(motor, puntos))
+            __variantes__[clave] = motor
+    return clave
+
+
+def __evaluador(nombre: str, resuelta):
+    if resuelta is None:
+        return obtener_controlador(nombre).evaluar
+    if resuelta == ANALITICA:
+        def analitica(salida: str = None, **entradas) -> float:
+            resultado = float(evaluador_lote(nombre).evaluar(salida, **entradas))
+            if np.isnan(resultado):
+                raise ValueError("ninguna regla se activa")
+            return resultado
+        return analitica
+    return obtener_controlador(variante(nombre, resuelta)).evaluar
+
+
+# Evalúa el sistema con la precisión definida para él
+def evaluar(nombre: str, salida: str = None, **entradas) -> float:
+    return __evaluador(nombre, precision(nombre))(salida, **entradas)
+
+
+# Evalúa arreglos de entradas con la precisión definida para el sistema, con el motor Mamdani:
+# el centroide exacto si es 'analitica' y si no el de skfuzzy sobre el universo que corresponde
+# (el definido o el de la variante). NaN donde ninguna regla se activa
+def evaluar_lote(nombre: str, salida: str = None, **entradas) -> np.ndarray:
+    resuelta = precision(nombre)
+    if resuelta == ANALITICA:
+        return evaluador_lote(nombre).evaluar(salida, **entradas)
+    clave = nombre if resuelta is None else variante(nombre, resuelta)
+    return evaluador_lote(clave, discreto=True).evaluar(salida, **entradas)
+
+
+# Entradas aleatorias dentro de los universos del sistema
+def __muestras(motor: MotorMamdani, n: int, semilla: int) -> list:
+    generador = np.random.default_rng(semilla)
+    columnas = {nombre: generador.uniform(v.inicio, v.fin, n) for nombre, v in motor.entradas.items()}
+    return [{nombre: valores[i] for nombre, valores in columnas.items()} for i in range(n)]
+
+
+def __medir(evaluar_punto, muestras: list) -> tuple:
+    resultados = np.empty(len(muestras))
+    inicio = time.perf_counter()
+    for i, entradas in enumerate(muestras):
+        try:
+            resultados[i] = evaluar_punto(**entradas)
+        except (ValueError, KeyError, AssertionError):
+            resultados[i] = np.nan
+    return resultados, (time.perf_counter() - inicio) / len(muestras)
+
+
+# Latencia por consulta y error de cada precisión contra la salida actual (universo definido)
+# y contra el centroide exacto, sobre `muestras` entradas aleatorias por sistema
+def comparar_precisiones(casos: dict = None, precisiones=('gruesa', 'media', 'fina', ANALITICA), muestras: int = 200, semilla: int = 0) -> pd.DataFrame:
+    filas = []
+    for caso, nombre in (casos or CASOS).items():
+        nombre = nombre() if callable(nombre) else nombre
+        motor = evaluador_lote(nombre)
+        entradas = __muestras(motor, muestras, semilla)
+        actual, latencia_actual = __medir(__evaluador(nombre, None), entradas)
+        exacta = motor.evaluar(**{k: np.array([e[k] for e in entradas]) for k in motor.entradas})
+        universo_actual = obtener_controlador(nombre).universo
+
+        for precision_nombre in (DEFINIDA, *precisiones):
+            resuelta = __resolver(precision_nombre)
+            if resuelta is None:
+                resultados, latencia = actual, latencia_actual
+            else:
+                evaluar_punto = __evaluador(nombre, resuelta)
+                __medir(evaluar_punto, entradas[:1])        # construcción fuera de la medición
+                resultados, latencia = __medir(evaluar_punto, entradas)
+            validos = ~np.isnan(actual) & ~np.isnan(resultados)
+            error = np.abs(resultados - actual)[validos]
+            error_exacto = np.abs(resultados - exacta)[validos & ~np.isnan(exacta)]
+            filas.append({
+                'caso': caso,
+                'sistema': nombre,
+                'precision': precision_nombre,
+                'universo': universo_actual if resuelta is None else (None if resuelta == ANALITICA else obtener_controlador(f"{nombre}@{resuelta}").universo),
+                'latencia_us': latencia * 1e6,
+                'aceleracion': latencia_actual / latencia,
+                'error_max': error.max() if len(error) else np.nan,
+                'error_medio': error.mean() if len(error) else np.nan,
+                'error_max_exacto': error_exacto.max() if len(error_exacto) else np.nan,
+                'sin_resultado': int((np.isnan(resultados) != np.isnan(actual)).sum()),
+            })
+    return pd.DataFrame(filas)
+
+
+if __name__ == "__main__":
+    with pd.option_context('display.width', 200, 'display.max_columns', None):
+        print(comparar_precisiones().round(4).to_string(index=False))
@@ -0,0 +1,52 @@
+import numpy as np
+import skfuzzy as fuzz
+from skfuzzy import control as ctrl
+from .controladores import registrar, registrado, obtener_controlador
+from .archivos import cargar_directorio
+
+# Sistemas difusos de los casos. Los de los casos 1, 2 y 4 se definen en los archivos de
+# src/inference/fuzzy_files (ver archivos.py); aquí quedan los que dependen de los datos.
+
+
+# SistemaDifuso.py: probabilidad de ser víctima según hora y sexo. Las reglas dependen del
+# sexo consultado y de las probabilidades (baja/media/alta) presentes en los datos
+def reglas_delito_prob(sexo_input: int, probabilidades):
+    hora = ctrl.Antecedent(np.arange(0, 24, 1), 'hora')
+    sexo = ctrl.Antecedent([0, 1], 'sexo')
+    delito_prob = ctrl.Consequent(np.arange(0, 101, 1), 'delito_prob')
+
+    # Definir funciones de membresía para hora
+    hora['dia'] = fuzz.trapmf(hora.universe, [6, 9, 18, 21])
+    hora['noche'] = np.fmax(fuzz.trapmf(hora.universe, [0, 0, 6, 9]), fuzz.trapmf(hora.universe, [18, 21, 23, 23]))
+
+    # Definir funciones de membresía para sexo
+    sexo['hombre'] = fuzz.trimf(sexo.universe, [0, 0, 1])
+    sexo['mujer'] = fuzz.trimf(sexo.universe, [0, 1, 1])
+
+    # Función para asignar probabilidades de delito
+    delito_prob['baja'] = fuzz.trimf(delito_prob.universe, [0, 0, 40])
+    delito_prob['media'] = fuzz.trimf(delito_prob.universe, [30, 50, 70])
+    delito_prob['alta'] = fuzz.trimf(delito_prob.universe, [60, 100, 100])
+
+    # Una regla por probabilidad; reglas repetidas no cambian el resultado (agregación max)
+    return [
+        ctrl.Rule(hora['noche'] & sexo['hombre' if sexo_input == 0 else 'mujer'], delito_prob[p])
+        for p in probabilidades
+    ]
+
+
+# Retorna el controlador de SistemaDifuso.py para el sexo y las probabilidades dadas
+def controlador_delito_prob(sexo_input: int, probabilidades):
+    probabilidades = sorted(set(probabilidades))
+    nombre = f"delito_prob_{sexo_input}_{'_'.join(probabilidades)}"
+    if not registrado(nombre):
+        registrar(nombre, lambda: reglas_delito_prob(sexo_input, probabilidades))
+    return obtener_controlador(nombre)
+
+
+ALERTA_VIOLENCIA = "alerta_violencia"
+VULNERABILIDAD = "vulnerabilidad"
+VULNERABILIDAD_RESPALDO = "vulnerabilidad_respaldo"
+TENDENCIA = "tendencia"
+
+cargar_directorio()
@@ -0,0 +1,141 @@
+import itertools
+import threading
+import numpy as np
+from .controladores import obtener_controlador
+from .perfil import etapa
+from .precision import ANALITICA, evaluar, precision, variante
+from .sistemas import ALERTA_VIOLENCIA, TENDENCIA
+
+# Superficies de control precalculadas para los sistemas con pocas entradas.
+# El controlador se muestrea una sola vez sobre una malla N-D y las consultas se responden
+# por interpolación multilineal. La superficie se valida contra el sistema exacto y la malla
+# se refina (se duplica la resolución) hasta que el error máximo queda dentro del límite.
+# Si el sistema tiene una precisión definida (precision.py) la superficie se muestrea de
+# esa variante, para que evaluar_rapido responda lo mismo que fuzzy.evaluar.
+
+# Error absoluto máximo permitido (en las unidades de la salida, p.ej. % de alerta)
+ERROR_MAXIMO = 0.05
+MUESTRAS_VALIDACION = 256
+MAX_REFINAMIENTOS = 3
+
+
+# Agrega el punto medio entre cada par de puntos del eje
+def refinar(eje: np.ndarray) -> np.ndarray:
+    medios = (eje[:-1] + eje[1:]) / 2
+    return np.insert(eje, np.arange(1, len(eje)), medios)
+
+
+class SuperficieControl:
+    def __init__(self, nombre: str, ejes: dict, salida: str = None, error_maximo: float = ERROR_MAXIMO,
+                 muestras: int = MUESTRAS_VALIDACION, max_refinamientos: int = MAX_REFINAMIENTOS):
+        self.nombre = nombre
+        self.controlador = obtener_controlador(nombre)
+        self.salida = salida or self.controlador.salidas[0]
+        self.entradas = list(ejes)
+        self.error_maximo = error_maximo
+
+        mallas = [np.asarray(eje, dtype=float) for eje in ejes.values()]
+        for _ in range(max_refinamientos + 1):
+            self.ejes = mallas
+            self.tabla = self.controlador.evaluar_lote(self.salida, **dict(zip(self.entradas, np.meshgrid(*mallas, indexing='ij'))))
+            self.error = self.__validar(muestras)
+            if self.error <= error_maximo:
+                break
+            mallas = [refinar(eje) for eje in mallas]
+        else:
+            raise ValueError(f"La superficie de '{nombre}' no alcanza el error máximo {error_maximo} (error: {self.error:.4f})")
+
+    # Error máximo contra el sistema exacto en puntos aleatorios dentro de la malla
+    def __validar(self, muestras: int) -> float:
+        rng = np.random.default_rng(0)
+        puntos = np.column_stack([rng.uniform(eje[0], eje[-1], muestras) for eje in self.ejes])
+        exacto = self.controlador.evaluar_lote(self.salida, **dict(zip(self.entradas, puntos.T)))
+        diferencia = np.abs(self.interpolar(puntos) - exacto)
+        diferencia = diferencia[np.isfinite(diferencia)]
+        return float(diferencia.max()) if len(diferencia) else 0.0
+
+    # Interpolación multilineal de los puntos (arreglo de forma (m, n_entradas)).
+    # Las entradas fuera de la malla se recortan a sus límites (como clip_to_bounds de skfuzzy)
+    def interpolar(self, puntos: np.ndarray) -> np.ndarray:
+        puntos = np.atleast_2d(np.asarray(puntos, dtype=float))
+        indices, pesos = [], []
+        for d, eje in enumerate(self.ejes):
+            x = np.clip(puntos[:, d], eje[0], eje[-1])
+            i = np.clip(np.searchsorted(eje, x, side='right') - 1, 0, len(eje) - 2)
+            indices.append(i)
+            pesos.append((x - eje[i]) / (eje[i + 1] - eje[i]))
+
+        resultado = np.zeros(len(puntos))
+        for esquina in itertools.product((0, 1), repeat=len(self.ejes)):
+            peso = np.ones(len(puntos))
+            for d, b in enumerate(esquina):
+                peso *= pesos[d] if b else 1 - pesos[d]
+            valor = self.tabla[tuple(indices[d] + b for d, b in enumerate(esquina))]
+            # Una esquina sin valor (NaN) solo afecta si tiene peso
+            resultado += np.where(peso > 0, peso * valor, 0.0)
+        return resultado
+
+    # Evalúa un punto; donde la superficie no tiene valor se usa el sistema exacto
+    def evaluar(self, **entradas) -> float:
+        with etapa('interpolacion', self.nombre, self.tabla.size, 1):
+            valor = self.interpolar([[entradas[nombre] for nombre in self.entradas]])[0]
+        if np.isnan(valor):
+            return self.controlador.evaluar(self.salida, **entradas)
+        return float(valor)
+
+    # Evalúa arreglos de entradas; retorna NaN donde ninguna regla se activa
+    def evaluar_lote(self, **entradas) -> np.ndarray:
+        arreglos = np.broadcast_arrays(*[np.asarray(entradas[nombre], dtype=float) for nombre in self.entradas])
+        puntos = np.column_stack([a.ravel() for a in arreglos])
+        valores = self.interpolar(puntos)
+        faltantes = np.isnan(valores)
+        if faltantes.any():
+            valores[faltantes] = self.controlador.evaluar_lote(self.salida, **dict(zip(self.entradas, puntos[faltantes].T)))
+        return valores.reshape(arreglos[0].shape)
+
+
+__lock__ = threading.Lock()
+__definiciones__ = {}
+__superficies__ = {}
+
+
+# Define la malla (un eje por entrada) con la que se compila la superficie de un controlador
+def definir_superficie(nombre: str, ejes: dict, **opciones):
+    with __lock__:
+        __definiciones__[nombre] = (ejes, opciones)
+        for clave in [c for c in __superficies__ if c == nombre or c.startswith(f"{nombre}@")]:
+            del __superficies__[clave]
+
+
+# Retorna la superficie compilada del controlador (None si no tiene una definida).
+# `clave` es el controlador que se muestrea (p.ej. la variante "nombre@puntos"); por
+# defecto el mismo sistema. Se vuelve a compilar si el controlador fue registrado de nuevo
+def superficie(nombre: str, clave: str = None):
+    if nombre not in __definiciones__:
+        return None
+    clave = clave or nombre
+    controlador = obtener_controlador(clave)
+    with __lock__:
+        sup = __superficies__.get(clave)
+        if sup is None or sup.controlador is not controlador:
+            ejes, opciones = __definiciones__[nombre]
+            with etapa('construccion_superficie', clave):
+                sup = SuperficieControl(clave, ejes, **opciones)
+            __superficies__[clave] = sup
+    return sup
+
+
+# Evalúa con la superficie si el controlador tiene una; si no, con fuzzy.evaluar.
+# Con precisión 'analitica' no se usa superficie (el centroide exacto ya es rápido)
+def evaluar_rapido(nombre: str, **entradas) -> float:
+    resuelta = precision(nombre)
+    sup = None
+    if resuelta != ANALITICA:
+        sup = superficie(nombre, None if resuelta is None else variante(nombre, resuelta))
+    if sup is None:
+        return evaluar(nombre, **entradas)
+    return sup.evaluar(**entradas)
+
+
+definir_superficie(ALERTA_VIOLENCIA, {'hora': np.arange(0, 24, 1), 'zona_riesgo': np.linspace(0, 1, 201)})
+definir_superficie(TENDENCIA, {'pendiente': np.linspace(-10, 10, 401)})
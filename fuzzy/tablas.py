@@ -0,0 +1,113 @@
+import threading
+import numpy as np
+import pandas as pd
+from .controladores import obtener_controlador
+from .perfil import etapa
+from .precision import evaluar_lote, precision
+from .sistemas import VULNERABILIDAD
+
+# Tablas precalculadas de los casos cuyo espacio de entrada es finito.
+# La vulnerabilidad (caso 2) depende solo del cantón, el sexo y la edad (0 a 100), así que
+# se calcula una vez por dataset: un arreglo de 101 x 2 niveles por cantón.
+# Los niveles son los mismos que da fuzzy.evaluar con la precisión definida para el sistema.
+
+EDADES = np.arange(0, 101)
+SEXOS = ['HOMBRE', 'MUJER']     # columna 0 = hombre, 1 = mujer (como sexo_input)
+
+
+# Entradas del sistema de vulnerabilidad por zona: proporción de los delitos del país que
+# ocurren en la zona y proporción de víctimas de cada sexo en la zona (como evaluar_vulnerabilidad)
+def entradas_vulnerabilidad(df: pd.DataFrame, sexos=SEXOS) -> pd.DataFrame:
+    claves = [df['Provincia'], df['Canton']]
+    por_zona = df.groupby(claves).size()
+    sexo_zona = pd.crosstab(claves, df['Sexo'], normalize='index').reindex(por_zona.index, fill_value=0)
+    entradas = pd.DataFrame({'zona_riesgo': por_zona / len(df)}, index=por_zona.index)
+    for sexo in sexos:
+        entradas[sexo] = sexo_zona[sexo] if sexo in sexo_zona.columns else 0.
+    return entradas.rename_axis(['Provincia', 'Canton'])
+
+
+class TablaVulnerabilidad:
+    def __init__(self, nombre: str = VULNERABILIDAD):
+        self.nombre = nombre
+        self.df = None
+        self.controlador = None
+        self.precision = None
+        self.entradas = {}      # (provincia, canton): (zona_riesgo, riesgo hombre, riesgo mujer)
+        self.niveles = {}       # (provincia, canton): arreglo (edades, sexos); NaN si ninguna regla se activa
+
+    # Actualiza la tabla con el dataframe dado. Solo se evalúan los cantones cuyas entradas
+    # cambiaron (todos si cambió el sistema difuso o su precisión). Retorna las zonas evaluadas
+    def actualizar(self, df: pd.DataFrame) -> list:
+        controlador = obtener_controlador(self.nombre)
+        resuelta = precision(self.nombre)
+        if controlador is not self.controlador or resuelta != self.precision:
+            self.entradas, self.niveles = {}, {}
+
+        tabla = entradas_vulnerabilidad(df)
+        nuevas = dict(zip(tabla.index, map(tuple, tabla.to_numpy())))
+        cambios = [zona for zona, valores in nuevas.items() if self.entradas.get(zona) != valores]
+
+        niveles = dict(self.niveles)
+        if cambios:
+            valores = np.array([nuevas[zona] for zona in cambios])
+            # Ejes: zona x edad x sexo
+            resultado = evaluar_lote(
+                self.nombre,
+                edad=EDADES[None, :, None],
+                riesgo_sexo=valores[:, None, 1:],
+                zona_riesgo=valores[:, None, :1],
+            )
+            niveles.update(zip(cambios, resultado))
+        for zona in set(niveles) - set(nuevas):
+            del niveles[zona]
+
+        self.df, self.controlador, self.precision = df, controlador, resuelta
+        self.entradas, self.niveles = nuevas, niveles
+        return cambios
+
+    # Edades que tiene la tabla (enteras de 0 a 100)
+    def cubre(self, edad) -> bool:
+        return edad in EDADES
+
+    def vigente(self, df: pd.DataFrame) -> bool:
+        return (self.df is df and self.controlador is obtener_controlador(self.nombre)
+                and self.precision == precision(self.nombre))
+
+    # Nivel para la zona, edad (entera de 0 a 100) y sexo (0 = hombre, 1 = mujer).
+    # None si la zona no tiene datos; NaN si ninguna regla se activa
+    def nivel(self, provincia, canton, edad: int, sexo: int):
+        niveles = self.niveles.get((provincia, canton))
+        if niveles is None:
+            return None
+        return float(niveles[int(edad), 0 if sexo == 0 else 1])
+
+    # Toda la tabla en formato largo (Provincia, Canton, Edad, Sexo, Nivel)
+    def a_dataframe(self) -> pd.DataFrame:
+        zonas = list(self.niveles)
+        por_zona = len(EDADES) * len(SEXOS)
+        resultado = pd.DataFrame({
+            'Provincia': np.repeat([p for p, _ in zonas], por_zona),
+            'Canton': np.repeat([c for _, c in zonas], por_zona),
+            'Edad': np.tile(np.repeat(EDADES, len(SEXOS)), len(zonas)),
+            'Sexo': np.tile(np.arange(len(SEXOS)), len(zonas) * len(EDADES)),
+        })
+        resultado['Nivel'] = np.array([self.niveles[zona] for zona in zonas]).ravel() if zonas else []
+        return resultado
+
+
+__lock__ = threading.Lock()
+__tablas__ = {}
+
+
+# Tabla de vulnerabilidad del sistema para el dataframe dado. Se calcula al primer uso y,
+# si el dataframe o el sistema cambian, se actualiza solo en los cantones afectados
+def tabla_vulnerabilidad(df: pd.DataFrame, nombre: str = VULNERABILIDAD) -> TablaVulnerabilidad:
+    with __lock__:
+        tabla = __tablas__.get(nombre)
+        if tabla is None:
+            tabla = __tablas__[nombre] = TablaVulnerabilidad(nombre)
+        if not tabla.vigente(df):
+            with etapa('construccion_tabla', nombre):
+                tabla.actualizar(df)
+        return tabla
@@ -9,9 +9,10 @@ DEMO_FORMS = {
     **NLP_CRIME_FORM
 }
 
-DATASETS = {
-    "Incidencia": datasets.incidence,
-    "Tipos por Zona": datasets.crime_types_by_zone,
-    "Tipos por Genero": datasets.crime_type_by_victim_gender,
-    "Estadisticas": datasets.estadisticas
-}
\ No newline at end of file
+# Cada dataset se carga solo cuando se accede a él
+DATASETS = datasets.DatasetMapping({
+    "Incidencia": "incidence",
+    "Tipos por Zona": "crime_types_by_zone",
+    "Tipos por Genero": "crime_type_by_victim_gender",
+    "Estadisticas": "estadisticas"
+})
\ No newline at end of file
@@ -28,8 +28,8 @@ def render_crime_form():
 
 # respuesta para el componente de render_crime_form
 def render_crime_form_response(canton:str):
-    stats = get_canton_incidence_statistics(canton)
-    st_dic = stats.to_dict(orient='records')[0]  # Obtiene cada row del df como un diccionario (toma solo el row 0)
+    index = get_incidence_index()
+    st_dic = index.canton_record(canton)  # Row del canton como diccionario (búsqueda en el índice)
 
     province = st_dic.get('Provincia', '')
     inc = st_dic.get('Incidencia', 'No determinada')
@@ -44,9 +44,7 @@ def render_crime_form_response(canton:str):
         '''
         st.markdown(markd)
 
-    prov_stats = get_province_incidence_statistics(province)
-    top_5 = prov_stats.sort_values(by="Total", ascending=False).head(5)
-    data_list = top_5[['Total', 'Canton']].rename(columns={'Total': 'value', 'Canton': 'name'}).to_dict(orient='records')
+    data_list = index.top(province, 5)  # Top 5 ya ordenado en el índice
     SIMPLE_PIE_OPTIONS["series"][0]["data"] = data_list
     with st.container(border=True):
          SIMPLE_PIE_OPTIONS['title']= {"text": "Top 5 Cantones Peligrosos", "subtext": province, "left": "center"}
@@ -1,38 +1,94 @@
 import os
+import hashlib
+import threading
+from collections.abc import Mapping
 import pandas as pd
 
 # ruta del script actual
 BASE_DIR = os.path.dirname(__file__)
 
-# cargar datos de los csv fomo Dataframes
-incidence =  None
-estadisticas = None
-crime_types_by_zone = None
-crime_type_by_victim_gender = None
+# Archivos .csv disponibles, por nombre del dataset
+DATASET_FILES = {
+    "incidence": "incidencia.csv",
+    "estadisticas": "Estadisticas.csv",
+    "crime_types_by_zone": "crime_types_by_zone.csv",
+    "crime_type_by_victim_gender": "crime_type_by_victim_gender.csv",
+}
 
 
-incidence_path = os.path.join(BASE_DIR, "incidencia.csv")
-estadisticas_path = os.path.join(BASE_DIR, "Estadisticas.csv")
-crime_types_by_zone_path = os.path.join(BASE_DIR, "crime_types_by_zone.csv")
-crime_type_by_victim_gender_path = os.path.join(BASE_DIR, "crime_type_by_victim_gender.csv")
+def file_hash(path) -> str:
+    h = hashlib.blake2b(digest_size=16)
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            h.update(chunk)
+    return h.hexdigest()
 
 
-if(os.path.exists(incidence_path)):
-    incidence = pd.read_csv(incidence_path)
+# Dataset que se carga del .csv en el primer acceso y se comparte entre sesiones.
+# Solo se vuelve a leer cuando cambia el mtime (o el tamaño) del archivo y además su hash
+class LazyDataset:
+    def __init__(self, path):
+        self.path = path
+        self.__lock = threading.Lock()
+        self.__df = None
+        self.__stat = None
+        self.__hash = None
 
-if(os.path.exists(estadisticas_path)):
-    estadisticas = pd.read_csv(os.path.join(estadisticas_path))
+    def get(self):
+        with self.__lock:
+            if not os.path.exists(self.path):
+                self.__df, self.__stat, self.__hash = None, None, None
+                return None
 
-if(os.path.exists(crime_types_by_zone_path)):
-    crime_types_by_zone = pd.read_csv(os.path.join(crime_types_by_zone_path))
+            st = os.stat(self.path)
+            stat = (st.st_mtime_ns, st.st_size)
+            if stat != self.__stat:
+                digest = file_hash(self.path)
+                if digest != self.__hash or self.__df is None:
+                    self.__df = pd.read_csv(self.path)
+                    self.__hash = digest
+                self.__stat = stat
+            return self.__df
 
-if(os.path.exists(crime_type_by_victim_gender_path)):
-    crime_type_by_victim_gender = pd.read_csv(os.path.join(crime_type_by_victim_gender_path))
+
+# cargar datos de los csv como Dataframes (en el primer acceso)
+__registry__ = {name: LazyDataset(os.path.join(BASE_DIR, filename)) for name, filename in DATASET_FILES.items()}
+
+incidence_path = __registry__["incidence"].path
+estadisticas_path = __registry__["estadisticas"].path
+crime_types_by_zone_path = __registry__["crime_types_by_zone"].path
+crime_type_by_victim_gender_path = __registry__["crime_type_by_victim_gender"].path
+
+
+def get_dataset(name: str):
+    return __registry__[name].get()
+
+
+# Permite seguir usando statistics.incidence, statistics.estadisticas, etc.
+def __getattr__(name):
+    if name in __registry__:
+        return get_dataset(name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+# Diccionario {nombre a mostrar: dataset} que carga cada dataset solo al accederlo
+class DatasetMapping(Mapping):
+    def __init__(self, names: dict):
+        self.__names = dict(names)
+
+    def __getitem__(self, key):
+        return get_dataset(self.__names[key])
+
+    def __iter__(self):
+        return iter(self.__names)
+
+    def __len__(self):
+        return len(self.__names)
 
 
 def load_csv(filename):
     file_path = os.path.join(BASE_DIR, filename)
-    
+
     if os.path.exists(file_path):  # Verificar si el archivo existe
         return pd.read_csv(file_path)
     else:
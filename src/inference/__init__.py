@@ -1,4 +1,6 @@
 from .inference import InferenceEngine
+from .inference_index import FactIndex, IndexedKnowledgeBase
+from .inference_datalog import Materialization
 from .inference_utils import *
 
 # from .. import DATASETS
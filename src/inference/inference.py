@@ -1,14 +1,43 @@
 #inference module
 
+import threading
+import pandas as pd
 import pytholog as pl
-from dataclasses import dataclass
+from pytholog.util import is_variable
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from functools import lru_cache
+from .inference_index import FactIndex, IndexedKnowledgeBase
+from .inference_datalog import Materialization
+
+# Cantidad máxima de consultas memorizadas por motor (se descartan las menos usadas)
+MEMO_SIZE = 1024
+
+# Consultas ya parseadas por texto normalizado (pytholog no modifica la Expr al consultar,
+# así que la misma plantilla se reutiliza en todas las consultas iguales)
+@lru_cache(maxsize=MEMO_SIZE)
+def parse_goal(goal: str) -> pl.Expr:
+    return pl.Expr(goal)
+
+def normalize_goal(goal: str) -> str:
+    return goal.replace(" ", "")
 
 @dataclass
 class InferenceEngine:
-    __knowledgeBase: pl.KnowledgeBase = pl.KnowledgeBase("kb")
+    # Cada motor tiene su propia base de conocimientos (un valor por defecto en el
+    # dataclass la compartiría entre todas las instancias)
+    __knowledgeBase: IndexedKnowledgeBase = field(default_factory=lambda: IndexedKnowledgeBase("kb"))
+    memo_size: int = MEMO_SIZE
+    memo_hits: int = field(default=0, init=False)
+    memo_misses: int = field(default=0, init=False)
+    # Respuestas por (versión de la base, consulta normalizada); al agregar hechos con
+    # knowledgeBase(...) la versión cambia y el memo se vacía
+    __memo: OrderedDict = field(default_factory=OrderedDict, init=False, repr=False, compare=False)
+    __memo_version: int = field(default=-1, init=False, repr=False, compare=False)
+    __lock: threading.Lock = field(default_factory=threading.Lock, init=False, repr=False, compare=False)
 
     @property
-    def knowledgeBase(self) -> pl.KnowledgeBase:
+    def knowledgeBase(self) -> IndexedKnowledgeBase:
         return self.__knowledgeBase
 
     def print_kb(self):
@@ -17,6 +46,102 @@ class InferenceEngine:
     def print_kb_db(self):
         print(self.__knowledgeBase.db)
 
+    # Calcula una vez todos los hechos derivados por las reglas (Datalog) para responder esos
+    # predicados como hechos indexados; los hechos que se agreguen después se propagan solos
+    def materialize(self):
+        kb = self.__knowledgeBase
+        kb.materialization = Materialization(kb)
+        kb.clear_cache()
+        kb.version += 1
+        return kb.materialization.predicates
+
+    # Los predicados que solo tienen hechos se responden con el índice por primer término
+    # (ver inference_index.py); el resto con la búsqueda de pytholog
     def query(self, query: str):
-        query_result = self.__knowledgeBase.query(pl.Expr(query))
-        return query_result
\ No newline at end of file
+        key = (self.__knowledgeBase.version, normalize_goal(query))
+        query_result = self.__recall(key)
+        if query_result is None:
+            query_result = self.__knowledgeBase.query(parse_goal(key[1]))
+            self.__remember(key, query_result)
+        return query_result
+
+    # Respuestas de varias consultas, en el mismo orden. Las consultas de un mismo predicado
+    # que se responde con hechos (indexados o materializados) se resuelven juntas: se consulta
+    # una vez el patrón abierto (p.ej. canton_incidence_level(A0, A1)) y sus filas se reparten
+    # entre las consultas del grupo
+    def query_many(self, queries) -> list:
+        version = self.__knowledgeBase.version
+        goals = [normalize_goal(query) for query in queries]
+        results = [self.__recall((version, goal)) for goal in goals]
+
+        groups = {}
+        for i, goal in enumerate(goals):
+            if results[i] is None:
+                expr = parse_goal(goal)
+                groups.setdefault((expr.predicate, len(expr.terms)), []).append(i)
+
+        for (predicate, arity), positions in groups.items():
+            if arity == 0 or len(positions) == 1 or not self.__knowledgeBase.answers_from_facts(predicate):
+                for i in positions:
+                    results[i] = self.__knowledgeBase.query(parse_goal(goals[i]))
+                    self.__remember((version, goals[i]), results[i])
+                continue
+            variables = [f"A{k}" for k in range(arity)]
+            rows = [tuple(r[v] for v in variables)
+                    for r in self.query(f"{predicate}({','.join(variables)})") if isinstance(r, dict)]
+            for i in positions:
+                results[i] = FactIndex.answer(parse_goal(goals[i]).terms, rows)
+                self.__remember((version, goals[i]), results[i])
+        return results
+
+    # Todas las asignaciones de un patrón (p.ej. canton_incidence_level(C, L)) como tabla, con
+    # una columna por variable. Si el patrón no tiene variables la tabla no tiene columnas y
+    # tiene una fila si se cumple o ninguna si no
+    def query_table(self, pattern: str) -> pd.DataFrame:
+        goal = normalize_goal(pattern)
+        variables = list(dict.fromkeys(term for term in parse_goal(goal).terms if term != "_" and is_variable(term)))
+        query_result = self.query(goal)
+        if not variables:
+            return pd.DataFrame(index=range(1 if "Yes" in query_result else 0))
+        rows = [r for r in query_result if isinstance(r, dict)]
+        return pd.DataFrame(rows, columns=variables)
+
+    # Respuesta memorizada (una copia) o None
+    def __recall(self, key):
+        with self.__lock:
+            if key[0] != self.__memo_version:
+                self.__memo.clear()
+                self.__memo_version = key[0]
+            query_result = self.__memo.get(key)
+            if query_result is not None:
+                self.__memo.move_to_end(key)
+                self.memo_hits += 1
+                return self.__copy(query_result)
+            self.memo_misses += 1
+        return None
+
+    def __remember(self, key, query_result):
+        with self.__lock:
+            if self.memo_size > 0 and key[0] == self.__memo_version:
+                self.__memo[key] = self.__copy(query_result)
+                while len(self.__memo) > self.memo_size:
+                    self.__memo.popitem(last=False)
+
+    # Las respuestas de pytholog son listas de diccionarios; se copian para que quien
+    # las modifique no cambie lo memorizado
+    @staticmethod
+    def __copy(query_result):
+        return [dict(r) if isinstance(r, dict) else r for r in query_result]
+
+    def memo_stats(self) -> dict:
+        with self.__lock:
+            return {
+                "hits": self.memo_hits,
+                "misses": self.memo_misses,
+                "size": len(self.__memo),
+                "version": self.__memo_version,
+            }
+
+    def clear_memo(self):
+        with self.__lock:
+            self.__memo.clear()
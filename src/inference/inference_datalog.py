@@ -0,0 +1,178 @@
+#inference datalog module
+
+import pytholog as pl
+from pytholog.util import is_variable
+from .inference_index import FactIndex, is_ground
+
+# Materialización de los predicados derivados por encadenamiento hacia adelante (Datalog
+# semi-ingenuo). Las reglas cuyo cuerpo son solo predicados (sin aritmética ni neq) se
+# evalúan una vez sobre todos los hechos y sus resultados quedan como hechos indexados; en
+# cada ronda solo se combinan los hechos nuevos de la ronda anterior (delta) con el resto.
+# Al agregar hechos se propagan solo los nuevos; al agregar reglas se recalcula todo.
+# Las reglas que no se pueden materializar se siguen resolviendo con pytholog.
+
+
+class Materialization:
+    def __init__(self, kb: pl.KnowledgeBase):
+        self.__base = {}        # predicado: [hechos sin variables] (como se agregaron)
+        self.__opaque = set()   # predicados con hechos que tienen variables
+        self.__clauses = []     # reglas de pytholog (Fact con rhs)
+        for bucket in kb.db.values():
+            for fact in bucket["facts"]:
+                if fact.rhs:
+                    self.__clauses.append(fact)
+                else:
+                    self.__add_base(fact.lh.predicate, tuple(fact.lh.terms))
+        self.__compile()
+
+    # Predicados que se responden con los hechos materializados
+    @property
+    def predicates(self) -> set:
+        return set(self.__heads)
+
+    def __add_base(self, predicate: str, terms: tuple) -> bool:
+        if not all(map(is_ground, terms)):
+            self.__opaque.add(predicate)
+            return False
+        self.__base.setdefault(predicate, []).append(terms)
+        return True
+
+    # Regla como (predicado, términos) de la cabeza y del cuerpo más sus variables; None si no
+    # es Datalog (aritmética, neq o variables de la cabeza que no aparecen en el cuerpo)
+    @staticmethod
+    def __rule(fact: pl.Fact):
+        head = (fact.lh.predicate, tuple(fact.lh.terms))
+        body = [(expr.predicate, tuple(expr.terms)) for expr in fact.rhs]
+        if any(predicate in ("", "neq") for predicate, _ in body):
+            return None
+        bound = frozenset(term for _, terms in body for term in terms if term != "_" and is_variable(term))
+        if any(term == "_" or (is_variable(term) and term not in bound) for term in head[1]):
+            return None
+        return head, body, bound
+
+    # Se materializan los predicados cuyas reglas son todas Datalog y dependen solo de
+    # hechos sin variables o de otros predicados materializados
+    def __compile(self):
+        rules = {}
+        excluded = set(self.__opaque)
+        for fact in self.__clauses:
+            rule = self.__rule(fact)
+            if rule is None:
+                excluded.add(fact.lh.predicate)
+            else:
+                rules.setdefault(rule[0][0], []).append(rule)
+        changed = True
+        while changed:
+            changed = False
+            for head in list(rules):
+                if head in excluded or any(p in excluded for _, body, _ in rules[head] for p, _ in body):
+                    excluded.add(head)
+                    del rules[head]
+                    changed = True
+        self.__heads = rules
+        self.__rules = [rule for head_rules in rules.values() for rule in head_rules]
+        self.__evaluate_all()
+
+    def __evaluate_all(self):
+        self.__relations = {}   # predicado: set(términos)
+        self.__indices = {}     # (predicado, posición): {término: [términos]}
+        self.derived = FactIndex()
+        delta = {}
+        for predicate, facts in self.__base.items():
+            for terms in facts:
+                if self.__insert(predicate, terms):
+                    delta.setdefault(predicate, []).append(terms)
+        self.__run(delta)
+
+    def __insert(self, predicate: str, terms: tuple) -> bool:
+        relation = self.__relations.setdefault(predicate, set())
+        if terms in relation:
+            return False
+        relation.add(terms)
+        for (indexed, position), index in self.__indices.items():
+            if indexed == predicate and position < len(terms):
+                index.setdefault(terms[position], []).append(terms)
+        if predicate in self.__heads:
+            self.derived.add_terms([(predicate, terms)])
+        return True
+
+    def __index(self, predicate: str, position: int) -> dict:
+        index = self.__indices.get((predicate, position))
+        if index is None:
+            index = self.__indices[(predicate, position)] = {}
+            for terms in self.__relations.get(predicate, ()):
+                if position < len(terms):
+                    index.setdefault(terms[position], []).append(terms)
+        return index
+
+    # Rondas semi-ingenuas: cada derivación nueva usa al menos un hecho de la ronda anterior
+    def __run(self, delta: dict):
+        while delta:
+            new_delta = {}
+            for (head, head_terms), body, variables in self.__rules:
+                for i, (predicate, _) in enumerate(body):
+                    if predicate not in delta:
+                        continue
+                    # El átomo del delta va primero; el resto se busca en los índices
+                    order = [body[i]] + body[:i] + body[i + 1:]
+                    for binding in self.__solve(order, variables, delta[predicate], {}, 0):
+                        terms = tuple(binding.get(term, term) for term in head_terms)
+                        if self.__insert(head, terms):
+                            new_delta.setdefault(head, []).append(terms)
+            delta = new_delta
+
+    # Asignaciones que cumplen el cuerpo desde el átomo k; el primer átomo recorre solo el delta
+    def __solve(self, body: list, variables: frozenset, delta: list, binding: dict, k: int):
+        if k == len(body):
+            yield binding
+            return
+        predicate, pattern = body[k]
+        if k == 0:
+            candidates = delta
+        else:
+            values = [binding.get(term) if term in variables else term for term in pattern]
+            position = next((p for p, value in enumerate(values) if value is not None and pattern[p] != "_"), None)
+            if position is None:
+                candidates = self.__relations.get(predicate, ())
+            else:
+                candidates = self.__index(predicate, position).get(values[position], ())
+        for terms in candidates:
+            if len(terms) != len(pattern):
+                continue
+            new_binding = dict(binding)
+            for term, value in zip(pattern, terms):
+                if term == "_":
+                    continue
+                if term in variables:
+                    if new_binding.setdefault(term, value) != value:
+                        break
+                elif term != value:
+                    break
+            else:
+                yield from self.__solve(body, variables, delta, new_binding, k + 1)
+
+    # Hechos nuevos (predicado, términos): se propagan solo sus consecuencias
+    def add_facts(self, facts):
+        delta = {}
+        recompile = False
+        for predicate, terms in facts:
+            if not self.__add_base(predicate, terms):
+                recompile = True
+            elif self.__insert(predicate, terms):
+                delta.setdefault(predicate, []).append(terms)
+        if recompile:
+            self.__compile()
+        else:
+            self.__run(delta)
+
+    # Reglas nuevas (Fact de pytholog): se recalcula la materialización
+    def add_rules(self, rules):
+        self.__clauses += list(rules)
+        self.__compile()
+
+    # Respuesta con el formato de pytholog; None si el predicado no está materializado
+    def query(self, expr: pl.Expr):
+        if expr.predicate not in self.__heads:
+            return None
+        result = self.derived.query(expr)
+        return ["No"] if result is None else result
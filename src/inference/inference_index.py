@@ -0,0 +1,176 @@
+#inference index module
+
+import pytholog as pl
+from pytholog.pq import FactHeap
+from pytholog.util import is_variable
+
+# Índice de hechos por predicado y primer término.
+# pytholog guarda los hechos de cada predicado ordenados por el primer término y en cada
+# consulta vuelve a parsear (Expr) todos los hechos candidatos. Aquí los predicados que solo
+# tienen hechos sin variables se indexan en un diccionario {predicado: {primer término: [términos]}}
+# para que una consulta con el primer término fijo sea O(1); los predicados con reglas se
+# siguen resolviendo con pytholog, salvo los materializados (ver inference_datalog.py).
+
+
+# Término sin variables (como is_variable de pytholog, sin intentar float() con los que
+# empiezan en minúscula)
+def is_ground(term: str) -> bool:
+    if not term:
+        return False
+    return (term > "Z" and term != "_") or not is_variable(term)
+
+
+class FactIndex:
+    def __init__(self):
+        self.__facts = {}       # predicado: {primer término: [términos]}
+        self.__ordered = {}     # predicado: términos ordenados por el primer término (como pytholog)
+        self.__rules = set()    # predicados con reglas o con variables en sus hechos
+
+    # Hechos y reglas como texto (se parsean con pytholog)
+    def add(self, facts):
+        terms = []
+        for fact in facts:
+            fact = pl.Fact(fact)
+            if fact.rhs:
+                self.__rules.add(fact.lh.predicate)
+            else:
+                terms.append((fact.lh.predicate, tuple(fact.lh.terms)))
+        self.add_terms(terms)
+
+    # Hechos como (predicado, términos)
+    def add_terms(self, facts):
+        for predicate, terms in facts:
+            if not all(map(is_ground, terms)):
+                self.__rules.add(predicate)
+                continue
+            self.__facts.setdefault(predicate, {}).setdefault(terms[0], []).append(terms)
+            self.__ordered.pop(predicate, None)
+
+    def indexed(self, predicate: str) -> bool:
+        return predicate in self.__facts and predicate not in self.__rules
+
+    def __len__(self):
+        return sum(len(terms) for by_first in self.__facts.values() for terms in by_first.values())
+
+    # Hechos del predicado en el orden en que pytholog los recorre (estable por primer término)
+    def __sorted(self, predicate: str) -> list:
+        ordered = self.__ordered.get(predicate)
+        if ordered is None:
+            by_first = self.__facts[predicate]
+            ordered = self.__ordered[predicate] = [terms for first in sorted(by_first) for terms in by_first[first]]
+        return ordered
+
+    # Unifica la consulta con un hecho; None si no coinciden
+    @staticmethod
+    def __match(pattern: list, terms: tuple):
+        if len(pattern) != len(terms):
+            return None
+        binding = {}
+        for p, t in zip(pattern, terms):
+            if p == "_":
+                continue
+            if is_variable(p):
+                if binding.setdefault(p, t) != t:
+                    return None
+            elif p != t:
+                return None
+        return binding
+
+    # Respuesta con el formato de pytholog (lista de asignaciones, "Yes" o ["No"]);
+    # None si el predicado no está indexado
+    def query(self, expr: pl.Expr):
+        if not self.indexed(expr.predicate):
+            return None
+        first = expr.terms[0]
+        if is_variable(first):
+            candidates = self.__sorted(expr.predicate)
+        else:
+            candidates = self.__facts[expr.predicate].get(first, ())
+        return self.answer(expr.terms, candidates)
+
+    # Respuesta de la consulta con términos `pattern` sobre los hechos `candidates` (tuplas de
+    # términos, en el orden en que se recorren)
+    @classmethod
+    def answer(cls, pattern: list, candidates) -> list:
+        result = []
+        for terms in candidates:
+            binding = cls.__match(pattern, terms)
+            if binding is not None:
+                result.append(binding or "Yes")
+        return result or ["No"]
+
+
+# Hecho de pytholog armado desde sus términos, igual al que resulta de parsear su texto
+def make_fact(predicate: str, terms) -> pl.Fact:
+    text = f"{predicate}({','.join(terms)})"
+    expr = pl.Expr.__new__(pl.Expr)
+    expr.f = expr.string = text
+    expr.predicate, expr.terms, expr.index = predicate, list(terms), 0
+    fact = pl.Fact.__new__(pl.Fact)
+    fact.terms = list(dict.fromkeys(terms))
+    fact.lh, fact.rhs, fact.fact = expr, [], text
+    return fact
+
+
+# KnowledgeBase de pytholog que responde los predicados de solo hechos con el índice.
+# Cada vez que se agregan hechos se limpia el cache de consultas de pytholog (que no se
+# invalida solo y devolvía respuestas anteriores a los hechos nuevos)
+class IndexedKnowledgeBase(pl.KnowledgeBase):
+    def __init__(self, name=None):
+        super().__init__(name)
+        self.facts = FactIndex()
+        # Cambia cada vez que se agregan hechos o reglas (ver InferenceEngine.query)
+        self.version = 0
+        # Predicados derivados ya calculados (ver InferenceEngine.materialize)
+        self.materialization = None
+
+    def add_kn(self, kn):
+        kn = list(kn)
+        super().add_kn(kn)
+        self.facts.add(kn)
+        if self.materialization is not None:
+            clauses = [pl.Fact(clause) for clause in kn]
+            self.materialization.add_facts([(c.lh.predicate, tuple(c.lh.terms)) for c in clauses if not c.rhs])
+            rules = [c for c in clauses if c.rhs]
+            if rules:
+                self.materialization.add_rules(rules)
+        self.clear_cache()
+        self.version += 1
+
+    # Agrega hechos dados como (predicado, términos) sin pasar por el parser de pytholog.
+    # Cada predicado se ordena una sola vez (pytholog inserta hecho por hecho en una lista
+    # ordenada); el orden estable deja los hechos con el mismo primer término en el orden
+    # en que se agregaron, como add_kn
+    def add_facts(self, facts):
+        facts = [(predicate, tuple(terms)) for predicate, terms in facts]
+        by_predicate = {}
+        for predicate, terms in facts:
+            by_predicate.setdefault(predicate, []).append(make_fact(predicate, terms))
+        for predicate, new_facts in by_predicate.items():
+            bucket = self.db.setdefault(predicate, {"facts": FactHeap(), "goals": FactHeap(), "terms": FactHeap()})
+            bucket["facts"]._container.extend(new_facts)
+            bucket["facts"]._container.sort(key=lambda fact: fact.lh.terms[0])
+            bucket["goals"]._container.extend([] for _ in new_facts)
+            bucket["goals"]._container.sort()
+            bucket["terms"]._container.extend(fact.terms for fact in new_facts)
+            bucket["terms"]._container.sort()
+        self.facts.add_terms(facts)
+        if self.materialization is not None:
+            self.materialization.add_facts(facts)
+        self.clear_cache()
+        self.version += 1
+
+    # El predicado se responde con hechos (indexados o materializados) y no con pytholog
+    def answers_from_facts(self, predicate: str) -> bool:
+        if self.facts.indexed(predicate):
+            return True
+        return self.materialization is not None and predicate in self.materialization.predicates
+
+    def query(self, expr, cut=False, show_path=False):
+        if not show_path:
+            result = self.facts.query(expr)
+            if result is None and self.materialization is not None:
+                result = self.materialization.query(expr)
+            if result is not None:
+                return result
+        return super().query(expr, cut, show_path)
@@ -0,0 +1,131 @@
+#inference snapshot module
+
+import os
+import re
+import time
+import pickle
+import hashlib
+from importlib.metadata import version
+import datasets.cache
+from .inference import InferenceEngine
+
+# Snapshots binarios de bases de conocimientos ya construidas.
+# Se guarda la KnowledgeBase compilada (hechos de pytholog, índice y reglas) junto con las
+# cláusulas de las que salió, en un archivo identificado por el hash de los archivos fuente
+# (kb_files), el hash del dataset y la versión de pytholog. Al volver a cargar el mismo
+# dataset se lee el snapshot en lugar de volver a generar y parsear la base.
+# Igual que el cache de datasets, se conservan los MAX_SNAPSHOTS snapshots usados más
+# recientemente de cada nombre (la fecha de modificación se actualiza al cargar).
+
+SNAPSHOT_DIR = datasets.cache.CACHE_DIR
+
+# Se incrementa cuando cambia el formato del snapshot o la forma de generar la base
+SNAPSHOT_VERSION = 2
+MAX_SNAPSHOTS = datasets.cache.MAX_ENTRIES
+
+__snapshot_pattern__ = re.compile(r"^(?P<name>.+)-snapshot-[0-9a-f]{32}\.pkl$")
+
+
+def snapshot_key(sources, dataset_hash: str) -> str:
+    h = hashlib.blake2b(digest_size=16)
+    h.update(f"{SNAPSHOT_VERSION}:{version('pytholog')}:{dataset_hash}".encode("utf-8"))
+    for source in sources:
+        h.update(datasets.cache.content_hash(source).encode("utf-8"))
+    return h.hexdigest()
+
+
+def snapshot_path(key: str, name: str = "kb") -> str:
+    return os.path.join(SNAPSHOT_DIR, f"{name}-snapshot-{key}.pkl")
+
+
+def save_snapshot(path: str, engine: InferenceEngine, clauses, build_seconds: float):
+    os.makedirs(SNAPSHOT_DIR, exist_ok=True)
+    tmp_path = f"{path}.tmp-{os.getpid()}"
+    snapshot = {"kb": engine.knowledgeBase, "clauses": clauses, "build_seconds": build_seconds}
+    with open(tmp_path, "wb") as f:
+        pickle.dump(snapshot, f, protocol=pickle.HIGHEST_PROTOCOL)
+    # Renombrar al final para que una escritura interrumpida nunca quede como snapshot válido
+    os.replace(tmp_path, path)
+
+
+# Retorna (motor, cláusulas, reporte) o None si no hay snapshot válido.
+# El reporte indica cuánto tomó cargar el snapshot, cuánto tomó construir la base y la diferencia
+def load_snapshot(path: str):
+    if not os.path.exists(path):
+        return None
+    start = time.perf_counter()
+    try:
+        with open(path, "rb") as f:
+            snapshot = pickle.load(f)
+        engine = InferenceEngine(snapshot["kb"])
+    except (OSError, pickle.UnpicklingError, EOFError, KeyError, AttributeError, TypeError):
+        # Otro proceso pudo haberlo borrado o reemplazado mientras tanto
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+        return None
+    load_seconds = time.perf_counter() - start
+    try:
+        os.utime(path)
+    except OSError:
+        pass
+    return engine, snapshot["clauses"], snapshot_report(True, load_seconds, snapshot["build_seconds"])
+
+
+# Deja solo los `max_snapshots` snapshots de `name` usados más recientemente
+def prune_snapshots(name: str = "kb", max_snapshots: int = MAX_SNAPSHOTS):
+    try:
+        entries = os.listdir(SNAPSHOT_DIR)
+    except OSError:
+        return
+    current = []
+    for entry in entries:
+        match = __snapshot_pattern__.match(entry)
+        if match is None or match["name"] != name:
+            continue
+        path = os.path.join(SNAPSHOT_DIR, entry)
+        try:
+            current.append((os.path.getmtime(path), path))
+        except OSError:
+            pass
+    current.sort(reverse=True)
+    for _, path in current[max_snapshots:]:
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+
+def snapshot_report(from_snapshot: bool, seconds: float, build_seconds: float) -> dict:
+    return {
+        "from_snapshot": from_snapshot,
+        "load_ms": seconds * 1000,
+        "build_ms": build_seconds * 1000,
+        "saved_ms": (build_seconds - seconds) * 1000 if from_snapshot else 0.0,
+    }
+
+
+# Construye con build() -> (motor, cláusulas) y retorna (motor, cláusulas, segundos);
+# se mide con el mismo reloj que load_snapshot para que el reporte sea comparable
+def timed_build(build):
+    start = time.perf_counter()
+    engine, clauses = build()
+    return engine, clauses, time.perf_counter() - start
+
+
+# Retorna (motor, cláusulas, reporte) desde el snapshot de las fuentes y el dataset dados;
+# si no existe se construye con build() -> (motor, cláusulas) y se guarda para la próxima carga
+def load_engine(sources, dataset_hash: str, build, name: str = "kb"):
+    path = snapshot_path(snapshot_key(sources, dataset_hash), name)
+    loaded = load_snapshot(path)
+    if loaded is not None:
+        return loaded
+
+    engine, clauses, build_seconds = timed_build(build)
+    try:
+        save_snapshot(path, engine, clauses, build_seconds)
+        prune_snapshots(name)
+    except (OSError, pickle.PicklingError) as e:
+        print(f"⚠️ Advertencia: No se pudo guardar el snapshot '{path}': {e}")
+    return engine, clauses, snapshot_report(False, build_seconds, build_seconds)
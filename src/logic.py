@@ -16,20 +16,71 @@ def load_geo_json(filtpath):
         file =  geojson.load(f)
     return file
 
+# Índice de la tabla de incidencias, construido una sola vez por tabla:
+# canton -> fila, provincia -> rango de filas y el top de cantones de cada provincia ya ordenado
+class IncidenceIndex:
+    def __init__(self, df: pd.DataFrame):
+        self.source = df
+        # Ordenar por provincia (estable) para que cada provincia sea un rango contiguo
+        self.df = df.sort_values(by='Provincia', kind='stable')
+        self.records = self.df.to_dict(orient='records')
+
+        self.canton_rows = {}
+        for i, canton in enumerate(self.df['Canton']):
+            self.canton_rows.setdefault(canton, i)
+
+        provinces = self.df['Provincia'].to_numpy()
+        self.province_ranges = {}
+        for i, province in enumerate(provinces):
+            start, _ = self.province_ranges.get(province, (i, i))
+            self.province_ranges[province] = (start, i + 1)
+
+        self.province_top = {}
+        for province, (start, stop) in self.province_ranges.items():
+            ranked = self.df.iloc[start:stop].sort_values(by='Total', ascending=False, kind='stable')
+            self.province_top[province] = ranked[['Total', 'Canton']].rename(columns={'Total': 'value', 'Canton': 'name'}).to_dict(orient='records')
+
+    # Row del cantón como diccionario (vacío si no existe)
+    def canton_record(self, canton: str) -> dict:
+        row = self.canton_rows.get(place_to_uppercase(canton))
+        return {} if row is None else self.records[row]
+
+    def province_of(self, canton: str):
+        return self.canton_record(canton).get('Provincia')
+
+    # Los n cantones con más delitos de la provincia, en formato {'value', 'name'}
+    def top(self, province: str, n: int = 5) -> list:
+        return self.province_top.get(province, [])[:n]
+
+    def canton_rows_df(self, canton: str) -> pd.DataFrame:
+        row = self.canton_rows.get(place_to_uppercase(canton))
+        return self.df.iloc[[] if row is None else [row]]
+
+    def province_rows_df(self, province: str) -> pd.DataFrame:
+        start, stop = self.province_ranges.get(province, (0, 0))
+        return self.df.iloc[start:stop]
+
+
+__incidence_index__ = None
+
+# Retorna el índice de datasets.incidence; se reconstruye solo si el dataset se recargó
+def get_incidence_index() -> IncidenceIndex:
+    global __incidence_index__
+    df = datasets.incidence
+    index = __incidence_index__
+    if index is None or index.source is not df:
+        index = IncidenceIndex(df)
+        __incidence_index__ = index
+    return index
+
 #retorna el row del canton del dataset incidencia
 def get_canton_incidence_statistics(canton: str):
-    df = datasets.incidence
-    c = place_to_uppercase(canton)
-    column = df.loc[df['Canton'] == c]    
-    return column.reset_index()
+    return get_incidence_index().canton_rows_df(canton).reset_index()
 
 # retorna los rows para la procvincia dada del dataset incidencia
 def get_province_incidence_statistics(province:str):
-    df = datasets.incidence
-    p = place_to_uppercase(province)
-    province = (df[df["Canton"] ==  p]["Provincia"]).values[0]
-    df = df[df["Provincia"] == province]
-    return df
+    index = get_incidence_index()
+    return index.province_rows_df(index.province_of(province))
 
 # Retorna un dataframe formateado para plotly
 def get_incidence_df_with_geo_data(geojson_path: Path):    
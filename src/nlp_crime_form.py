@@ -1,11 +1,44 @@
 import os
 import streamlit as st
 from .nlp_crime_form_logic import *
-from .inference.inference import InferenceEngine
 
 default_dataset_path = os.path.join(current_dir, "datasets", "Estadisticas.csv")
 # titulo = "Estadísticas Criminales apoyadas por IA"
 
+# Agrega solo los registros nuevos de un export del OIJ a lo ya cargado
+# y actualiza las incidencias, la base de conocimientos y el motor de inferencia
+def ingest_new_rows(delta_file):
+    if st.session_state.get('ingested_rows') is None:
+        st.session_state.ingested_rows = IngestedRows(row_fingerprints(st.session_state.main_dataframe))
+
+    # Un .csv mal formado no debe tumbar la aplicación (el error se muestra al retornar None)
+    try:
+        new_rows = read_main_dataframe(delta_file)
+    except (ValueError, KeyError) as e:
+        print(f"Error! ingest_new_rows: {e}")
+        return None
+    total_rows = len(new_rows)
+    new_rows = st.session_state.ingested_rows.filter_new(new_rows)
+
+    if len(new_rows) > 0:
+        incidences = append_incidences(st.session_state.incidences_dataframe, new_rows)
+        if incidences is None:
+            return None
+        new_places = set(incidences['Canton']) != set(st.session_state.incidences_dataframe['Canton'])
+
+        st.session_state.ingested_rows.commit(new_rows)
+        st.session_state.main_dataframe = append_main_rows(st.session_state.main_dataframe, new_rows)
+        st.session_state.incidences_dataframe = incidences
+        # Sin snapshot: cada archivo de registros nuevos da un dataset distinto
+        st.session_state.IE, st.session_state.kb_clauses, st.session_state.kb_report = load_inference_engine(incidences, use_snapshot=False)
+        st.session_state.kb_dataframe = kb_dataframe(st.session_state.kb_clauses)
+
+        # El modelo de lenguaje solo se recarga si aparecen cantones nuevos
+        if new_places:
+            st.session_state.nlp_comps = load_nlp_model(incidences)
+
+    return len(new_rows), total_rows - len(new_rows)
+
 def render_nlp_crime_form():
     if 'loaded_file' not in st.session_state:
         st.session_state.loaded_file = None
@@ -46,6 +79,23 @@ def render_nlp_crime_form():
             needs_reset = st.session_state.loaded_file != uploaded_file
             st.session_state.loaded_file = uploaded_file
 
+        if needs_reset:
+            st.session_state.ingested_rows = None
+            st.session_state.delta_id = None
+
+        # Actualización incremental con registros nuevos del OIJ
+        if st.session_state.IE is not None and not needs_reset:
+            delta_file = st.file_uploader("Agregar registros nuevos al archivo cargado (.CSV):", type="csv")
+            delta_id = None if delta_file is None else (delta_file.name, delta_file.size)
+            if delta_file is not None and st.session_state.get('delta_id') != delta_id:
+                result = ingest_new_rows(delta_file)
+                if result is None:
+                    st.error("Error: El archivo de registros nuevos no tiene el formato correcto.")
+                else:
+                    # Solo se marca como procesado si se ingirió, para poder reintentar el mismo archivo
+                    st.session_state.delta_id = delta_id
+                    st.success(f"Se agregaron {result[0]} registros nuevos ({result[1]} ya existían).")
+
         if st.session_state.loaded_file is not None:
             # Display del contenido del .csv seleccionado
             st.subheader("Contenido:")
@@ -70,17 +120,19 @@ def render_nlp_crime_form():
                     st.subheader("Base de conocimientos:")
                     st.write("Incluye contenido estático y contenido generado dinamicamente con base en el archivo .CSV seleccionado.")
                     if needs_reset:
-                        st.session_state.kb_dataframe = create_kb_dataframe(st.session_state.incidences_dataframe)
+                        # Carga de reglas al motor de inferencia (desde el snapshot si ya se generó antes)
+                        st.session_state.IE, st.session_state.kb_clauses, st.session_state.kb_report = load_inference_engine(st.session_state.incidences_dataframe)
+                        st.session_state.kb_dataframe = kb_dataframe(st.session_state.kb_clauses)
                     if st.session_state.kb_dataframe is None:
                         st.error("Error: Hubo un problema al generar la base de conocimientos, por favor inténtelo de nuevo.")
                     else:
                         st.write(st.session_state.kb_dataframe)
+                        report = st.session_state.get('kb_report')
+                        if report is not None and report["from_snapshot"]:
+                            st.caption(f"Base de conocimientos cargada del snapshot en {report['load_ms']:.0f} ms "
+                                       f"(generarla tomó {report['build_ms']:.0f} ms, {report['saved_ms']:.0f} ms menos).")
 
                         if needs_reset:
-                            # Carga de reglas al motor de inferencia
-                            st.session_state.IE = InferenceEngine()
-                            st.session_state.IE.knowledgeBase(st.session_state.kb_dataframe[kb_dataframe_col_name])
-
                             # Cargar el modelo de lenguaje natural y los datos
                             st.session_state.nlp_comps = load_nlp_model(st.session_state.incidences_dataframe)
 
@@ -1,16 +1,23 @@
 import os
+import re
 import pandas as pd
-from datetime import datetime, time
 import numpy as np
 import spacy
 from spacy.matcher import Matcher
 import pytholog as pl
 from .inference import InferenceEngine
+from .inference import inference_snapshot
 import io
+import datasets.cache
+import datasets.time_bands
+import datasets.service
+from datasets.partitions import MonthPartitions
 
 current_dir = os.getcwd()
 geo_path = os.path.join(current_dir, "src", "inference", "kb_files", "geo.txt")
 kb_dataframe_col_name = "Knowledge Base"
+# Archivos de los que sale la parte estática de la base de conocimientos
+kb_source_paths = [geo_path]
 
 # Corrige los headers del archivo .csv en caso de ser necesario
 def fix_csv_headers(uploaded_file):
@@ -28,10 +35,30 @@ def fix_csv_headers(uploaded_file):
     except:
         return uploaded_file
 
-def load_main_dataframe(file):
+# Carga el .csv del OIJ usando el cache columnar (datasets/.cache) cuando es posible
+def load_main_dataframe(file, use_cache: bool = True):
+    if use_cache:
+        return datasets.cache.load_cached_dataframe(file, read_main_dataframe, name="estadisticas")
+    return read_main_dataframe(file)
+
+def read_main_dataframe(file):
     file = fix_csv_headers(file)
     df = pd.read_csv(file, on_bad_lines='skip', encoding='utf-8')
-    df = df.map(lambda x: fix_unicode(x) if isinstance(x, str) else x)
+    df = decode_text_columns(df)
+    # Parsear los rangos de hora una sola vez (quedan guardados en el cache)
+    return datasets.time_bands.add_hour_columns(df)
+
+# Convierte las columnas de texto a categóricas y aplica fix_unicode
+# sobre los valores únicos de cada columna en lugar de sobre cada celda
+def decode_text_columns(df: pd.DataFrame):
+    for col in df.select_dtypes(include=['object', 'string']).columns:
+        codes, uniques = pd.factorize(df[col])
+        fixed = np.asarray([fix_unicode(str(u)) for u in uniques], dtype=str)
+        # fix_unicode puede unir dos valores distintos (p.ej. "RI&#209;A" y "RIÑA")
+        categories, inverse = np.unique(fixed, return_inverse=True)
+        if len(categories) > 0:
+            codes = np.where(codes >= 0, inverse[np.maximum(codes, 0)], -1)
+        df[col] = pd.Categorical.from_codes(codes, categories=categories.tolist())
     return df
     
 def fix_unicode(str: str):
@@ -44,170 +71,326 @@ def fix_unicode(str: str):
     str = str.replace("&#220;", "Ü")
     return str
 
-def create_incidence_dataframe(df: pd.DataFrame):
+# Cantidad de filas por bloque al construir la tabla de incidencias por streaming
+INCIDENCE_CHUNK_SIZE = 200_000
+
+FUZZY_TIME_LABELS = np.array(["Madrugada", "Mañana", "Tarde", "Noche"])
+
+# Niveles geográficos de la tabla de incidencias, del más general al más específico.
+# Se puede agregar 'Distrito' como tercer nivel (ver PLACE_LEVELS)
+INCIDENCE_LEVELS = ['Provincia', 'Canton']
+PLACE_LEVELS = ['Provincia', 'Canton', 'Distrito']
+
+# Cuantiles del Total que separan las categorías de incidencia
+INCIDENCE_QUANTILES = [0.15, 0.38, 0.62, 0.85]
+INCIDENCE_CLASSES = np.array(['Muy Baja', 'Baja', 'Moderada', 'Alta', 'Muy Alta'])
+
+# Clasifica los rangos de hora en Madrugada, Mañana, Tarde o Noche de acuerdo a la
+# hora final del rango, usando la representación numérica de datasets.time_bands
+def hour_fuzzier(df: pd.DataFrame):
+    bands = datasets.time_bands.hour_columns(df)[datasets.time_bands.BAND_COL].to_numpy()
+    if (bands < 0).any():
+        raise ValueError("El archivo contiene rangos de hora inválidos")
+    return pd.Series(FUZZY_TIME_LABELS[bands], index=df.index)
+
+# Limpia las columnas de lugar (común a la carga completa y a la carga por bloques)
+def clean_incidence_places(df: pd.DataFrame):
+    # Convertir las columnas de texto y categóricas a 'str'
+    for col in df.select_dtypes(include=['object', 'string', 'category']).columns:
+        df[col] = df[col].astype(str)
+
+    # Remover los rows donde se desconoce el lugar del Delito
+    df = df[df['Provincia'] != "DESCONOCIDO"]
+    # Rellenar los datos de Cantón con el valor de la provincia cuando Cantón = DESCONOCIDO
+    df['Canton'] =  df['Canton'].where(df['Canton'] != 'DESCONOCIDO', df['Provincia'])
+    # La única excepción es Guanacaste cuyo Cantón Central no es Guanacaste sino Liberia
+    df['Canton'] = df['Canton'].where(df['Canton'] != 'GUANACASTE', 'LIBERIA')
+    # Cuando Distrito se usa como nivel, los distritos vacíos se agrupan como DESCONOCIDO
+    if 'Distrito' in df.columns:
+        df['Distrito'] = df['Distrito'].astype(str).where(df['Distrito'].notna(), 'DESCONOCIDO')
+    return df
+
+# Cuenta los delitos por (Provincia, Canton, Hora Fuzzy)
+def count_incidences(df: pd.DataFrame, levels=INCIDENCE_LEVELS):
+    df = clean_incidence_places(df)
+    fuzzy_time_col = hour_fuzzier(df).rename('Hora Fuzzy')
+    return df.groupby([*levels, fuzzy_time_col]).size()
+
+# Si se indica start y/o end solo se cuentan los delitos con Fecha en ese rango (inclusive)
+def create_incidence_dataframe(df: pd.DataFrame, start=None, end=None, levels=INCIDENCE_LEVELS):
     try:
-        # Drop de la columna Distrito ya que no aporta datos
-        if 'Distrito' in df.columns:
+        # Drop de la columna Distrito ya que no aporta datos (salvo que se use como nivel)
+        if 'Distrito' in df.columns and 'Distrito' not in levels:
             df.drop('Distrito', axis=1, inplace=True)
 
         # Convertir tipo de dato de la columna Fecha a Datetime
         df['Fecha'] = pd.to_datetime(df['Fecha'])
 
-        # Convertir solo las columnas de tipo 'object' a 'str'
-        for col in df.select_dtypes(include=['object']).columns:
-            df[col] = df[col].astype(str)
-
-        # Remover los rows donde se desconoce el lugar del Delito
-        df = df[df['Provincia'] != "DESCONOCIDO"]
-        # Rellenar los datos de Cantón con el valor de la provincia cuando Cantón = DESCONOCIDO
-        df['Canton'] =  df['Canton'].where(df['Canton'] != 'DESCONOCIDO', df['Provincia'])
-        # La única excepción es Guanacaste cuyo Cantón Central no es Guanacaste sino Liberia
-        df['Canton'] = df['Canton'].where(df['Canton'] != 'GUANACASTE', 'LIBERIA')
-
-        # Esta función toma los valores de la hora y los clasifica
-        # en Madrugada, Mañana, Tarde o Noche de acuerdo al rango horario
-        def hour_fuzzier(hour_range):
-            time_string = hour_range.split("-")[1].strip()
-
-            dawn_start = time(00, 00, 00)
-            dawn_end = time(5, 59, 59)
-            morn_start = time(6, 00, 00)
-            morn_end = time(11, 59, 59)
-            aftn_start = time(12, 00, 00)
-            aftn_end = time(17, 59, 59)
-            nigt_start = time(18, 00, 00)
-            nigt_end = time(23, 59, 59)
-            
-            #print(time_string)   
-            time_object = datetime.strptime(time_string, "%H:%M:%S").time()
-            if dawn_start <= time_object <= dawn_end:
-                return "Madrugada"
-            elif morn_start <= time_object <= morn_end:
-                return "Mañana"
-            elif aftn_start <= time_object <= aftn_end:
-                return "Tarde"
-            else:
-                return "Noche"
-
-        #Insertar la columna fuzzy para la hora del delito en el dataframe    
-        fuzzy_time_col = df['Hora'].apply(lambda x: hour_fuzzier(x))
-        df.insert(4, "Hora Fuzzy", fuzzy_time_col)
-
-        # Drop de la columna Distrito ya que no aporta datos
-        if 'Hora' in df.columns:
-            df.drop('Hora', axis=1, inplace=True)
-
-        #print("\r\nCLEAN ESTADISTICAS.CSV")
-        #print(df.head())
+        # Las particiones por mes permiten revisar solo los meses del rango
+        if start is not None or end is not None:
+            df = datasets.service.date_range(df, start, end)
 
         # Intentaremos hacer una Fuzzy sobre la incidencia de un delito dado
         # La incidencia del delito seria la cantidad de delitos de este tipo dividido entre la cantidad total de delitos
         # posteriormente con todas las incidencias se pueden clasificar 
 
         #Tabla de incidencia 
-        incidence = df.groupby(['Provincia', 'Canton', 'Hora Fuzzy']).size().reset_index(name="Incidencia")
-
-        #Pivotea los valores de Incidencia como columnas y los tamaños del conjunto como valores
-        piv_df = incidence.pivot_table(index=['Provincia', 'Canton'], columns='Hora Fuzzy', values='Incidencia', fill_value=0).reset_index()
-
-        #Formatea la tabla resultante
-        piv_df.columns.name = None # Remover el nombre de las columnas
-        piv_df = piv_df.rename_axis(None, axis=1)
-
-        #Convertir los valores de float a enteros
-        f_cols = ['Madrugada', 'Mañana', 'Tarde', 'Noche']
-        piv_df[f_cols] = piv_df[f_cols].map(np.int64)
-
-        piv_df['Total'] = piv_df['Madrugada'] + piv_df['Mañana'] + piv_df['Tarde'] + piv_df['Noche']
-
-        tdf = piv_df.groupby('Provincia').sum().reset_index()
-        tdf.drop('Canton', axis=1, inplace=True)
-        prov_totals = tdf[['Provincia', 'Total']].sort_values(by='Total')
-
-        def province_percentile(x):
-            province = x['Provincia']
-            c_total = x['Total']
-            total = prov_totals.loc[prov_totals['Provincia'] == province, 'Total'].values[0]  # Extracts the first matching value
-            return (c_total/total)* 100
-
-
-        piv_df['Perc Provincia'] = piv_df.apply(province_percentile, axis=1)
+        counts = count_incidences(df, levels)
+        return incidence_dataframe_from_counts(counts, levels)
+    
+    except:
+        return None
 
-        total_incidents = piv_df['Total'].sum()
+# Construye la misma tabla de incidencias leyendo el .csv en bloques de `chunk_size` filas.
+# Cada bloque se reduce a conteos por (Provincia, Canton, Hora Fuzzy) que se acumulan,
+# por lo que la memoria depende del tamaño del bloque y no del tamaño del archivo.
+# Retorna None si el archivo no tiene el formato del OIJ; unos `levels` inválidos son un error
+def create_incidence_dataframe_by_chunks(file, chunk_size: int = INCIDENCE_CHUNK_SIZE, start=None, end=None,
+                                         levels=INCIDENCE_LEVELS):
+    invalid = [level for level in levels if level not in PLACE_LEVELS]
+    if invalid:
+        raise ValueError(f"Niveles desconocidos: {invalid} (opciones: {PLACE_LEVELS})")
 
-        piv_df['Perc Pais'] = piv_df.apply(lambda x: 0 if x['Total'] == 0 else ((x['Total']/total_incidents) * 100) , axis=1)
+    try:
+        by_date = start is not None or end is not None
+        file = fix_csv_headers(file)
+        usecols = ['Hora', *levels] + (['Fecha'] if by_date else [])
+        reader = pd.read_csv(file, usecols=usecols, chunksize=chunk_size,
+                             on_bad_lines='skip', encoding='utf-8')
+
+        counts = None
+        for chunk in reader:
+            if by_date:
+                chunk = chunk.iloc[MonthPartitions(chunk['Fecha']).positions(start, end)]
+            chunk_counts = count_incidences(decode_text_columns(chunk), levels)
+            counts = chunk_counts if counts is None else counts.add(chunk_counts, fill_value=0)
+        if counts is None:
+            return None
+
+        return incidence_dataframe_from_counts(counts.astype(np.int64), levels)
+
+    # Columnas faltantes (usecols), texto mal formado o rangos de hora inválidos
+    except (ValueError, KeyError, IndexError, OSError) as e:
+        print(f"Error! create_incidence_dataframe_by_chunks: {e}")
+        return None
 
-        # Debido a la distribucion de los datos se usaran los Quartiles para determinar las categorias de incidencia de Delitos 
+# Calcula la tabla de incidencias (piv_df) a partir de los conteos por (Provincia, Canton, Hora Fuzzy)
+def incidence_dataframe_from_counts(counts: pd.Series, levels=INCIDENCE_LEVELS):
+    incidence = counts.reset_index(name="Incidencia")
+
+    #Pivotea los valores de Incidencia como columnas y los tamaños del conjunto como valores
+    piv_df = incidence.pivot_table(index=list(levels), columns='Hora Fuzzy', values='Incidencia', fill_value=0).reset_index()
+
+    #Formatea la tabla resultante
+    piv_df.columns.name = None # Remover el nombre de las columnas
+    piv_df = piv_df.rename_axis(None, axis=1)
+
+    #Convertir los valores de float a enteros
+    f_cols = FUZZY_TIME_LABELS.tolist()
+    piv_df[f_cols] = piv_df[f_cols].astype(np.int64)
+
+    return update_incidence_metrics(piv_df)
+
+# Calcula las columnas que dependen de los totales: Total, Perc Provincia, Perc Pais e Incidencia.
+# Todo se hace por columnas (transform por grupo y searchsorted), sin apply por fila.
+# Si la tabla tiene Distrito como nivel también se agrega Perc Canton
+def update_incidence_metrics(piv_df: pd.DataFrame):
+    levels = [col for col in PLACE_LEVELS if col in piv_df.columns]
+    piv_df['Total'] = piv_df['Madrugada'] + piv_df['Mañana'] + piv_df['Tarde'] + piv_df['Noche']
+
+    # Porcentaje del total de cada nivel superior (provincia, y cantón si hay distritos)
+    for i, level in enumerate(levels[:-1]):
+        level_total = piv_df.groupby(levels[:i + 1], sort=False)['Total'].transform('sum')
+        piv_df[f'Perc {level}'] = (piv_df['Total'] / level_total) * 100
+
+    total_incidents = piv_df['Total'].sum()
+    piv_df['Perc Pais'] = ((piv_df['Total'] / total_incidents) * 100).where(piv_df['Total'] != 0, 0.0)
+
+    # Debido a la distribucion de los datos se usaran los Quartiles para determinar las categorias de incidencia de Delitos 
+    q1, q2, q3, q4 = piv_df['Total'].quantile(INCIDENCE_QUANTILES).to_numpy()
+
+    # Muy Baja: <= q1, Baja: (q1, q2), Moderada: [q2, q3), Alta: [q3, q4), Muy Alta: >= q4
+    totals = piv_df['Total'].to_numpy()
+    ranks = np.where(totals <= q1, 0, 1 + np.searchsorted([q2, q3, q4], totals, side='right'))
+    piv_df['Incidencia'] = INCIDENCE_CLASSES[ranks]
+
+    #print("\r\nINCIDENCIAS.CSV")
+    #print(piv_df.head())
+    return piv_df
+
+# Columnas del export del OIJ que identifican un registro al momento de deduplicar
+INGEST_KEY_COLUMNS = ['Delito', 'SubDelito', 'Fecha', 'Hora', 'Victima', 'SubVictima', 'Edad', 'Sexo', 'Nacionalidad', 'Provincia', 'Canton']
+
+# Hash (uint64) de cada registro; normaliza Fecha y el tipo de las columnas para que el
+# mismo registro tenga el mismo hash antes y después de create_incidence_dataframe
+def row_fingerprints(df: pd.DataFrame):
+    keys = df[[col for col in INGEST_KEY_COLUMNS if col in df.columns]].copy()
+    if 'Fecha' in keys.columns:
+        keys['Fecha'] = pd.to_datetime(keys['Fecha'], errors='coerce')
+    keys = keys.astype(str)
+    return pd.util.hash_pandas_object(keys, index=False).to_numpy()
+
+# Registros ya ingeridos: hashes ordenados y cuántas veces se ha ingerido cada uno.
+# Se cuentan las repeticiones porque el OIJ puede reportar dos delitos idénticos
+class IngestedRows:
+    def __init__(self, fingerprints=None):
+        if fingerprints is None:
+            fingerprints = np.array([], dtype=np.uint64)
+        self.fingerprints, self.counts = np.unique(fingerprints, return_counts=True)
+
+    def __len__(self):
+        return int(self.counts.sum())
+
+    # Cantidad de veces que ya se ingirió cada hash
+    def count(self, fingerprints):
+        if len(self.fingerprints) == 0:
+            return np.zeros(len(fingerprints), dtype=np.int64)
+        pos = np.minimum(np.searchsorted(self.fingerprints, fingerprints), len(self.fingerprints) - 1)
+        return np.where(self.fingerprints[pos] == fingerprints, self.counts[pos], 0)
+
+    # Retorna solo los registros que no se han ingerido (no los marca; ver commit).
+    # Si un registro se repite m veces y ya se ingirió k veces, se retornan max(0, m - k)
+    def filter_new(self, df: pd.DataFrame):
+        fingerprints = row_fingerprints(df)
+        uniques, inverse, repeats = np.unique(fingerprints, return_inverse=True, return_counts=True)
+        known = self.count(uniques)
+
+        # Número de ocurrencia de cada fila dentro de su grupo de hashes iguales
+        order = np.argsort(inverse, kind='stable')
+        occurrence = np.empty(len(fingerprints), dtype=np.int64)
+        occurrence[order] = np.arange(len(fingerprints)) - np.repeat(np.cumsum(repeats) - repeats, repeats)
+        return df[occurrence >= known[inverse]]
+
+    # Marca los registros como ingeridos; se llama con lo que retornó filter_new una vez
+    # que se agregó a las incidencias, para que un error no los deje marcados
+    def commit(self, df: pd.DataFrame):
+        uniques, repeats = np.unique(row_fingerprints(df), return_counts=True)
+        exists = self.count(uniques) > 0
+
+        # Sumar a los hashes existentes, luego insertar los nuevos
+        pos = np.searchsorted(self.fingerprints, uniques[exists])
+        self.counts[pos] += repeats[exists]
+        pos = np.searchsorted(self.fingerprints, uniques[~exists])
+        self.fingerprints = np.insert(self.fingerprints, pos, uniques[~exists])
+        self.counts = np.insert(self.counts, pos, repeats[~exists])
+
+# Agrega registros nuevos al dataframe principal con sus mismas columnas
+# (create_incidence_dataframe quita Distrito y convierte Fecha a datetime)
+def append_main_rows(df: pd.DataFrame, new_rows: pd.DataFrame):
+    new_rows = new_rows.reindex(columns=df.columns)
+    if 'Fecha' in df.columns and pd.api.types.is_datetime64_any_dtype(df['Fecha']):
+        new_rows['Fecha'] = pd.to_datetime(new_rows['Fecha'])
+    return pd.concat([df, new_rows], ignore_index=True)
+
+# Agrega registros nuevos a una tabla de incidencias existente: suma sus conteos por
+# (Provincia, Canton, franja) y recalcula solo las columnas que dependen de los totales
+def append_incidences(incidences: pd.DataFrame, new_rows: pd.DataFrame):
+    try:
+        f_cols = FUZZY_TIME_LABELS.tolist()
+        counts = count_incidences(new_rows)
+        if counts.empty:
+            return incidences
 
-        q1 = piv_df['Total'].quantile(0.15)
-        q2 = piv_df['Total'].quantile(0.38)
-        q3 = piv_df['Total'].quantile(0.62)
-        q4 = piv_df['Total'].quantile(0.85)
+        delta = counts.unstack('Hora Fuzzy', fill_value=0).reindex(columns=f_cols, fill_value=0)
 
-        def place_ranker(incidents):
-            if incidents <= q1:
-                return 'Muy Baja'
-            elif q1 < incidents < q2:
-                return 'Baja'
-            elif q2 <= incidents < q3:
-                return 'Moderada'
-            elif q3 <= incidents < q4:
-                return 'Alta'
-            else:
-                return 'Muy Alta'
+        piv_df = incidences.set_index(['Provincia', 'Canton'])
+        piv_df = piv_df.reindex(piv_df.index.union(delta.index))
+        delta = delta.reindex(piv_df.index, fill_value=0)
+        piv_df[f_cols] = piv_df[f_cols].fillna(0).astype(np.int64) + delta[f_cols].astype(np.int64)
 
-        piv_df['Incidencia'] = piv_df['Total'].apply(place_ranker)
+        piv_df = piv_df.reset_index()[incidences.columns]
+        return update_incidence_metrics(piv_df)
 
-        #print("\r\nINCIDENCIAS.CSV")
-        #print(piv_df.head())
-        return piv_df
-    
     except:
         return None
     
-def add_row(df: pd.DataFrame, col_name: str, value: str):
-    return pd.concat([df, pd.DataFrame({col_name: [value]})], ignore_index=True)
-
 def format_str_for_rule(str):
     return str.lower().replace(" ", "_")
 
-def df_column_to_facts(df: pd.DataFrame, column: str, fact_name: str):
-    unique_values = df[column].unique()
-    unique_values = np.vectorize(lambda x: f"{format_str_for_rule(fact_name)}({format_str_for_rule(x)})")(unique_values)
-    return unique_values
-
 def format_rule(rule: str):
     return f"{rule.rstrip(".")}"
 
-def create_kb_dataframe(incidences: pd.DataFrame):
+# Versión de format_str_for_rule por columnas
+def format_column_for_rule(column: pd.Series):
+    return column.astype(str).str.lower().str.replace(" ", "_")
+
+# Cláusula de un archivo de la base de conocimientos: los hechos como (predicado, términos)
+# y las reglas como texto
+def parse_clause(line: str):
+    line = format_rule(line.strip())
+    match = re.fullmatch(r"(\w+)\(([^()]*)\)", line)
+    if match is None:
+        return line
+    return match.group(1), tuple(term.replace(" ", "") for term in match.group(2).split(","))
+
+def clause_to_str(clause):
+    if isinstance(clause, str):
+        return clause
+    predicate, terms = clause
+    return f"{predicate}({', '.join(terms)})"
+
+# Genera la base de conocimientos en una sola pasada sobre la tabla de incidencias.
+# Retorna las cláusulas en orden: hechos como (predicado, términos) y reglas como texto
+def create_kb_clauses(incidences: pd.DataFrame):
     # Carga reglas del archivo geo.txt
     with open(geo_path, "r") as file:
-        geo_data = file.readlines()
+        clauses = [parse_clause(line) for line in file if line.strip()]
 
-    kb = pd.DataFrame([item.strip() for item in geo_data], columns=[kb_dataframe_col_name])
-    kb = kb.dropna(how="all")
-    kb = kb[kb.apply(lambda row: row.astype(str).str.strip().any(), axis=1)]
-    
     # Genera reglas de incidencias con base en las incidencias calculadas
-    incidence_levels = df_column_to_facts(incidences, "Incidencia", "incidence_level")
-    for val in incidence_levels:
-        kb = add_row(kb, kb_dataframe_col_name, val)
+    levels = format_column_for_rule(incidences["Incidencia"])
+    clauses += [("incidence_level", (level,)) for level in levels.unique()]
 
     # Genera reglas de incidencias por cantón con base en las incidencias calculadas
-    for i in range(incidences.shape[0]):
-        canton = format_str_for_rule(f"{incidences.Canton[i]}")
-        if incidences.Canton[i] == incidences.Provincia[i]:
-            canton += "_cc"
-        incidence_level = format_str_for_rule(f"{incidences.Incidencia[i]}")
-        kb = add_row(kb, kb_dataframe_col_name, f"canton_incidence_level({canton}, {incidence_level})")
-    
+    # (por distrito si la tabla tiene Distrito como nivel; los nombres de distrito se repiten
+    # entre cantones, así que se identifican como canton_distrito)
+    cantons = format_column_for_rule(incidences["Canton"])
+    cantons = cantons.where(incidences["Canton"] != incidences["Provincia"], cantons + "_cc")
+    if "Distrito" in incidences.columns:
+        districts = cantons + "_" + format_column_for_rule(incidences["Distrito"])
+        clauses += [("district_of", terms) for terms in zip(districts, cantons)]
+        clauses += [("district_incidence_level", terms) for terms in zip(districts, levels)]
+    else:
+        clauses += [("canton_incidence_level", terms) for terms in zip(cantons, levels)]
+
     # Agrega reglas adicionales
-    kb = add_row(kb, kb_dataframe_col_name, "dangerous_incidence_level(alta)")
-    kb = add_row(kb, kb_dataframe_col_name, "dangerous_incidence_level(muy_alta)")
-    kb = add_row(kb, kb_dataframe_col_name, "is_dangerous(C) :- canton_incidence_level(C, L), dangerous_incidence_level(L)")
+    clauses += [
+        ("dangerous_incidence_level", ("alta",)),
+        ("dangerous_incidence_level", ("muy_alta",)),
+        "is_dangerous(C) :- canton_incidence_level(C, L), dangerous_incidence_level(L)",
+    ]
+    return clauses
+
+# Vista de la base de conocimientos para mostrar (una cláusula por fila)
+def kb_dataframe(clauses):
+    return pd.DataFrame({kb_dataframe_col_name: [clause_to_str(clause) for clause in clauses]})
 
-    kb = kb.map(lambda x: format_rule(x) if isinstance(x, str) else x)
-    return kb
+def create_kb_dataframe(incidences: pd.DataFrame):
+    return kb_dataframe(create_kb_clauses(incidences))
+
+# Carga las cláusulas a un motor nuevo: los hechos directo como términos y las reglas como texto.
+# Con materialize los predicados derivados (is_dangerous, ...) se calculan una sola vez
+def create_inference_engine(clauses, materialize: bool = True):
+    engine = InferenceEngine()
+    engine.knowledgeBase.add_facts([clause for clause in clauses if not isinstance(clause, str)])
+    rules = [clause for clause in clauses if isinstance(clause, str)]
+    if rules:
+        engine.knowledgeBase(rules)
+    if materialize:
+        engine.materialize()
+    return engine
+
+# Motor de inferencia para la tabla de incidencias. Si la base ya se construyó antes con los
+# mismos archivos y datos se carga del snapshot binario (ver inference/inference_snapshot.py).
+# Retorna (motor, cláusulas, reporte con el tiempo de carga y el tiempo ahorrado)
+def load_inference_engine(incidences: pd.DataFrame, use_snapshot: bool = True):
+    def build():
+        clauses = create_kb_clauses(incidences)
+        return create_inference_engine(clauses), clauses
+
+    if not use_snapshot:
+        engine, clauses, seconds = inference_snapshot.timed_build(build)
+        return engine, clauses, inference_snapshot.snapshot_report(False, seconds, seconds)
+    return inference_snapshot.load_engine(kb_source_paths, datasets.cache.frame_hash(incidences), build)
 
 def load_nlp_model(df: pd.DataFrame):
     nlp = spacy.load("es_core_news_sm")
@@ -231,13 +414,27 @@ def load_nlp_model(df: pd.DataFrame):
     
     return {"nlp": nlp, "matcher": matcher, "provincias": provincias}
 
-def __query_kb__(expr: str, engine: InferenceEngine):
-    expr = format_rule(expr)
-    query_result = engine.knowledgeBase.query(pl.Expr(expr))
+def __query_reply__(expr: str, query_result):
     try:
         return {"query": pl.Expr(expr), "reply": query_result[0]["R"]}
     except:
         return {"query": pl.Expr(expr), "reply": query_result[0]}
+
+def __query_kb__(expr: str, engine: InferenceEngine):
+    expr = format_rule(expr)
+    return __query_reply__(expr, engine.query(expr))
+
+# Varias consultas en una sola llamada al motor
+def __query_kb_many__(exprs, engine: InferenceEngine):
+    exprs = [format_rule(expr) for expr in exprs]
+    return [__query_reply__(expr, query_result) for expr, query_result in zip(exprs, engine.query_many(exprs))]
+
+# Nivel de incidencia y peligrosidad de todos los cantones (para mapas y exportaciones)
+def canton_kb_table(engine: InferenceEngine):
+    table = engine.query_table("canton_incidence_level(C, L)").rename(columns={"C": "Canton", "L": "Incidencia"})
+    dangerous = set(engine.query_table("is_dangerous(C)")["C"])
+    table["Peligroso"] = table["Canton"].isin(dangerous)
+    return table
     
 def conceptual_nlp_query_processing(nlp_comps, query: str, engine: InferenceEngine):
     # Obtener entidades
@@ -287,8 +484,8 @@ def conceptual_nlp_query_processing(nlp_comps, query: str, engine: InferenceEngi
             res["queries"]["cells"].append(f"canton_incidence_level({format_str_for_rule(canton)}, R)")
             res["queries"]["cells"].append(f"{accion}({format_str_for_rule(canton)})")
 
-        for query in res["queries"]["cells"]:
-            res["results"]["cells"].append(__query_kb__(query, engine)["reply"])
+        for reply in __query_kb_many__(res["queries"]["cells"], engine):
+            res["results"]["cells"].append(reply["reply"])
 
         if len(res["results"]["cells"]) > 0:
             res_canton = canton.replace("_cc", "").title()
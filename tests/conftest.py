@@ -0,0 +1,7 @@
+import os
+import sys
+
+# Las pruebas importan los paquetes del proyecto (fuzzy, datasets, src) desde la raíz del repositorio
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RAIZ)
+os.chdir(RAIZ)
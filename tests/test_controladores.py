@@ -0,0 +1,73 @@
+import numpy as np
+import pytest
+from collections import OrderedDict
+from skfuzzy import control as ctrl
+import fuzzy
+from fuzzy.controladores import computar_por_etapas
+
+SISTEMAS = [fuzzy.ALERTA_VIOLENCIA, fuzzy.VULNERABILIDAD, fuzzy.VULNERABILIDAD_RESPALDO, fuzzy.TENDENCIA]
+
+
+def muestras(nombre: str, n: int, semilla: int = 0) -> list:
+    controlador = fuzzy.obtener_controlador(nombre)
+    generador = np.random.default_rng(semilla)
+    antecedentes = controlador.sistema.antecedents
+    columnas = {a.label: generador.uniform(a.universe.min(), a.universe.max(), n) for a in antecedentes}
+    return [{k: v[i] for k, v in columnas.items()} for i in range(n)]
+
+
+def calcular(sim: ctrl.ControlSystemSimulation, entradas: dict, por_etapas: bool):
+    for k, v in entradas.items():
+        sim.input[k] = v
+    sim.output = OrderedDict()
+    try:
+        if por_etapas:
+            return computar_por_etapas(sim)
+        sim.compute()
+        return dict(sim.output)
+    except (KeyError, ValueError, AssertionError) as e:
+        return type(e)
+
+
+# computar_por_etapas debe dar lo mismo que sim.compute() de skfuzzy, incluidas las
+# entradas repetidas (cache) y los puntos donde ninguna regla se activa
+@pytest.mark.parametrize("nombre", SISTEMAS)
+def test_etapas_igual_a_compute(nombre):
+    controlador = fuzzy.obtener_controlador(nombre)
+    por_etapas = ctrl.ControlSystemSimulation(ctrl.ControlSystem(controlador.constructor()))
+    referencia = ctrl.ControlSystemSimulation(ctrl.ControlSystem(controlador.constructor()))
+
+    puntos = muestras(nombre, 100)
+    resultados = [calcular(por_etapas, entradas, True) for entradas in puntos + puntos[:10]]
+    assert resultados == [calcular(referencia, entradas, False) for entradas in puntos + puntos[:10]]
+    assert any(isinstance(r, dict) for r in resultados)
+
+
+def test_perfil_separa_las_etapas():
+    controlador = fuzzy.obtener_controlador(fuzzy.VULNERABILIDAD)
+    with fuzzy.perfilar() as perfil:
+        for entradas in muestras(fuzzy.VULNERABILIDAD, 5, semilla=1):
+            controlador.evaluar_salidas(**entradas)
+    etapas = set(perfil.resumen()['etapa'])
+    assert {'fuzzificacion', 'reglas', 'agregacion', 'defuzzificacion'} <= etapas
+
+
+# El lote usa un ControlSystem por hilo que se compila una sola vez
+def test_lote_reutiliza_el_sistema():
+    controlador = fuzzy.obtener_controlador(fuzzy.ALERTA_VIOLENCIA)
+    puntos = muestras(fuzzy.ALERTA_VIOLENCIA, 50, semilla=2)
+    columnas = {k: np.array([p[k] for p in puntos]) for k in puntos[0]}
+
+    primero = controlador.evaluar_lote(**columnas)
+    construcciones = controlador.construcciones
+    segundo = controlador.evaluar_lote(**columnas)
+    assert controlador.construcciones == construcciones
+    np.testing.assert_array_equal(primero, segundo)
+
+    uno_a_uno = []
+    for p in puntos:
+        try:
+            uno_a_uno.append(controlador.evaluar(**p))
+        except (KeyError, ValueError, AssertionError):
+            uno_a_uno.append(np.nan)
+    np.testing.assert_allclose(primero, uno_a_uno, equal_nan=True)
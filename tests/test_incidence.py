@@ -0,0 +1,60 @@
+import io
+import os
+import pytest
+
+pytest.importorskip("streamlit")
+pytest.importorskip("spacy")
+
+import pandas as pd
+from src.nlp_crime_form_logic import (
+    PLACE_LEVELS,
+    create_incidence_dataframe,
+    create_incidence_dataframe_by_chunks,
+    read_main_dataframe,
+)
+
+ESTADISTICAS = os.path.join("datasets", "Estadisticas.csv")
+
+pytestmark = pytest.mark.skipif(not os.path.exists(ESTADISTICAS), reason="falta datasets/Estadisticas.csv")
+
+
+def by_chunks(levels, chunk_size=7_919, start=None, end=None):
+    with open(ESTADISTICAS, "rb") as file:
+        return create_incidence_dataframe_by_chunks(file, chunk_size, start, end, levels)
+
+
+def full(levels, start=None, end=None):
+    with open(ESTADISTICAS, "rb") as file:
+        df = read_main_dataframe(file)
+    return create_incidence_dataframe(df, start, end, levels)
+
+
+def assert_same(a: pd.DataFrame, b: pd.DataFrame):
+    assert a is not None and b is not None
+    key = [col for col in PLACE_LEVELS if col in a.columns]
+    a = a.sort_values(key).reset_index(drop=True)
+    b = b.sort_values(key).reset_index(drop=True)
+    pd.testing.assert_frame_equal(a, b, check_dtype=False, check_categorical=False)
+
+
+# Un tamaño de bloque que no divide al archivo obliga a acumular conteos de varios bloques
+@pytest.mark.parametrize("levels", [["Provincia", "Canton"], ["Provincia", "Canton", "Distrito"]])
+def test_chunks_match_full_read(levels):
+    assert_same(by_chunks(levels), full(levels))
+
+
+def test_chunks_match_full_read_by_date():
+    levels = ["Provincia", "Canton"]
+    assert_same(by_chunks(levels, start="2022-03-01", end="2022-08-31"),
+                full(levels, "2022-03-01", "2022-08-31"))
+
+
+def test_chunks_reject_unknown_levels():
+    with pytest.raises(ValueError):
+        by_chunks(["Provincia", "Barrio"])
+
+
+# Un archivo sin las columnas del OIJ no es un error de programación: retorna None
+def test_chunks_reject_files_without_oij_columns():
+    file = io.BytesIO(b"Delito,SubDelito,Fecha,Hora,Provincia\nROBO,FORZADURA,2023-11-20,00:00:00 - 02:59:59,SAN JOSE\n")
+    assert create_incidence_dataframe_by_chunks(file) is None
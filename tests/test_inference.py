@@ -0,0 +1,121 @@
+import pytest
+
+pytest.importorskip("streamlit")
+pytest.importorskip("spacy")
+
+import pandas as pd
+import pytholog as pl
+from src.nlp_crime_form_logic import create_kb_clauses, create_inference_engine, clause_to_str
+
+# La materialización (src/inference/inference_datalog.py) debe responder lo mismo que la
+# búsqueda de pytholog sin cache. Única diferencia: pytholog responde "No" a una consulta sin
+# variables que tiene varias pruebas (ver test_multiple_proofs)
+
+INCIDENCES = pd.DataFrame({
+    "Provincia": ["SAN JOSE", "SAN JOSE", "SAN JOSE", "HEREDIA", "LIMON", "CARTAGO"],
+    "Canton": ["ESCAZU", "DESAMPARADOS", "SANTA ANA", "HEREDIA", "POCOCI", "CARTAGO"],
+    "Incidencia": ["Alta", "Muy Alta", "Baja", "Alta", "Moderada", "Muy Baja"],
+})
+
+EXTRA_CLAUSES = [
+    "dangerous_province(P) :- belongs_to(C, P), is_dangerous(C)",
+    "safe_incidence_level(baja)",
+    "safe_incidence_level(muy_baja)",
+    "is_safe(C) :- canton_incidence_level(C, L), safe_incidence_level(L)",
+]
+
+CANTONS = ["escazu", "desamparados", "santa_ana", "heredia_cc", "pococi", "cartago_cc", "dota"]
+PROVINCES = ["san_jose", "heredia", "limon", "cartago", "alajuela"]
+
+
+def clauses():
+    return create_kb_clauses(INCIDENCES) + EXTRA_CLAUSES
+
+
+def reference(clauses):
+    kb = pl.KnowledgeBase("reference")
+    kb([clause_to_str(clause) for clause in clauses])
+    return kb
+
+
+def reference_query(kb, goal):
+    kb.clear_cache()
+    return kb.query(pl.Expr(goal))
+
+
+# pytholog puede repetir asignaciones y no garantiza el orden
+def normalized(result):
+    return sorted(set(map(str, result)))
+
+
+GOALS = (
+    [f"is_dangerous({c})" for c in CANTONS]
+    + [f"is_safe({c})" for c in CANTONS]
+    + [f"is_canton_of({c}, Y)" for c in CANTONS]
+    + ["is_dangerous(C)", "is_safe(C)", "is_canton_of(X, san_jose)", "is_canton_of(X, Y)",
+       "dangerous_province(P)", "dangerous_province(heredia)", "dangerous_province(limon)"]
+)
+
+
+@pytest.fixture(scope="module")
+def engines():
+    return create_inference_engine(clauses()), reference(clauses())
+
+
+@pytest.mark.parametrize("goal", GOALS)
+def test_materialized_answers_match_pytholog(engines, goal):
+    engine, kb = engines
+    assert normalized(engine.query(goal)) == normalized(reference_query(kb, goal))
+
+
+def test_materialized_predicates(engines):
+    engine, _ = engines
+    assert {"is_dangerous", "is_safe", "is_canton_of", "dangerous_province"} <= engine.knowledgeBase.materialization.predicates
+
+
+# San José tiene dos cantones peligrosos: pytholog encuentra dos pruebas y responde "No"
+def test_multiple_proofs(engines):
+    engine, kb = engines
+    assert reference_query(kb, "dangerous_province(san_jose)") == ["No"]
+    assert engine.query("dangerous_province(san_jose)") == ["Yes"]
+    assert engine.query("dangerous_province(heredia)") == reference_query(kb, "dangerous_province(heredia)") == ["Yes"]
+
+
+# Los hechos agregados después de materializar se propagan igual que reconstruyendo la base
+def test_incremental_facts_match_rebuild():
+    new_facts = [("canton_incidence_level", ("dota", "muy_alta")), ("canton_incidence_level", ("pococi", "baja"))]
+    engine = create_inference_engine(clauses())
+    engine.knowledgeBase.add_facts(new_facts)
+    kb = reference(clauses() + new_facts)
+    assert engine.query("is_dangerous(dota)") == ["Yes"]
+    for goal in GOALS:
+        assert normalized(engine.query(goal)) == normalized(reference_query(kb, goal)), goal
+
+
+def test_recursive_rules_match_pytholog():
+    chain = [("edge", (f"n{i}", f"n{i + 1}")) for i in range(8)]
+    rules = ["path(X, Y) :- edge(X, Y)", "path(X, Y) :- edge(X, Z), path(Z, Y)"]
+    engine = create_inference_engine(chain + rules)
+    kb = reference(chain + rules)
+    assert "path" in engine.knowledgeBase.materialization.predicates
+    for goal in ["path(n0, Y)", "path(n3, Y)", "path(n5, n2)", "path(n2, n5)"]:
+        assert normalized(engine.query(goal)) == normalized(reference_query(kb, goal)), goal
+
+
+# query_many resuelve juntas las consultas de un mismo predicado; debe responder exactamente lo
+# mismo (y en el mismo orden) que consultarlas una por una, con o sin materialización
+@pytest.mark.parametrize("materialize", [True, False])
+def test_query_many_matches_query(materialize):
+    goals = GOALS + [f"canton_incidence_level({c}, L)" for c in CANTONS] + ["canton_incidence_level(C, alta)", "is_dangerous(escazu)"]
+    batched = create_inference_engine(clauses(), materialize).query_many(goals)
+    single = create_inference_engine(clauses(), materialize)
+    assert batched == [single.query(goal) for goal in goals]
+
+
+def test_query_many_resolves_each_predicate_once():
+    engine = create_inference_engine(clauses())
+    engine.query_many([f"canton_incidence_level({c}, L)" for c in CANTONS])
+    # Una falla por consulta del lote más la del patrón abierto
+    assert engine.memo_stats()["misses"] == len(CANTONS) + 1
+    assert engine.query_many([f"canton_incidence_level({c}, L)" for c in CANTONS]) == \
+        [engine.query(f"canton_incidence_level({c}, L)") for c in CANTONS]
@@ -0,0 +1,95 @@
+import io
+import pytest
+
+pytest.importorskip("streamlit")
+pytest.importorskip("spacy")
+
+import numpy as np
+import pandas as pd
+from src.nlp_crime_form_logic import (
+    IngestedRows,
+    append_incidences,
+    append_main_rows,
+    create_incidence_dataframe,
+    read_main_dataframe,
+)
+
+HEADER = "Delito,SubDelito,Fecha,Hora,Victima,SubVictima,Edad,Sexo,Nacionalidad,Provincia,Canton,Distrito\n"
+HOURS = ["00:00:00 - 02:59:59", "09:00:00 - 11:59:59", "15:00:00 - 17:59:59", "21:00:00 - 23:59:59"]
+PLACES = [("SAN JOSE", "ESCAZU"), ("SAN JOSE", "SANTA ANA"), ("HEREDIA", "BARVA"), ("LIMON", "POCOCI")]
+
+
+# Registros distintos entre sí (un día por registro a partir de `first_day`)
+def oij_rows(n: int, first_day: int = 0, seed: int = 0) -> list:
+    rng = np.random.default_rng(seed)
+    rows = []
+    for day in range(first_day, first_day + n):
+        provincia, canton = PLACES[rng.integers(len(PLACES))]
+        fecha = (pd.Timestamp("2022-01-01") + pd.Timedelta(days=day)).strftime("%Y-%m-%d")
+        rows.append(f"ROBO,FORZADURA,{fecha},{HOURS[rng.integers(len(HOURS))]},"
+                    f"PERSONA,PEATON [PERSONA],Mayor de edad,{['HOMBRE', 'MUJER'][rng.integers(2)]},COSTA RICA,{provincia},{canton},\n")
+    return rows
+
+
+def read(rows: list) -> pd.DataFrame:
+    return read_main_dataframe(io.BytesIO((HEADER + "".join(rows)).encode("utf-8")))
+
+
+@pytest.fixture
+def rows():
+    return oij_rows(300)
+
+
+# Un registro que aparece m veces en el delta y ya se ingirió k veces se agrega max(0, m - k)
+# veces (el OIJ puede reportar dos delitos idénticos)
+def test_filter_new_keeps_repeated_records(rows):
+    ingested = IngestedRows()
+    ingested.commit(read([rows[0], rows[1]]))
+
+    delta = read([rows[0], rows[0], rows[0], rows[1], rows[2], rows[2]])
+    new_rows = ingested.filter_new(delta)
+    assert list(new_rows.index) == [1, 2, 4, 5]
+
+    ingested.commit(new_rows)
+    assert len(ingested) == 6
+    assert len(ingested.filter_new(delta)) == 0
+
+
+# filter_new no marca nada: si la actualización falla antes de commit, el mismo archivo se
+# puede volver a ingerir
+def test_filter_new_does_not_mark_rows(rows):
+    base = read(rows[:200])
+    ingested = IngestedRows()
+    ingested.commit(base)
+    delta = read(rows[150:])
+
+    first = ingested.filter_new(delta)
+    assert len(first) == 100
+    assert ingested.filter_new(delta).index.equals(first.index)
+
+    ingested.commit(first)
+    assert len(ingested.filter_new(delta)) == 0
+
+
+# Agregar el delta a la tabla de incidencias da lo mismo que reconstruirla con todos los registros
+def test_append_incidences_matches_full_rebuild(rows):
+    extra = oij_rows(100, first_day=300, seed=1)
+    main = read(rows)
+    incidences = create_incidence_dataframe(main)
+
+    ingested = IngestedRows()
+    ingested.commit(main)
+    new_rows = ingested.filter_new(read(rows[250:] + extra))
+    assert len(new_rows) == len(extra)
+
+    updated = append_incidences(incidences, new_rows)
+    main = append_main_rows(main, new_rows)
+    assert len(main) == len(rows) + len(extra)
+
+    rebuilt = create_incidence_dataframe(main.copy())
+    key = ["Provincia", "Canton"]
+    pd.testing.assert_frame_equal(
+        updated.sort_values(key).reset_index(drop=True),
+        rebuilt.sort_values(key).reset_index(drop=True)[updated.columns],
+        check_dtype=False,
+    )
@@ -0,0 +1,117 @@
+import numpy as np
+import pytest
+import skfuzzy as fuzz
+import fuzzy
+from fuzzy.precision import CASOS, variante
+
+# El motor Mamdani (fuzzy/mamdani.py) calcula el centroide exacto de los tramos lineales.
+# skfuzzy integra sobre el universo discreto de cada salida, así que contra los sistemas tal
+# como están definidos la diferencia es el error de esa malla; contra un universo denso debe
+# coincidir casi exactamente.
+ERROR_MALLA = 0.05
+ERROR_DENSO = 1e-3
+PUNTOS_DENSO = 20001
+MUESTRAS = 200
+
+
+def sistemas():
+    return [nombre() if callable(nombre) else nombre for nombre in CASOS.values()]
+
+
+def muestras(motor: fuzzy.MotorMamdani, n: int, semilla: int = 0) -> dict:
+    generador = np.random.default_rng(semilla)
+    return {nombre: generador.uniform(v.inicio, v.fin, n) for nombre, v in motor.entradas.items()}
+
+
+# Evalúa punto por punto con skfuzzy; NaN donde ninguna regla se activa
+def evaluar_skfuzzy(nombre: str, entradas: dict) -> np.ndarray:
+    controlador = fuzzy.obtener_controlador(nombre)
+    n = len(next(iter(entradas.values())))
+    resultados = np.empty(n)
+    for i in range(n):
+        try:
+            resultados[i] = controlador.evaluar(**{k: v[i] for k, v in entradas.items()})
+        except (KeyError, ValueError, AssertionError):
+            resultados[i] = np.nan
+    return resultados
+
+
+@pytest.mark.parametrize("nombre", sistemas())
+def test_motor_igual_a_skfuzzy(nombre):
+    motor = fuzzy.evaluador_lote(nombre)
+    entradas = muestras(motor, MUESTRAS)
+    exacto = motor.evaluar(**entradas)
+    skfuzzy = evaluar_skfuzzy(nombre, entradas)
+
+    np.testing.assert_array_equal(np.isnan(exacto), np.isnan(skfuzzy))
+    validos = ~np.isnan(exacto)
+    assert np.abs(exacto[validos] - skfuzzy[validos]).max() <= ERROR_MALLA
+
+
+@pytest.mark.parametrize("nombre", sistemas())
+def test_motor_igual_a_universo_denso(nombre):
+    motor = fuzzy.evaluador_lote(nombre)
+    entradas = muestras(motor, 20, semilla=1)
+    exacto = motor.evaluar(**entradas)
+    denso = evaluar_skfuzzy(variante(nombre, PUNTOS_DENSO), entradas)
+
+    validos = ~np.isnan(exacto) & ~np.isnan(denso)
+    assert validos.any()
+    assert np.abs(exacto[validos] - denso[validos]).max() <= ERROR_DENSO
+
+
+# Funsionesv2.calcular_nivel_peligro antes del motor: fuzz.trimf/defuzz sobre un universo
+# de salida de 11 puntos (0, 0.1, ..., 1). NaN donde ninguna regla se activa (defuzz fallaba)
+def peligro_anterior(total_delitos: float, gravedad_prom: float) -> float:
+    delitos = np.arange(0, 101, 1)
+    gravedad = np.arange(0, 11, 1)
+    peligro = np.arange(0, 1.1, 0.1)
+    delitos_level = [fuzz.interp_membership(delitos, fuzz.trimf(delitos, p), total_delitos) for p in ([0, 0, 30], [20, 50, 80], [60, 100, 100])]
+    gravedad_level = [fuzz.interp_membership(gravedad, fuzz.trimf(gravedad, p), gravedad_prom) for p in ([0, 0, 3], [2, 5, 8], [6, 10, 10])]
+    peligro_bajo, peligro_medio, peligro_alto = (fuzz.trimf(peligro, p) for p in ([0, 0, 0.5], [0.3, 0.5, 0.7], [0.5, 1, 1]))
+    agregado = np.fmax(np.fmin(min(delitos_level[2], gravedad_level[2]), peligro_alto),
+                       np.fmax(np.fmin(min(delitos_level[1], gravedad_level[1]), peligro_medio),
+                               np.fmin(min(delitos_level[0], gravedad_level[0]), peligro_bajo)))
+    try:
+        return fuzz.defuzz(peligro, agregado, 'centroid')
+    except AssertionError:
+        return np.nan
+
+
+@pytest.fixture(scope="module")
+def funsionesv2():
+    return pytest.importorskip("Funsionesv2")
+
+
+# Con el centroide exacto el nivel cambia hasta ~0.02, así que cerca de los cortes (0.4 y 0.7)
+# algunas etiquetas cambian respecto a la versión anterior
+def test_nivel_peligro_contra_version_anterior(funsionesv2):
+    cambios = []
+    for total in range(0, 101):
+        for gravedad in np.arange(0, 10.01, 0.5):
+            anterior = peligro_anterior(total, gravedad)
+            actual = float(funsionesv2.motor_peligro.evaluar(delitos=total, gravedad=gravedad))
+            assert np.isnan(actual) == np.isnan(anterior)
+            if np.isnan(actual):
+                continue
+            assert abs(actual - anterior) <= ERROR_MALLA
+            if funsionesv2.clasificar_nivel_peligro(actual) != funsionesv2.clasificar_nivel_peligro(anterior):
+                cambios.append((total, float(gravedad)))
+                assert min(abs(actual - corte) for corte in (0.4, 0.7)) <= ERROR_MALLA
+    assert cambios == [(28, 2.5), (70, 7.5), (71, 7.5), (75, 7.0), (78, 6.5)]
+
+
+def test_nivel_peligro_cambia_de_etiqueta_en_el_corte(funsionesv2):
+    # 75 delitos con gravedad 7.0: antes 0.7036 (Alto), ahora 0.6905 (Medio)
+    assert peligro_anterior(75, 7.0) == pytest.approx(0.7036, abs=1e-4)
+    assert float(funsionesv2.motor_peligro.evaluar(delitos=75, gravedad=7.0)) == pytest.approx(0.6905, abs=1e-4)
+    assert funsionesv2.clasificar_nivel_peligro(peligro_anterior(75, 7.0)) == "Alto"
+    assert funsionesv2.clasificar_nivel_peligro(float(funsionesv2.motor_peligro.evaluar(delitos=75, gravedad=7.0))) == "Medio"
+
+
+def test_nivel_peligro_recorta_entradas_al_universo(funsionesv2):
+    # Antes más de 100 delitos no activaba ninguna regla (defuzz fallaba); ahora se recorta
+    # al universo como ControlSystem y cuenta como 'alto'
+    assert np.isnan(peligro_anterior(120, 9.0))
+    assert float(funsionesv2.motor_peligro.evaluar(delitos=120, gravedad=9.0)) == pytest.approx(
+        float(funsionesv2.motor_peligro.evaluar(delitos=100, gravedad=9.0)))
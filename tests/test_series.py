@@ -0,0 +1,46 @@
+import numpy as np
+import pytest
+from datasets.series import trend_slopes, MIN_MONTHS
+
+
+# Pendiente como la calculaba el caso 4: np.polyfit sobre los meses con registros
+def polyfit_slope(counts: np.ndarray) -> float:
+    y = counts[counts > 0]
+    if len(y) < MIN_MONTHS:
+        return np.nan
+    return np.polyfit(np.arange(len(y)), y, 1)[0]
+
+
+@pytest.fixture
+def counts():
+    generador = np.random.default_rng(0)
+    counts = generador.poisson(3, size=(50, 24))
+    counts[generador.random(counts.shape) < 0.3] = 0
+    counts[:5] = 4          # series constantes (pendiente 0)
+    counts[5, 2:] = 0       # menos de MIN_MONTHS meses
+    return counts
+
+
+def test_trend_slopes_match_polyfit(counts):
+    slopes = trend_slopes(counts)
+    expected = np.array([polyfit_slope(row) for row in counts])
+    np.testing.assert_array_equal(np.isnan(slopes), np.isnan(expected))
+    np.testing.assert_allclose(slopes, expected, rtol=0, atol=1e-9)
+
+
+# La fórmula cerrada y polyfit difieren en ~1e-15, lo que solo cambia el texto "{:.2f}" del
+# caso 4 en dos situaciones: series planas, donde la fórmula da 0.0 exacto y polyfit deja un
+# residuo negativo ("0.00" donde antes era "-0.00"), y pendientes justo en medio centavo
+# (p.ej. 0.075 se puede imprimir como "0.07" o "0.08")
+def test_trend_slopes_formatting_differences(counts):
+    slopes = trend_slopes(counts)
+    expected = np.array([polyfit_slope(row) for row in counts])
+    valid = ~np.isnan(expected)
+    for e, s in zip(expected[valid], slopes[valid]):
+        if f"{e:.2f}" == f"{s:.2f}":
+            continue
+        half_cent_tie = abs(abs(s * 100) % 1 - 0.5) < 1e-6
+        assert {f"{e:.2f}", f"{s:.2f}"} == {"-0.00", "0.00"} or half_cent_tie
+
+    assert (slopes[:5] == 0).all()
+    assert [f"{s:.2f}" for s in slopes[:5]] == ["0.00"] * 5
@@ -0,0 +1,63 @@
+import os
+import pytest
+
+pytest.importorskip("streamlit")
+pytest.importorskip("spacy")
+
+import pandas as pd
+from src.inference import inference_snapshot
+from src.nlp_crime_form_logic import create_kb_clauses, create_inference_engine
+
+INCIDENCES = pd.DataFrame({
+    "Provincia": ["SAN JOSE", "HEREDIA", "LIMON"],
+    "Canton": ["ESCAZU", "BARVA", "POCOCI"],
+    "Incidencia": ["Alta", "Baja", "Moderada"],
+})
+
+
+@pytest.fixture(autouse=True)
+def snapshot_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(inference_snapshot, "SNAPSHOT_DIR", str(tmp_path))
+    return tmp_path
+
+
+def build():
+    clauses = create_kb_clauses(INCIDENCES)
+    return create_inference_engine(clauses), clauses
+
+
+def snapshots(directory) -> list:
+    return sorted(entry for entry in os.listdir(directory) if entry.endswith(".pkl"))
+
+
+def test_load_engine_uses_the_snapshot(snapshot_dir):
+    engine, clauses, report = inference_snapshot.load_engine([], "dataset", build)
+    assert not report["from_snapshot"]
+    loaded, loaded_clauses, report = inference_snapshot.load_engine([], "dataset", build)
+    assert report["from_snapshot"]
+    assert loaded_clauses == clauses
+    assert loaded.query("is_dangerous(escazu)") == engine.query("is_dangerous(escazu)")
+
+
+# Solo se conservan los MAX_SNAPSHOTS usados más recientemente; cargar uno lo marca como usado
+def test_old_snapshots_are_pruned(snapshot_dir):
+    paths = []
+    for i in range(inference_snapshot.MAX_SNAPSHOTS):
+        inference_snapshot.load_engine([], f"dataset-{i}", build)
+        paths.append(inference_snapshot.snapshot_path(inference_snapshot.snapshot_key([], f"dataset-{i}")))
+        os.utime(paths[-1], (1000 + i, 1000 + i))
+
+    assert inference_snapshot.load_engine([], "dataset-0", build)[2]["from_snapshot"]
+    inference_snapshot.load_engine([], "nuevo", build)
+    assert len(snapshots(snapshot_dir)) == inference_snapshot.MAX_SNAPSHOTS
+    assert not os.path.exists(paths[1])
+    assert os.path.exists(paths[0])
+
+
+def test_corrupt_snapshot_is_discarded(snapshot_dir):
+    path = inference_snapshot.snapshot_path(inference_snapshot.snapshot_key([], "dataset"))
+    with open(path, "wb") as f:
+        f.write(b"no es un pickle")
+    assert inference_snapshot.load_snapshot(path) is None
+    assert not os.path.exists(path)
+    assert not inference_snapshot.load_engine([], "dataset", build)[2]["from_snapshot"]
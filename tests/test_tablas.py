@@ -0,0 +1,65 @@
+import numpy as np
+import pandas as pd
+import pytest
+import fuzzy
+from fuzzy.tablas import EDADES, TablaVulnerabilidad
+
+SISTEMAS = [fuzzy.VULNERABILIDAD, fuzzy.VULNERABILIDAD_RESPALDO]
+ZONAS = [("SAN JOSE", "ESCAZU"), ("SAN JOSE", "SANTA ANA"), ("HEREDIA", "BARVA"), ("LIMON", "POCOCI")]
+
+
+@pytest.fixture
+def df():
+    generador = np.random.default_rng(0)
+    zonas = generador.integers(len(ZONAS), size=500)
+    return pd.DataFrame({
+        'Provincia': [ZONAS[z][0] for z in zonas],
+        'Canton': [ZONAS[z][1] for z in zonas],
+        'Sexo': generador.choice(['HOMBRE', 'MUJER'], size=500, p=[0.7, 0.3]),
+    })
+
+
+@pytest.fixture
+def precision_definida():
+    yield
+    for nombre in SISTEMAS:
+        fuzzy.definir_precision(nombre, 'definida')
+
+
+# Nivel que da fuzzy.evaluar (con la precisión definida) para cada zona, edad y sexo de la tabla
+def niveles_punto_a_punto(nombre: str, tabla: TablaVulnerabilidad, edades) -> dict:
+    niveles = {}
+    for zona, (zona_riesgo, *riesgos) in tabla.entradas.items():
+        for edad in edades:
+            for sexo, riesgo_sexo in enumerate(riesgos):
+                try:
+                    niveles[zona, edad, sexo] = fuzzy.evaluar(nombre, edad=edad, riesgo_sexo=riesgo_sexo, zona_riesgo=zona_riesgo)
+                except (KeyError, ValueError, AssertionError):
+                    niveles[zona, edad, sexo] = np.nan
+    return niveles
+
+
+@pytest.mark.parametrize("precision", ['definida', 'gruesa', 'analitica'])
+@pytest.mark.parametrize("nombre", SISTEMAS)
+def test_tabla_igual_a_evaluar(nombre, precision, df, precision_definida):
+    fuzzy.definir_precision(nombre, precision)
+    tabla = TablaVulnerabilidad(nombre)
+    tabla.actualizar(df)
+
+    esperados = niveles_punto_a_punto(nombre, tabla, EDADES[::7])
+    obtenidos = [tabla.nivel(*zona, edad, sexo) for zona, edad, sexo in esperados]
+    np.testing.assert_allclose(obtenidos, list(esperados.values()), rtol=0, atol=1e-9)
+
+
+# Cambiar la precisión del sistema invalida la tabla
+def test_tabla_se_actualiza_con_la_precision(df, precision_definida):
+    nombre = fuzzy.VULNERABILIDAD_RESPALDO
+    tabla = fuzzy.tabla_vulnerabilidad(df, nombre)
+    definida = tabla.a_dataframe()['Nivel'].to_numpy()
+
+    fuzzy.definir_precision(nombre, 'analitica')
+    assert not tabla.vigente(df)
+    tabla = fuzzy.tabla_vulnerabilidad(df, nombre)
+    analitica = tabla.a_dataframe()['Nivel'].to_numpy()
+    # La integración sobre el universo definido y el centroide exacto difieren (hasta ~0.01)
+    assert not np.allclose(definida, analitica, equal_nan=True)